@@ -1,11 +1,13 @@
 import os
 
-from dotenv import load_dotenv
+from dotenv import find_dotenv, load_dotenv
 from pydantic_settings import BaseSettings
 
-load_dotenv(
-    dotenv_path="/home/siddhesh/Desktop/Siddhesh/Projects/news_aggregator/.env"
-)
+from aggregator.constants import MEDIASTACK_URL, NEWS_API_URL
+
+# ENV_FILE, or the nearest .env above the working directory; variables
+# already set in the environment win
+load_dotenv(dotenv_path=os.getenv("ENV_FILE") or find_dotenv(usecwd=True))
 
 LOG_FILE_NAME = "aggregator-api"
 
@@ -28,6 +30,152 @@ class Config(BaseSettings):
     SCIENCE_TECHNOLOGY_FEED_URL: str = os.getenv("SCIENCE_TECHNOLOGY_FEED_URL")
     SPORTS_FEED_URL: str = os.getenv("SPORTS_FEED_URL")
     ENTERTAINMENT_FEED_URL: str = os.getenv("ENTERTAINMENT_FEED_URL")
+    NEWS_API_URL: str = os.getenv("NEWS_API_URL", NEWS_API_URL)
+    MEDIASTACK_URL: str = os.getenv("MEDIASTACK_URL", MEDIASTACK_URL)
+    # Shared upstream HTTP client
+    HTTP_CONNECT_TIMEOUT: float = os.getenv("HTTP_CONNECT_TIMEOUT", 5.0)
+    HTTP_READ_TIMEOUT: float = os.getenv("HTTP_READ_TIMEOUT", 15.0)
+    HTTP_MAX_CONNECTIONS: int = os.getenv("HTTP_MAX_CONNECTIONS", 100)
+    HTTP_MAX_CONNECTIONS_PER_HOST: int = os.getenv(
+        "HTTP_MAX_CONNECTIONS_PER_HOST", 50
+    )
+    HTTP_KEEPALIVE_EXPIRY: float = os.getenv("HTTP_KEEPALIVE_EXPIRY", 30.0)
+    # Seconds a request may spend on upstream calls, retries included
+    UPSTREAM_DEADLINE: float = os.getenv("UPSTREAM_DEADLINE", 10.0)
+    # Retries of transport errors and 5xx, with jittered exponential backoff
+    UPSTREAM_RETRY_ATTEMPTS: int = os.getenv("UPSTREAM_RETRY_ATTEMPTS", 3)
+    UPSTREAM_RETRY_BASE_DELAY: float = os.getenv(
+        "UPSTREAM_RETRY_BASE_DELAY", 0.2
+    )
+    UPSTREAM_RETRY_MAX_DELAY: float = os.getenv("UPSTREAM_RETRY_MAX_DELAY", 2.0)
+    # Seconds before a slow interactive call is sent again; 0 never hedges
+    UPSTREAM_HEDGE_DELAY: float = os.getenv("UPSTREAM_HEDGE_DELAY", 0)
+    # Failures in a row that open a provider's circuit, and for how long
+    CIRCUIT_FAILURE_THRESHOLD: int = os.getenv("CIRCUIT_FAILURE_THRESHOLD", 5)
+    CIRCUIT_RESET_TIMEOUT: float = os.getenv("CIRCUIT_RESET_TIMEOUT", 30.0)
+    # Provider adapter serving /news/live and /news/ticker
+    LIVE_NEWS_PROVIDER: str = os.getenv("LIVE_NEWS_PROVIDER", "mediastack")
+    # /news/ticker keyword fan-out
+    TICKER_MAX_CONCURRENCY: int = os.getenv("TICKER_MAX_CONCURRENCY", 8)
+    TICKER_VARIANT_TIMEOUT: float = os.getenv("TICKER_VARIANT_TIMEOUT", 8.0)
+    TICKER_DEADLINE: float = os.getenv("TICKER_DEADLINE", 12.0)
+    INGEST_BATCH_SIZE: int = os.getenv("INGEST_BATCH_SIZE", 500)
+    DEDUP_THRESHOLD: float = os.getenv("DEDUP_THRESHOLD", 0.7)
+    DEDUP_WINDOW: int = os.getenv("DEDUP_WINDOW", 500)
+    FEED_CONNECT_TIMEOUT: float = os.getenv("FEED_CONNECT_TIMEOUT", 5.0)
+    FEED_READ_TIMEOUT: float = os.getenv("FEED_READ_TIMEOUT", 20.0)
+    # Seconds for one feed fetch, retries included
+    FEED_DEADLINE: float = os.getenv("FEED_DEADLINE", 60.0)
+    # Authenticated-user cache
+    AUTH_CACHE_TTL: float = os.getenv("AUTH_CACHE_TTL", 60)
+    AUTH_CACHE_MAX_ENTRIES: int = os.getenv("AUTH_CACHE_MAX_ENTRIES", 10000)
+    # Argon2 password hashing, run in a process pool
+    ARGON2_TIME_COST: int = os.getenv("ARGON2_TIME_COST", 3)
+    ARGON2_MEMORY_COST: int = os.getenv("ARGON2_MEMORY_COST", 65536)
+    ARGON2_PARALLELISM: int = os.getenv("ARGON2_PARALLELISM", 4)
+    PASSWORD_HASH_WORKERS: int = os.getenv(
+        "PASSWORD_HASH_WORKERS", max(1, (os.cpu_count() or 2) // 2)
+    )
+    PASSWORD_HASH_MAX_PENDING: int = os.getenv("PASSWORD_HASH_MAX_PENDING", 64)
+    # In-process ingestion scheduler
+    INGEST_SCHEDULER_ENABLED: bool = (
+        os.getenv("INGEST_SCHEDULER_ENABLED", "True").lower() == "true"
+    )
+    INGEST_INTERVAL: float = os.getenv("INGEST_INTERVAL", 25 * 60)
+    INGEST_JITTER: float = os.getenv("INGEST_JITTER", 60)
+    INGEST_LEASE_TTL: float = os.getenv("INGEST_LEASE_TTL", 10 * 60)
+    # Materialized per-source timelines for /user/feed
+    FEED_MATERIALIZED: bool = (
+        os.getenv("FEED_MATERIALIZED", "True").lower() == "true"
+    )
+    FEED_TIMELINE_LENGTH: int = os.getenv("FEED_TIMELINE_LENGTH", 500)
+    # In-process full-text search over stored articles
+    SEARCH_ENABLED: bool = os.getenv("SEARCH_ENABLED", "True").lower() == "true"
+    SEARCH_REFRESH_INTERVAL: float = os.getenv("SEARCH_REFRESH_INTERVAL", 60)
+    # Live article push over WebSocket/SSE
+    LIVE_POLL_INTERVAL: float = os.getenv("LIVE_POLL_INTERVAL", 2.0)
+    LIVE_QUEUE_SIZE: int = os.getenv("LIVE_QUEUE_SIZE", 256)
+    LIVE_MAX_SUBSCRIBERS: int = os.getenv("LIVE_MAX_SUBSCRIBERS", 10000)
+    LIVE_HEARTBEAT: float = os.getenv("LIVE_HEARTBEAT", 15.0)
+    LIVE_EVENTS_MAX_BYTES: int = os.getenv(
+        "LIVE_EVENTS_MAX_BYTES", 16 * 1024 * 1024
+    )
+    # Conditional caching and compression of listing responses
+    HTTP_CACHE_MAX_AGE: int = os.getenv("HTTP_CACHE_MAX_AGE", 30)
+    HTTP_CACHE_POLL_INTERVAL: float = os.getenv("HTTP_CACHE_POLL_INTERVAL", 2.0)
+    COMPRESSION_MIN_SIZE: int = os.getenv("COMPRESSION_MIN_SIZE", 1024)
+    COMPRESSION_GZIP_LEVEL: int = os.getenv("COMPRESSION_GZIP_LEVEL", 6)
+    COMPRESSION_BROTLI_QUALITY: int = os.getenv("COMPRESSION_BROTLI_QUALITY", 4)
+    # Opt-in sampling profiler, off unless enabled and a secret is set
+    PROFILING_ENABLED: bool = (
+        os.getenv("PROFILING_ENABLED", "False").lower() == "true"
+    )
+    PROFILING_SECRET: str = os.getenv("PROFILING_SECRET", "")
+    PROFILING_INTERVAL: float = os.getenv("PROFILING_INTERVAL", 0.005)
+    PROFILING_DIR: str = os.getenv("PROFILING_DIR", "/tmp/aggregator-profiles")
+    PROFILING_MAX_FILES: int = os.getenv("PROFILING_MAX_FILES", 50)
+    PROFILE_STARTUP: bool = (
+        os.getenv("PROFILE_STARTUP", "False").lower() == "true"
+    )
+    # Mongo connection pools; the sync and async clients each get one
+    MONGO_MAX_POOL_SIZE: int = os.getenv("MONGO_MAX_POOL_SIZE", 100)
+    MONGO_MIN_POOL_SIZE: int = os.getenv("MONGO_MIN_POOL_SIZE", 0)
+    MONGO_MAX_IDLE_TIME_MS: int = os.getenv("MONGO_MAX_IDLE_TIME_MS", 300000)
+    MONGO_SERVER_SELECTION_TIMEOUT_MS: int = os.getenv(
+        "MONGO_SERVER_SELECTION_TIMEOUT_MS", 5000
+    )
+    MONGO_CONNECT_TIMEOUT_MS: int = os.getenv("MONGO_CONNECT_TIMEOUT_MS", 5000)
+    # 0 waits indefinitely, as the timeline backfill may need to
+    MONGO_SOCKET_TIMEOUT_MS: int = os.getenv("MONGO_SOCKET_TIMEOUT_MS", 0)
+    MONGO_WAIT_QUEUE_TIMEOUT_MS: int = os.getenv(
+        "MONGO_WAIT_QUEUE_TIMEOUT_MS", 5000
+    )
+    # Retention of stored articles, off by default: 0 days keeps them all.
+    # Set e.g. RETENTION_DAYS=30 to retire articles published more than 30
+    # days ago at every ingest run; the first run after enabling it retires
+    # the whole backlog. "archive" moves expired articles to
+    # articles_archive, kept ARCHIVE_DAYS (0: forever), "delete" removes
+    # them with their content
+    RETENTION_DAYS: float = os.getenv("RETENTION_DAYS", 0)
+    RETENTION_MODE: str = os.getenv("RETENTION_MODE", "archive")
+    RETENTION_BATCH_SIZE: int = os.getenv("RETENTION_BATCH_SIZE", 1000)
+    ARCHIVE_DAYS: float = os.getenv("ARCHIVE_DAYS", 365)
+    # Article bodies in the article_content collection
+    CONTENT_COMPRESSION_LEVEL: int = os.getenv("CONTENT_COMPRESSION_LEVEL", 6)
+    CONTENT_SNIPPET_LENGTH: int = os.getenv("CONTENT_SNIPPET_LENGTH", 200)
+    # Upstream API budgets. *_API_KEYS is a comma separated list of keys to
+    # rotate, NEWS_API_KEY/MEDIASTACK_API_KEY when empty; quotas are per key
+    # and 0 is unlimited. Daily counts are shared by every worker, minute
+    # buckets are per worker
+    NEWS_API_KEYS: str = os.getenv("NEWS_API_KEYS", "")
+    NEWS_API_DAILY_QUOTA: int = os.getenv("NEWS_API_DAILY_QUOTA", 100)
+    NEWS_API_MINUTE_QUOTA: int = os.getenv("NEWS_API_MINUTE_QUOTA", 30)
+    MEDIASTACK_API_KEYS: str = os.getenv("MEDIASTACK_API_KEYS", "")
+    MEDIASTACK_DAILY_QUOTA: int = os.getenv("MEDIASTACK_DAILY_QUOTA", 300)
+    MEDIASTACK_MINUTE_QUOTA: int = os.getenv("MEDIASTACK_MINUTE_QUOTA", 60)
+    # Share of each budget that ticker fan-outs and background cache
+    # refreshes leave to interactive requests
+    QUOTA_BULK_RESERVE: float = os.getenv("QUOTA_BULK_RESERVE", 0.2)
+    QUOTA_BACKGROUND_RESERVE: float = os.getenv("QUOTA_BACKGROUND_RESERVE", 0.5)
+    # Seconds the shared usage count may take before a call goes out
+    # counted by this worker only, so a slow Mongo does not hold it up
+    QUOTA_COUNT_TIMEOUT: float = os.getenv("QUOTA_COUNT_TIMEOUT", 0.5)
+    # Seconds a key answered with 429 is skipped, unless it sent Retry-After
+    QUOTA_EXHAUSTED_BACKOFF: float = os.getenv("QUOTA_EXHAUSTED_BACKOFF", 3600)
+    # Serve matching stored articles instead of an error once a budget is
+    # spent or a provider's circuit is open
+    QUOTA_FALLBACK_TO_STORED: bool = (
+        os.getenv("QUOTA_FALLBACK_TO_STORED", "True").lower() == "true"
+    )
+    # Upstream response cache for /news/news-api and /news/live
+    UPSTREAM_CACHE_ENABLED: bool = (
+        os.getenv("UPSTREAM_CACHE_ENABLED", "True").lower() == "true"
+    )
+    UPSTREAM_CACHE_TTL: float = os.getenv("UPSTREAM_CACHE_TTL", 300)
+    UPSTREAM_CACHE_STALE_TTL: float = os.getenv("UPSTREAM_CACHE_STALE_TTL", 900)
+    UPSTREAM_CACHE_MAX_BYTES: int = os.getenv(
+        "UPSTREAM_CACHE_MAX_BYTES", 64 * 1024 * 1024
+    )
 
 
 class LocalConfig(Config):
@@ -22,3 +22,12 @@ NSE_COMPANIES_CSV = "./static/nse.csv"
 
 NEWS_API_URL = "https://newsapi.org/v2/"
 MEDIASTACK_URL = "http://api.mediastack.com/v1"
+
+NEWS_CATEGORIES = [
+    "general",
+    "politics",
+    "business",
+    "scienceandtechnology",
+    "sports",
+    "entertainment",
+]
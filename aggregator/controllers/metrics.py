@@ -0,0 +1,15 @@
+from fastapi import APIRouter
+from fastapi.responses import Response
+
+from aggregator.core.metrics import CONTENT_TYPE, metrics_registry
+
+router = APIRouter(tags=["metrics"])
+
+
+@router.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    """Prometheus text exposition of the request, upstream and DB metrics.
+
+    Served on the event loop, where the threadpool gauges are readable.
+    """
+    return Response(metrics_registry.render(), media_type=CONTENT_TYPE)
@@ -2,64 +2,276 @@
 1. Code duplication in news endpoints
 """
 
-from datetime import datetime, timedelta
-from typing import Any
+import asyncio
+from dataclasses import replace
+from datetime import datetime, time, timedelta
+from typing import Any, Literal, Optional
 
 import dotenv
-import requests
-from fastapi import APIRouter
+import pytz
+from bson import ObjectId
+from bson.errors import InvalidId
+from fastapi import APIRouter, Query, Request, WebSocket, WebSocketDisconnect
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 
 from aggregator.config import config
-from aggregator.constants import LIVE_LANGUAGES, MEDIASTACK_URL, NEWS_API_URL
-from aggregator.core import NotFoundException, logger
-from aggregator.core.db import db_conn
-from aggregator.models.news import Article, NSECompany, Source
-from aggregator.paginate import Paginate
+from aggregator.constants import LIVE_LANGUAGES
+from aggregator.core import (
+    BadRequestException,
+    CustomException,
+    NotFoundException,
+    ServiceUnavailableException,
+    logger,
+)
+from aggregator.core.broadcast import live_broadcaster
+from aggregator.core.cache import upstream_cache_stats
+from aggregator.core.conditional import (
+    ingest_generation,
+    is_not_modified,
+    not_modified_response,
+)
+from aggregator.core.db import async_db_conn
+from aggregator.core.quota import (
+    Priority,
+    QuotaExceeded,
+    mediastack_budget,
+    newsapi_budget,
+)
+from aggregator.core.resilience import CircuitOpen, deadline, resilient_upstream
+from aggregator.core.upstream import fetch_articles, upstream_get
+from aggregator.models.news import Article, ArticleDetail, NSECompany, Source
+from aggregator.paginate import (
+    MAX_PER_PAGE,
+    MAX_STREAMED_PER_PAGE,
+    Paginate,
+    clamp_per_page,
+    keyset_filter,
+    ndjson_response,
+    parse_categories,
+    parse_fields,
+    select_fields,
+    trusted_page,
+    validated_page,
+    wants_ndjson,
+)
+from aggregator.providers import ArticleQuery, Provider, get_provider, providers
+from aggregator.utils.content import read_content
 from aggregator.utils.helper import (
+    fix_feed_article,
     fix_feed_articles,
-    fix_live_response,
-    fix_response,
     get_acronym,
     get_nse_companies,
     get_nse_ticker,
+    listing_response,
     remove_duplicates,
     remove_limited_from_name,
 )
+from aggregator.utils.nse import nse_index
+from aggregator.utils.search import search_index
 
 dotenv.load_dotenv()
 
 router = APIRouter(prefix="/news", tags=["news"])
 
+# Upstream is out of budget or failing fast; stored articles may stand in
+UPSTREAM_UNAVAILABLE = (QuotaExceeded, CircuitOpen)
+
+
+async def _fetch_keyword_news(
+    provider: Provider,
+    endpoint: str,
+    query: ArticleQuery,
+    keyword: str,
+    semaphore: asyncio.Semaphore,
+) -> list:
+    async with semaphore:
+        try:
+            with deadline(config.TICKER_VARIANT_TIMEOUT):
+                result = await fetch_articles(
+                    provider,
+                    endpoint,
+                    replace(query, keywords=[keyword]),
+                    level=Priority.BULK,
+                    cached=False,
+                )
+        except UPSTREAM_UNAVAILABLE:
+            raise
+        except CustomException as e:
+            logger.info(f"Error fetching news for {keyword}: {e!r}")
+            return []
+
+    if result.status_code != 200:
+        logger.info(
+            f"Error fetching news for {keyword}: HTTP {result.status_code}"
+        )
+        return []
+    if result.total == 0:
+        logger.info(f"No news found for {keyword}")
+        return []
+    return result.records
+
+
+async def _fan_out_keywords(
+    provider: Provider, endpoint: str, query: ArticleQuery, keywords: list[str]
+) -> list:
+    """Query every keyword concurrently and merge the results in keyword order.
+
+    At most ``TICKER_MAX_CONCURRENCY`` upstream calls are in flight. Variants
+    still running when ``TICKER_DEADLINE`` expires are cancelled and the
+    results gathered so far are returned. ``QuotaExceeded`` or
+    ``CircuitOpen`` is raised only when no variant got results.
+    """
+    semaphore = asyncio.Semaphore(config.TICKER_MAX_CONCURRENCY)
+    tasks = [
+        asyncio.create_task(
+            _fetch_keyword_news(provider, endpoint, query, keyword, semaphore)
+        )
+        for keyword in keywords
+    ]
+    if not tasks:
+        return []
+
+    done, pending = await asyncio.wait(tasks, timeout=config.TICKER_DEADLINE)
+    for task in pending:
+        task.cancel()
+    if pending:
+        logger.info(
+            f"Ticker deadline reached, returning {len(done)}/{len(tasks)} "
+            "keyword results"
+        )
+
+    accumulated_data, unavailable = [], None
+    for task in tasks:
+        if task in done:
+            if task.exception() is not None:
+                unavailable = task.exception()
+                continue
+            accumulated_data += task.result()
+    if unavailable is not None and not accumulated_data:
+        raise unavailable
+    return accumulated_data
+
+
+async def _search_stored(
+    q: str,
+    categories: Optional[list[str]] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    page: int = 1,
+    perPage: int = 10,
+    fields: Optional[tuple] = None,
+) -> tuple[list, int]:
+    """A page of stored articles matching ``q``, best match first, and the
+    number of matches."""
+    # Scoring is CPU-bound; keep it off the event loop
+    matches, total = await run_in_threadpool(
+        search_index.search,
+        q,
+        categories=categories,
+        start=start,
+        end=end,
+        limit=page * perPage,
+    )
+    ids = [_id for _id, _ in matches[(page - 1) * perPage :]]
+    documents = {
+        document["_id"]: document
+        for document in await async_db_conn.get_articles_by_ids(ids, fields)
+    }
+    missing = [_id for _id in ids if _id not in documents]
+    if missing:
+        # Retired or deleted since they were indexed
+        search_index.discard(missing)
+        total = max(total - len(missing), 0)
+    return [documents[_id] for _id in ids if _id in documents], total
+
+
+async def _stored_fallback(
+    error: CustomException,
+    keywords: Optional[list[str]],
+    page: int,
+    perPage: int,
+):
+    """Stored articles matching ``keywords``, the latest ones without, in
+    place of an upstream call there is no budget for or whose provider is
+    down."""
+    if not config.QUOTA_FALLBACK_TO_STORED:
+        raise error
+    logger.info(f"{error.message}; serving stored articles")
+    perPage = clamp_per_page(perPage)
+    page = max(page, 1)
+    if keywords:
+        data, total = await _search_stored(
+            " ".join(keywords), page=page, perPage=perPage
+        )
+    else:
+        data = (await async_db_conn.get_news(limit=page * perPage))[
+            (page - 1) * perPage :
+        ]
+        total = len(data)
+    response = trusted_page(
+        results=fix_feed_articles(data),
+        total=total,
+        page=page,
+        perPage=perPage,
+    )
+    if isinstance(error, QuotaExceeded):
+        response.headers["X-Upstream-Budget"] = "exhausted"
+    else:
+        response.headers["X-Upstream-Circuit"] = "open"
+    response.headers.update(error.headers)
+    return response
+
+
+def _query_dates(
+    startDate: Optional[datetime], endDate: Optional[datetime], days: int
+) -> tuple:
+    """Day bounds of a search, the last ``days`` days when not given."""
+    start = (startDate or datetime.now() - timedelta(days=days)).date()
+    end = (endDate or datetime.now()).date()
+    return start, end
+
+
+def _inclusive_end(endDate: Optional[datetime]) -> Optional[datetime]:
+    """Last moment of a search's ``endDate``. A bare date parses to its
+    midnight and, as in ``_query_dates``, stands for the whole day."""
+    if endDate is None or endDate.time() != time.min:
+        return endDate
+    return datetime.combine(endDate.date(), time.max, endDate.tzinfo)
+
 
 @router.get("/sources/", response_model=Paginate[Source])
-def get_news_sources(
+async def get_news_sources(
     country: str = None,
     page: int = 1,
     perPage: int = 10,
 ):
-    url = f"{NEWS_API_URL}/top-headlines/sources"
+    provider = get_provider("newsapi")
     params = {
-        "apiKey": config.NEWS_API_KEY,
         "language": "en",
     }
     if country:
         params["country"] = country
 
-    response = requests.get(url, params=params)
+    response = await upstream_get(
+        provider, provider.url("top-headlines/sources"), params
+    )
+    payload = provider.decode(response.content)
 
     if response.status_code != 200:
-        raise NotFoundException(f"Error fetching news: {response.json()}")
+        raise NotFoundException(f"Error fetching news: {payload}")
 
-    return Paginate[Source](
-        results=response.json()["sources"],
-        total=len(response.json()["sources"]),
+    return validated_page(
+        Source,
+        results=payload["sources"],
+        total=len(payload["sources"]),
         page=page,
         perPage=perPage,
     )
 
 
 @router.post("/news-api", response_model=Paginate[Article])
-def get_news(
+async def get_news(
     startDate: datetime = None,
     endDate: datetime = None,
     keyWords: list[str] = None,
@@ -90,61 +302,35 @@ def get_news(
     Returns:
         Paginate[NoaaV1]: Returns list of paginated hailstorm details for given location and time frame
     """
-    params = {
-        "apiKey": config.NEWS_API_KEY,
-        "language": language,
-        "sortBy": "relevancy",
-        "searcgIn": "title",
-        "pageSize": 10,
-        "page": 1,
-    }
-
-    if not startDate:
-        params["sortBy"] = "publishedAt"
-
-    if startDate:
-        start_date = startDate.strftime("%Y-%m-%d")
-        params["from"] = start_date
-    if endDate:
-        end_date = endDate.strftime("%Y-%m-%d")
-        params["to"] = end_date
-
-    if keyWords:
-        query = " OR ".join(keyWords)
-        params["q"] = query
-
-    if sources:
-        params["sources"] = ",".join(sources)
-
-    url = f"{NEWS_API_URL}/{endPoint}"
+    query = ArticleQuery(
+        keywords=keyWords,
+        start=startDate.date() if startDate else None,
+        end=endDate.date() if endDate else None,
+        language=language,
+        sources=sources,
+    )
+    try:
+        result = await fetch_articles(get_provider("newsapi"), endPoint, query)
+    except UPSTREAM_UNAVAILABLE as e:
+        return await _stored_fallback(e, keyWords, page, perPage)
 
-    response = requests.get(url, params=params)
+    if result.status_code != 200:
+        raise NotFoundException(f"Error fetching news: {result.error}")
 
-    if response.status_code != 200:
-        raise NotFoundException(f"Error fetching news: {response.json()}")
-
-    if response.json()["totalResults"] == 0:
+    if result.total == 0:
         raise NotFoundException("No news found")
-    elif response.json()["totalResults"] < threshold:
-        data = fix_response(response.json()["articles"])
-        return Paginate[Article](
-            results=data,
-            total=len(data),
-            page=page,
-            perPage=perPage,
-        )
-    else:
-        data = fix_response(response.json()["articles"])
-        return Paginate[Article](
-            results=data[:threshold],
-            total=len(data[:threshold]),
-            page=page,
-            perPage=perPage,
-        )
+    data = result.listings(threshold)
+    return validated_page(
+        Article,
+        results=data,
+        total=len(data),
+        page=page,
+        perPage=perPage,
+    )
 
 
 @router.post("/live", response_model=Paginate[Article])
-def get_live_news(
+async def get_live_news(
     startDate: datetime = None,
     endDate: datetime = None,
     keyWords: list[str] = None,
@@ -156,58 +342,47 @@ def get_live_news(
     page: int = 1,
     perPage: int = 10,
 ) -> Any:
+    """Live articles from the ``LIVE_NEWS_PROVIDER``.
+
+    Params:
+        retries (int): attempts at most when the provider fails; they are
+            spaced out and stop at the request's upstream deadline
+    """
     if language not in LIVE_LANGUAGES.keys():
         raise NotFoundException(f"Language {language} not supported")
 
-    params = {
-        "access_key": config.MEDIASTACK_API_KEY,
-        "languages": language,
-        "limit": 100,
-    }
-
-    if startDate:
-        start_date = startDate.strftime("%Y-%m-%d")
-    else:
-        start_date = (datetime.now() - timedelta(days=1)).strftime("%Y-%m-%d")
-
-    if endDate:
-        end_date = endDate.strftime("%Y-%m-%d")
-    else:
-        end_date = datetime.now().strftime("%Y-%m-%d")
-
-    params["date"] = f"{start_date},{end_date}"
-
-    if keyWords:
-        query = " +".join(keyWords)
-        params["keywords"] = query
-
-    if categories:
-        params["categories"] = ",".join(categories)
-
-    if sources:
-        params["sources"] = ",".join(sources)
-
-    url = f"{MEDIASTACK_URL}/{endPoint}"
-
-    attempts = 0
-    while attempts < retries:
-        response = requests.get(url, params=params)
-        if response.status_code == 200:
-            break
-        attempts += 1
+    start, end = _query_dates(startDate, endDate, days=1)
+    query = ArticleQuery(
+        keywords=keyWords,
+        start=start,
+        end=end,
+        language=language,
+        sources=sources,
+        categories=categories,
+    )
+    try:
+        result = await fetch_articles(
+            get_provider(config.LIVE_NEWS_PROVIDER),
+            endPoint,
+            query,
+            attempts=retries,
+        )
+    except UPSTREAM_UNAVAILABLE as e:
+        return await _stored_fallback(e, keyWords, page, perPage)
 
-    if response.status_code == 404:
+    if result.status_code == 404:
         logger.info(f"No news found for {keyWords}")
-        raise NotFoundException(f"Error fetching news: {response.json()}")
-    elif response.status_code != 200:
-        logger.info(f"Error fetching news: {response.json()}")
-        raise NotFoundException(f"Error fetching news: {response.json()}")
+        raise NotFoundException(f"Error fetching news: {result.error}")
+    elif result.status_code != 200:
+        logger.info(f"Error fetching news: {result.error}")
+        raise NotFoundException(f"Error fetching news: {result.error}")
 
-    if response.json()["pagination"]["total"] == 0:
+    if result.total == 0:
         raise NotFoundException("No news found")
     else:
-        data = fix_live_response(response.json()["data"])
-        return Paginate[Article](
+        data = result.listings()
+        return validated_page(
+            Article,
             results=data,
             total=len(data),
             page=page,
@@ -216,7 +391,7 @@ def get_live_news(
 
 
 @router.post("/ticker", response_model=Paginate[Article])
-def get_ticker_news(
+async def get_ticker_news(
     startDate: datetime = None,
     endDate: datetime = None,
     keyWords: list[str] = None,
@@ -231,23 +406,15 @@ def get_ticker_news(
     if language not in LIVE_LANGUAGES.keys():
         raise NotFoundException(f"Language {language} not supported")
 
-    params = {
-        "access_key": config.MEDIASTACK_API_KEY,
-        "languages": language,
-        "limit": 100,
-    }
-
-    if startDate:
-        start_date = startDate.strftime("%Y-%m-%d")
-    else:
-        start_date = (datetime.now() - timedelta(days=30)).strftime("%Y-%m-%d")
-
-    if endDate:
-        end_date = endDate.strftime("%Y-%m-%d")
-    else:
-        end_date = datetime.now().strftime("%Y-%m-%d")
-
-    params["date"] = f"{start_date},{end_date}"
+    start, end = _query_dates(startDate, endDate, days=30)
+    query = ArticleQuery(
+        start=start,
+        end=end,
+        language=language,
+        sources=sources,
+        categories=categories,
+    )
+    provider = get_provider(config.LIVE_NEWS_PROVIDER)
 
     # Get other company acronyms
     if keyWords:
@@ -256,38 +423,26 @@ def get_ticker_news(
             acronym = get_acronym(keyword)
             company_name = remove_limited_from_name(keyword)
             ticker = get_nse_ticker(keyword)
-            modified_keywords.append(acronym)
-            modified_keywords.append(company_name)
-            modified_keywords.append(ticker)
-
-    if sources:
-        params["sources"] = ",".join(sources)
-
-    if categories:
-        params["categories"] = ",".join(categories)
-
-    url = f"{MEDIASTACK_URL}/{endPoint}"
-
-    if keyWords:
-        accumulated_data = []
-        for keyword in modified_keywords:
-            params["keywords"] = keyword
-            response = requests.get(url, params=params)
-            if response.status_code != 200:
-                print(f"Error fetching news: {response.json()} for {keyword}")
-                continue
-            if response.json()["pagination"]["total"] == 0:
-                print(f"No news found for {keyword}")
-                continue
-            accumulated_data += response.json()["data"]
+            for variant in (acronym, company_name, ticker):
+                # Unresolved variants would otherwise go upstream unfiltered
+                if variant and variant not in modified_keywords:
+                    modified_keywords.append(variant)
+
+        try:
+            records = await _fan_out_keywords(
+                provider, endPoint, query, modified_keywords
+            )
+        except UPSTREAM_UNAVAILABLE as e:
+            return await _stored_fallback(e, keyWords, page, perPage)
 
-        if len(accumulated_data) == 0:
+        if len(records) == 0:
             raise NotFoundException("No news found")
 
-        unique_data = remove_duplicates(accumulated_data)
-        data = fix_live_response(unique_data)
+        now = datetime.now(tz=pytz.UTC)
+        data = [record.listing(now) for record in remove_duplicates(records)]
 
-        return Paginate[Article](
+        return validated_page(
+            Article,
             results=data,
             total=len(data),
             page=page,
@@ -295,14 +450,20 @@ def get_ticker_news(
         )
 
     else:
-        response = requests.get(url, params=params)
-        if response.status_code != 200:
-            raise NotFoundException(f"Error fetching news: {response.json()}")
-        if response.json()["pagination"]["total"] == 0:
+        try:
+            result = await fetch_articles(
+                provider, endPoint, query, cached=False
+            )
+        except UPSTREAM_UNAVAILABLE as e:
+            return await _stored_fallback(e, keyWords, page, perPage)
+        if result.status_code != 200:
+            raise NotFoundException(f"Error fetching news: {result.error}")
+        if result.total == 0:
             raise NotFoundException("No news found")
         else:
-            data = fix_live_response(response.json()["data"])
-            return Paginate[Article](
+            data = result.listings()
+            return validated_page(
+                Article,
                 results=data,
                 total=len(data),
                 page=page,
@@ -310,40 +471,282 @@ def get_ticker_news(
             )
 
 
+@router.get("/cache-stats")
+async def get_upstream_cache_stats():
+    return {"caches": upstream_cache_stats()}
+
+
+@router.get("/quota")
+async def get_upstream_quota():
+    """Remaining upstream API budget per provider and key, as spent by every
+    worker. Keys are reported by a hash, never in full."""
+    return {
+        "providers": await asyncio.gather(
+            newsapi_budget.status(), mediastack_budget.status()
+        )
+    }
+
+
+@router.get("/providers")
+async def get_upstream_providers():
+    """Circuit state, retries and hedges of every upstream provider, as
+    seen by this worker."""
+    return {
+        "providers": [resilient_upstream(name).stats() for name in providers]
+    }
+
+
+@router.get("/stream")
+async def stream_news(
+    category: Optional[list[str]] = Query(None),
+    source: Optional[list[str]] = Query(None),
+):
+    """Server-sent events for newly ingested articles.
+
+    Params:
+        category (list[str]): categories to receive, all when omitted
+        source (list[str]): source names to receive, all when omitted
+    """
+    if len(live_broadcaster) >= live_broadcaster.max_subscribers:
+        raise ServiceUnavailableException(message="Too many live subscribers")
+    subscriber = live_broadcaster.subscribe(category or [], source or [])
+
+    async def events():
+        try:
+            yield b"retry: 5000\n\n"
+            while True:
+                event = await subscriber.next_event(config.LIVE_HEARTBEAT)
+                if subscriber.evicted:
+                    # Too slow; the client reconnects and re-polls /news/
+                    yield b"event: evicted\ndata: {}\n\n"
+                    return
+                yield event.sse if event else b": keepalive\n\n"
+        finally:
+            live_broadcaster.unsubscribe(subscriber)
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
+@router.websocket("/stream/ws")
+async def stream_news_ws(
+    websocket: WebSocket,
+    category: Optional[list[str]] = Query(None),
+    source: Optional[list[str]] = Query(None),
+):
+    """WebSocket variant of ``/news/stream``; one JSON message per article."""
+    if len(live_broadcaster) >= live_broadcaster.max_subscribers:
+        await websocket.close(code=1013)
+        return
+    await websocket.accept()
+    subscriber = live_broadcaster.subscribe(category or [], source or [])
+    try:
+        while True:
+            event = await subscriber.next_event(config.LIVE_HEARTBEAT)
+            if subscriber.evicted:
+                await websocket.close(code=1013, reason="Too slow")
+                return
+            if event:
+                await websocket.send_text(event.text)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        live_broadcaster.unsubscribe(subscriber)
+
+
+@router.get("/stream/stats")
+async def get_stream_stats():
+    return live_broadcaster.stats()
+
+
 @router.get("/nse-companies", response_model=Paginate[NSECompany])
 def get_nse_news(
+    request: Request,
     page: int = 1,
     perPage: int = 10,
+    fields: str = None,
 ):
-    ## IMPLEMENT WEB SOCKETS FOR CONTINUOUS UPDATES
+    """Listed NSE companies, one page at a time.
+
+    Params:
+        fields (str): comma separated company fields, all when omitted
+
+    With ``Accept: application/x-ndjson`` the page is streamed one company
+    per line and may hold up to ``MAX_STREAMED_PER_PAGE`` companies.
+    """
+    ndjson = wants_ndjson(request)
+    fields = parse_fields(fields, NSECompany)
+    perPage = clamp_per_page(
+        perPage, MAX_STREAMED_PER_PAGE if ndjson else MAX_PER_PAGE
+    )
+    page = max(page, 1)
     try:
         data = get_nse_companies()
     except Exception as e:
         raise NotFoundException(f"Error fetching NSE companies: {e}")
-    return Paginate[NSECompany](
+
+    companies = data[(page - 1) * perPage : page * perPage]
+    if ndjson:
+        return ndjson_response(select_fields(companies, fields))
+    return trusted_page(
+        results=list(select_fields(companies, fields)),
+        total=len(data),
+        page=page,
+        perPage=perPage,
+    )
+
+
+@router.get("/nse-companies/search", response_model=Paginate[NSECompany])
+async def search_nse_companies(
+    q: str,
+    limit: int = 10,
+):
+    data = nse_index.search(q, limit=limit)
+    return trusted_page(
         results=data,
         total=len(data),
+        page=1,
+        perPage=limit,
+    )
+
+
+@router.get("/search", response_model=Paginate[Article])
+async def search_stored_news(
+    q: str,
+    category: str = None,
+    startDate: datetime = None,
+    endDate: datetime = None,
+    page: int = 1,
+    perPage: int = 10,
+    fields: str = None,
+) -> Any:
+    """Full-text search over stored articles, best match first.
+
+    Params:
+        q (str): search terms, matched against title and description
+        category (str): comma separated categories to search, e.g.
+            ``business,sports``; all when omitted
+        startDate (datetime): earliest publish date
+        endDate (datetime): latest publish date; a date without a time
+            includes that whole day
+        fields (str): comma separated article fields, all when omitted
+    """
+    categories = parse_categories(category) if category else None
+    fields = parse_fields(fields, Article)
+    perPage = clamp_per_page(perPage)
+    page = max(page, 1)
+    data, total = await _search_stored(
+        q,
+        categories,
+        startDate,
+        _inclusive_end(endDate),
+        page,
+        perPage,
+        fields,
+    )
+    return trusted_page(
+        results=fix_feed_articles(data, fields, categories=categories),
+        total=total,
         page=page,
         perPage=perPage,
     )
 
 
-@router.post("/", response_model=Paginate[Article])
-def get_live_news(
+@router.api_route(
+    "/", methods=["GET", "POST"], response_model=Paginate[Article]
+)
+async def get_live_news(
+    request: Request,
     category: str = "general",
     page: int = 1,
     perPage: int = 10,
+    cursor: str = None,
+    fields: str = None,
+    timeFormat: Literal["relative", "absolute"] = "relative",
 ) -> Any:
+    """Latest stored articles for one or more categories, newest first.
+
+    Pass the ``nextCursor`` of a response as ``cursor`` to get the next page.
+
+    Params:
+        category (str): comma separated categories, e.g. ``business,sports``
+            for one page merged from both
+        fields (str): comma separated article fields, all when omitted
+        timeFormat (str): ``absolute`` sends `publishedAt` as an ISO
+            timestamp. Those bodies only change when articles are ingested,
+            so GET responses carry ETag/Last-Modified and are revalidated
+            with a 304.
+
+    With ``Accept: application/x-ndjson`` articles are streamed one per line
+    as they are read, followed by a ``{"nextCursor": ...}`` line when there
+    is another page.
+    """
+    ndjson = wants_ndjson(request)
+    categories = parse_categories(category)
+    fields = parse_fields(fields, Article)
+    headers = ingest_generation.headers(
+        request, ndjson, stable=timeFormat == "absolute"
+    )
+    if is_not_modified(request, headers):
+        return not_modified_response(request, headers)
+
+    perPage = clamp_per_page(
+        perPage, MAX_STREAMED_PER_PAGE if ndjson else MAX_PER_PAGE
+    )
+    keyset_filter(cursor)  # Reject malformed cursors with a 400
 
     try:
         logger.info(f"Fetching {category} news")
-        data = db_conn.get_news(category=category)
-        data = fix_feed_articles(data)
-        return Paginate[Article](
-            results=data,
-            total=len(data),
-            page=page,
-            perPage=perPage,
+        documents = async_db_conn.find_news(
+            categories=categories,
+            limit=perPage + 1,
+            cursor=cursor,
+            fields=fields,
+        )
+        if not ndjson:
+            documents = await documents.to_list(perPage + 1)
+        response = listing_response(
+            documents,
+            page,
+            perPage,
+            fields=fields,
+            absolute=timeFormat == "absolute",
+            ndjson=ndjson,
+            categories=categories,
         )
     except Exception as e:
         raise NotFoundException(f"Error fetching {category} news: {e}")
+    response.headers.update(headers)
+    return response
+
+
+@router.get("/articles/{article_id}", response_model=ArticleDetail)
+async def get_article(
+    article_id: str,
+    timeFormat: Literal["relative", "absolute"] = "relative",
+) -> Any:
+    """One stored article with its full HTML body and attachments.
+
+    Listings only carry a text snippet as ``content``; use the ``id`` of a
+    listed article here. Archived articles are still served.
+    """
+    try:
+        _id = ObjectId(article_id)
+    except InvalidId:
+        raise BadRequestException(f"Invalid article id {article_id}")
+
+    found = await async_db_conn.get_article(_id)
+    if found is None:
+        raise NotFoundException(f"Article {article_id} not found")
+    document, content = found
+    if content is None:
+        # Body not moved out of the article yet
+        content = {
+            "contentHtml": document.get("contentHtml"),
+            "attachments": document.get("attachments") or [],
+        }
+    else:
+        content = read_content(content)
+    return {
+        **fix_feed_article(document, absolute=timeFormat == "absolute"),
+        **content,
+    }
@@ -1,8 +1,9 @@
 from fastapi import APIRouter
 
-from . import news, user
+from . import metrics, news, user
 
 v1_router = APIRouter()
 
 v1_router.include_router(news.router)
 v1_router.include_router(user.router)
+v1_router.include_router(metrics.router)
@@ -1,7 +1,7 @@
 from datetime import timedelta
-from typing import Any
+from typing import Any, Literal
 
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, Request, status
 from fastapi.security import OAuth2PasswordRequestForm
 
 from aggregator.config import config
@@ -14,17 +14,32 @@ from aggregator.core import (
     UnauthorizedException,
     logger,
 )
-from aggregator.core.db import db_conn
+from aggregator.core.conditional import (
+    ingest_generation,
+    is_not_modified,
+    not_modified_response,
+)
+from aggregator.core.db import async_db_conn
 from aggregator.crud import user_crud
 from aggregator.models.news import Article
-from aggregator.paginate import Paginate
+from aggregator.paginate import (
+    MAX_PER_PAGE,
+    MAX_STREAMED_PER_PAGE,
+    Paginate,
+    clamp_per_page,
+    keyset_filter,
+    parse_categories,
+    parse_fields,
+    wants_ndjson,
+)
 from aggregator.schemas import Token, User, UserCreate
 from aggregator.utils.auth import (
     authenticate_user,
     create_access_token,
     get_current_active_user,
 )
-from aggregator.utils.helper import fix_feed_articles
+from aggregator.utils.helper import listing_response
+from aggregator.utils.passwords import password_hasher
 
 router = APIRouter(prefix="/user", tags=["user"])
 
@@ -33,7 +48,7 @@ router = APIRouter(prefix="/user", tags=["user"])
 async def login_for_access_token(
     form_data: OAuth2PasswordRequestForm = Depends(),
 ):
-    user = authenticate_user(form_data.username, form_data.password)
+    user = await authenticate_user(form_data.username, form_data.password)
     if not user:
         raise UnauthorizedException()
     access_token_expires = timedelta(minutes=config.ACCESS_TOKEN_EXPIRE_MINUTES)
@@ -47,14 +62,15 @@ async def login_for_access_token(
     "/register", response_model=User, status_code=status.HTTP_201_CREATED
 )
 async def register_user(user_data: UserCreate):
-    user = user_crud.get_by_email(user_data.email)
+    user = await user_crud.get_by_email(user_data.email)
     if user:
         logger.info(f"User with email {user.email} already exists")
         raise DuplicateValueException(
             message=f"User with email {user.email} already exists"
         )
 
-    user = user_crud.create(user_data)
+    hashed_password = await password_hasher.hash(user_data.password)
+    user = await user_crud.create(user_data, hashed_password)
 
     return user
 
@@ -65,7 +81,7 @@ async def read_user_me(user: User = Depends(get_current_active_user)):
 
 
 @router.post("/feed-sources", status_code=status.HTTP_201_CREATED)
-def add_user_feed_sources(
+async def add_user_feed_sources(
     current_user: User = Depends(get_current_active_user),
     sources: list[str] = None,  # list of code of sources
     page: int = 1,
@@ -75,26 +91,40 @@ def add_user_feed_sources(
         raise InsufficientDataException(message="Sources are required")
 
     try:
-        user_crud.add_feed_sources(current_user.email, sources)
+        await user_crud.add_feed_sources(current_user.email, sources)
         return {"message": "Feed sources added successfully"}
     except Exception as e:
         raise InternalServerException(message=str(e))
 
 
-@router.post(
-    "/feed", response_model=Paginate[Article], status_code=status.HTTP_200_OK
+@router.api_route(
+    "/feed",
+    methods=["GET", "POST"],
+    response_model=Paginate[Article],
+    status_code=status.HTTP_200_OK,
 )
-def get_user_feed_news(
+async def get_user_feed_news(
+    request: Request,
     category: str = "general",
     current_user: User = Depends(get_current_active_user),
     page: int = 1,
     perPage: int = 10,
+    cursor: str = None,
+    fields: str = None,
+    timeFormat: Literal["relative", "absolute"] = "relative",
 ) -> Any:
     """Get category based category news
 
     Params:
-        Category: str = general, politics, sports, business, health, science, technology, entertainment
+        Category: str = comma separated categories, of general, politics, business, scienceandtechnology, sports, entertainment
         Sources: list[str] = List of sources to get news from
+        Cursor: str = nextCursor of the previous page
+        Fields: str = comma separated article fields, all when omitted
+        TimeFormat: str = relative, or absolute for ISO timestamps; absolute
+            GET responses carry ETag/Last-Modified and are revalidated with 304
+
+    With ``Accept: application/x-ndjson`` the page is streamed one article
+    per line, then a ``{"nextCursor": ...}`` line when there is another page.
 
     Returns:
         Any: _description_
@@ -103,17 +133,45 @@ def get_user_feed_news(
         logger.info(f"No feed sources found for {current_user.email}")
         raise BadRequestException("No feed sources found")
 
+    ndjson = wants_ndjson(request)
+    categories = parse_categories(category)
+    fields = parse_fields(fields, Article)
+    # The feed also depends on whose sources it is built from
+    headers = ingest_generation.headers(
+        request,
+        ndjson,
+        current_user.email,
+        sorted(current_user.feedSources),
+        private=True,
+        stable=timeFormat == "absolute",
+    )
+    if is_not_modified(request, headers):
+        return not_modified_response(request, headers)
+
+    perPage = clamp_per_page(
+        perPage, MAX_STREAMED_PER_PAGE if ndjson else MAX_PER_PAGE
+    )
+    keyset_filter(cursor)  # Reject malformed cursors with a 400
+
     try:
         logger.info(f"Fetching feed news for {category}")
-        data = db_conn.get_feed_news(
-            current_user.feedSources, category=category
+        data = await async_db_conn.get_feed_news(
+            current_user.feedSources,
+            categories=categories,
+            limit=perPage + 1,
+            cursor=cursor,
+            fields=fields,
         )
-        data = fix_feed_articles(data)
-        return Paginate[Article](
-            results=data,
-            total=len(data),
-            page=page,
-            perPage=perPage,
+        response = listing_response(
+            data,
+            page,
+            perPage,
+            fields=fields,
+            absolute=timeFormat == "absolute",
+            ndjson=ndjson,
+            categories=categories,
         )
     except Exception as e:
         raise NotFoundException(message=f"Error fetching feed news: {e}")
+    response.headers.update(headers)
+    return response
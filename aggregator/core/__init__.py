@@ -9,6 +9,8 @@ from .exceptions import (
     InsufficientDataException,
     InternalServerException,
     NotFoundException,
+    ServiceUnavailableException,
+    TooManyRequestsException,
     UnauthorizedException,
     UnprocessableEntity,
 )
@@ -25,6 +27,8 @@ __all__ = [
     "UnprocessableEntity",
     "DuplicateValueException",
     "GatewayTimeout",
+    "ServiceUnavailableException",
+    "TooManyRequestsException",
     "InsufficientDataException",
     "CustomException",
 ]
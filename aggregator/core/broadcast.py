@@ -0,0 +1,197 @@
+import asyncio
+from dataclasses import dataclass
+from functools import cached_property
+from typing import Optional
+
+import orjson
+from bson import ObjectId
+from fastapi.concurrency import run_in_threadpool
+
+from aggregator.config import config
+from aggregator.core.db import db_conn
+from aggregator.core.logger import logger
+
+
+@dataclass
+class LiveEvent:
+    """One newly ingested article, serialized once for every subscriber."""
+
+    category: str
+    sources: frozenset
+    text: str
+
+    @cached_property
+    def sse(self) -> bytes:
+        return f"event: article\ndata: {self.text}\n\n".encode()
+
+
+class Subscriber:
+    """A connected client and the events queued for it.
+
+    Args:
+        categories (set): categories to receive, all when empty.
+        sources (set): source names to receive, all when empty.
+        queue_size (int): events buffered before the client is evicted.
+    """
+
+    def __init__(self, categories: set, sources: set, queue_size: int):
+        self.categories = categories
+        self.sources = sources
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.evicted = False
+
+    def wants(self, event: LiveEvent) -> bool:
+        return not self.sources or not self.sources.isdisjoint(event.sources)
+
+    async def next_event(self, timeout: float) -> Optional[LiveEvent]:
+        """Next event, or None after ``timeout`` seconds or on eviction."""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class LiveBroadcaster:
+    """Pushes newly ingested articles to subscribed clients.
+
+    Ingestion may run in any worker, so the broadcaster in each worker
+    polls the ``article_events`` collection written at ingest and fans new
+    events out to its own subscribers. Each event is serialized once, then
+    put on every matching subscriber's bounded queue without waiting. A
+    subscriber whose queue is full is too slow to keep up and is evicted
+    rather than letting it hold events in memory.
+
+    Args:
+        poll_interval (float): seconds between polls for new events.
+        queue_size (int): per-subscriber buffer.
+        max_subscribers (int): connections accepted by this worker.
+    """
+
+    def __init__(
+        self,
+        poll_interval: float = config.LIVE_POLL_INTERVAL,
+        queue_size: int = config.LIVE_QUEUE_SIZE,
+        max_subscribers: int = config.LIVE_MAX_SUBSCRIBERS,
+    ):
+        self.poll_interval = poll_interval
+        self.queue_size = queue_size
+        self.max_subscribers = max_subscribers
+        self._by_category: dict[str, set] = {}
+        self._everything: set = set()
+        self._count = 0
+        self._last_id = None
+        self._task: Optional[asyncio.Task] = None
+        self.published = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return self._count
+
+    def subscribe(
+        self, categories: list[str], sources: list[str]
+    ) -> Subscriber:
+        subscriber = Subscriber(set(categories), set(sources), self.queue_size)
+        if subscriber.categories:
+            for category in subscriber.categories:
+                self._by_category.setdefault(category, set()).add(subscriber)
+        else:
+            self._everything.add(subscriber)
+        self._count += 1
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber):
+        if subscriber in self._everything:
+            self._everything.discard(subscriber)
+        else:
+            for category in subscriber.categories:
+                self._by_category.get(category, set()).discard(subscriber)
+        self._count -= 1
+
+    def _evict(self, subscriber: Subscriber):
+        subscriber.evicted = True
+        self.evictions += 1
+        # Wake the connection so it can close
+        while not subscriber.queue.empty():
+            subscriber.queue.get_nowait()
+        subscriber.queue.put_nowait(None)
+
+    def publish(self, event: LiveEvent):
+        self.published += 1
+        for group in (
+            self._by_category.get(event.category, ()),
+            self._everything,
+        ):
+            for subscriber in group:
+                if subscriber.evicted or not subscriber.wants(event):
+                    continue
+                try:
+                    subscriber.queue.put_nowait(event)
+                except asyncio.QueueFull:
+                    self._evict(subscriber)
+
+    def _events_from(self, documents: list) -> list[LiveEvent]:
+        events = []
+        for document in documents:
+            for article in document["articles"]:
+                events.append(
+                    LiveEvent(
+                        category=document["category"],
+                        sources=frozenset(article["sources"]),
+                        text=orjson.dumps(
+                            {
+                                "category": document["category"],
+                                "article": article["listing"],
+                            }
+                        ).decode(),
+                    )
+                )
+        return events
+
+    async def poll(self):
+        if self._last_id is None:
+            # Only events ingested after startup are pushed
+            self._last_id = (
+                await run_in_threadpool(db_conn.get_last_event_id) or ObjectId()
+            )
+        documents = await run_in_threadpool(
+            db_conn.get_article_events_after, self._last_id
+        )
+        if documents:
+            self._last_id = documents[-1]["_id"]
+        for event in self._events_from(documents):
+            self.publish(event)
+            # Let connected clients drain between events so only clients
+            # that are actually stalled fill their queues
+            await asyncio.sleep(0)
+
+    async def _loop(self):
+        while True:
+            try:
+                await self.poll()
+            except Exception as e:
+                logger.error(f"Live update poll failed: {e}")
+            await asyncio.sleep(self.poll_interval)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    def stats(self) -> dict:
+        return {
+            "subscribers": self._count,
+            "published": self.published,
+            "evictions": self.evictions,
+        }
+
+
+live_broadcaster = LiveBroadcaster()
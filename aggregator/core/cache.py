@@ -0,0 +1,284 @@
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Hashable, Optional
+
+from aggregator.config import config
+from aggregator.core.logger import logger
+from aggregator.core.quota import Priority, priority
+from aggregator.core.resilience import deadline
+
+
+@dataclass
+class _Entry:
+    value: Any
+    size: int
+    fresh_until: float
+    stale_until: float
+
+
+class ResponseCache:
+    """In-process TTL cache for upstream responses.
+
+    Entries are kept in LRU order and evicted once their combined size goes
+    over ``max_bytes``. An entry is served as a plain hit for ``ttl`` seconds,
+    then for another ``stale_ttl`` seconds it is still served while a single
+    background refresh replaces it (stale-while-revalidate). Refreshes run at
+    background priority against the upstream budgets, with a deadline of
+    their own rather than what is left of the request's. Concurrent misses
+    for the same key share one upstream call.
+
+    Args:
+        name (str): label used in logs and stats.
+        ttl (float): seconds an entry is fresh.
+        stale_ttl (float): seconds an expired entry may still be served.
+        max_bytes (int): memory bound, measured with ``sizeof``.
+        sizeof (Callable): returns the size in bytes of a cached value.
+        cacheable (Callable): decides whether a fetched value is stored.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        ttl: float,
+        stale_ttl: float,
+        max_bytes: int,
+        sizeof: Callable[[Any], int] = lambda value: len(value),
+        cacheable: Callable[[Any], bool] = lambda value: True,
+    ):
+        self.name = name
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_bytes = max_bytes
+        self._sizeof = sizeof
+        self._cacheable = cacheable
+        self._entries: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+        self._inflight: dict[Hashable, asyncio.Task] = {}
+        self._bytes = 0
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    async def get_or_fetch(
+        self, key: Hashable, fetch: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        now = time.monotonic()
+        entry = self._entries.get(key)
+        if entry is not None:
+            if now < entry.fresh_until:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return entry.value
+            if now < entry.stale_until:
+                self.stale_hits += 1
+                self._entries.move_to_end(key)
+                if key not in self._inflight:
+                    with priority(Priority.BACKGROUND), deadline(
+                        config.UPSTREAM_DEADLINE, inherit=False
+                    ):
+                        self._start_fetch(key, fetch)
+                return entry.value
+            self._remove(key)
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            self.misses += 1
+            task = self._start_fetch(key, fetch)
+        # Shield so a cancelled caller does not cancel the shared fetch
+        return await asyncio.shield(task)
+
+    def _start_fetch(
+        self, key: Hashable, fetch: Callable[[], Awaitable[Any]]
+    ) -> asyncio.Task:
+        task = asyncio.ensure_future(self._fetch(key, fetch))
+        self._inflight[key] = task
+        # Background refreshes may finish with nobody awaiting them
+        task.add_done_callback(_log_failure)
+        return task
+
+    async def _fetch(
+        self, key: Hashable, fetch: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        try:
+            value = await fetch()
+            if self._cacheable(value):
+                self._store(key, value)
+            return value
+        finally:
+            self._inflight.pop(key, None)
+
+    def _store(self, key: Hashable, value: Any):
+        size = self._sizeof(value)
+        if size > self.max_bytes:
+            return
+
+        self._remove(key)
+        now = time.monotonic()
+        self._entries[key] = _Entry(
+            value=value,
+            size=size,
+            fresh_until=now + self.ttl,
+            stale_until=now + self.ttl + self.stale_ttl,
+        )
+        self._bytes += size
+        while self._bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= evicted.size
+            self.evictions += 1
+
+    def _remove(self, key: Hashable):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry.size
+
+    def clear(self):
+        self._entries.clear()
+        self._bytes = 0
+
+    def stats(self) -> dict:
+        return {
+            "name": self.name,
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "maxBytes": self.max_bytes,
+            "hits": self.hits,
+            "staleHits": self.stale_hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "evictions": self.evictions,
+            "inflight": len(self._inflight),
+        }
+
+
+class TTLCache:
+    """Bounded in-process key/value cache with per-entry expiry.
+
+    Entries are kept in LRU order; the least recently used one is dropped
+    once ``max_entries`` is reached. Lookups of expired entries are misses.
+    Safe to share between the event loop and threadpool routes.
+
+    Args:
+        ttl (float): default seconds an entry is served.
+        max_entries (int): number of entries kept.
+    """
+
+    def __init__(self, ttl: float, max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, tuple[Any, float]]" = (
+            OrderedDict()
+        )
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if time.monotonic() < expires_at:
+                    self.hits += 1
+                    self._entries.move_to_end(key)
+                    return value
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        """Store ``value``; ``ttl`` may only shorten the default expiry."""
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if ttl <= 0:
+            return
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (value, time.monotonic() + ttl)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def pop(self, key: Hashable):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+def _log_failure(task: asyncio.Task):
+    if not task.cancelled() and task.exception() is not None:
+        logger.info(f"Upstream cache fetch failed: {task.exception()!r}")
+
+
+def upstream_cache_key(
+    provider: str,
+    endpoint: str,
+    keywords: Optional[list[str]] = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    language: Optional[str] = None,
+    sources: Optional[list[str]] = None,
+    categories: Optional[list[str]] = None,
+) -> tuple:
+    """Normalize upstream query params into a cache key.
+
+    Keywords, sources and categories are order-insensitive upstream, so they
+    are lower-cased and sorted. Dates are already bucketed to the day.
+    """
+
+    def normalize(values):
+        return tuple(sorted({value.strip().lower() for value in values or []}))
+
+    return (
+        provider,
+        endpoint,
+        normalize(keywords),
+        start_date,
+        end_date,
+        language,
+        normalize(sources),
+        normalize(categories),
+    )
+
+
+def _cacheable_page(page) -> bool:
+    return config.UPSTREAM_CACHE_ENABLED and page.status_code == 200
+
+
+def _page_size(page) -> int:
+    return page.size
+
+
+_upstream_caches: dict[str, ResponseCache] = {}
+
+
+def upstream_cache(provider: str) -> ResponseCache:
+    """Cache of decoded ``ProviderPage``s of ``provider``, sized by their
+    upstream payload."""
+    cache = _upstream_caches.get(provider)
+    if cache is None:
+        cache = _upstream_caches[provider] = ResponseCache(
+            provider,
+            ttl=config.UPSTREAM_CACHE_TTL,
+            stale_ttl=config.UPSTREAM_CACHE_STALE_TTL,
+            max_bytes=config.UPSTREAM_CACHE_MAX_BYTES,
+            sizeof=_page_size,
+            cacheable=_cacheable_page,
+        )
+    return cache
+
+
+def upstream_cache_stats() -> list[dict]:
+    return [cache.stats() for cache in _upstream_caches.values()]
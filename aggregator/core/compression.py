@@ -0,0 +1,161 @@
+"""Response compression negotiated with ``Accept-Encoding``.
+
+Brotli is used when the optional ``brotli`` package is installed and the
+client accepts it, gzip otherwise. Streamed bodies such as NDJSON pages are
+compressed chunk by chunk and flushed after each chunk, so records still
+reach the client as they are written. Server-sent events and bodies under
+``COMPRESSION_MIN_SIZE`` are sent as they are.
+"""
+
+import zlib
+from typing import Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from aggregator.config import config
+
+try:
+    import brotli
+except ImportError:  # Optional, gzip only without it
+    brotli = None
+
+UNCOMPRESSED_MEDIA_TYPES = ("text/event-stream",)
+
+
+def negotiate(accept_encoding: str) -> Optional[str]:
+    """Preferred supported coding in an ``Accept-Encoding`` header."""
+    accepted = {}
+    for item in accept_encoding.split(","):
+        coding, _, params = item.partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[coding.strip().lower()] = quality
+
+    for coding in ("br", "gzip"):
+        if coding == "br" and brotli is None:
+            continue
+        if accepted.get(coding, accepted.get("*", 0.0)) > 0:
+            return coding
+    return None
+
+
+class _GzipCompressor:
+    def __init__(self, level: int):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes, finish: bool) -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush(
+            zlib.Z_FINISH if finish else zlib.Z_SYNC_FLUSH
+        )
+
+
+class _BrotliCompressor:
+    def __init__(self, quality: int):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data: bytes, finish: bool) -> bytes:
+        output = self._compressor.process(data)
+        if finish:
+            return output + self._compressor.finish()
+        return output + self._compressor.flush()
+
+
+class CompressionMiddleware:
+    """Compress response bodies with the coding the client prefers.
+
+    Args:
+        minimum_size (int): smaller complete bodies are not compressed.
+        gzip_level (int): zlib compression level.
+        brotli_quality (int): brotli quality, low values suit dynamic bodies.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = config.COMPRESSION_MIN_SIZE,
+        gzip_level: int = config.COMPRESSION_GZIP_LEVEL,
+        brotli_quality: int = config.COMPRESSION_BROTLI_QUALITY,
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or scope["method"] == "HEAD":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate(Headers(scope=scope).get("accept-encoding", ""))
+        await self.app(scope, receive, _CompressingSend(self, encoding, send))
+
+    def compressor(self, encoding: str):
+        if encoding == "br":
+            return _BrotliCompressor(self.brotli_quality)
+        return _GzipCompressor(self.gzip_level)
+
+
+class _CompressingSend:
+    """``send`` wrapper for one response; holds back the start message
+    until the first body chunk shows whether to compress."""
+
+    def __init__(
+        self,
+        middleware: CompressionMiddleware,
+        encoding: Optional[str],
+        send: Send,
+    ):
+        self.middleware = middleware
+        self.encoding = encoding
+        self.send = send
+        self.start: Optional[Message] = None
+        self.compressor = None
+
+    def _should_compress(self, headers, body: bytes, more_body: bool):
+        return (
+            self.encoding is not None
+            and self.start["status"] not in (204, 304)
+            and "content-encoding" not in headers
+            and not headers.get("content-type", "").startswith(
+                UNCOMPRESSED_MEDIA_TYPES
+            )
+            and (more_body or len(body) >= self.middleware.minimum_size)
+        )
+
+    async def __call__(self, message: Message):
+        if message["type"] == "http.response.start":
+            self.start = message
+            return
+        if message["type"] != "http.response.body":
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if self.start is not None:
+            start, headers = self.start, MutableHeaders(
+                raw=list(self.start["headers"])
+            )
+            if self._should_compress(headers, body, more_body):
+                self.compressor = self.middleware.compressor(self.encoding)
+                body = self.compressor.compress(body, finish=not more_body)
+                headers["Content-Encoding"] = self.encoding
+                if "content-length" in headers:
+                    del headers["content-length"]
+                if not more_body:
+                    headers["Content-Length"] = str(len(body))
+                # A strong ETag must differ between encodings
+                etag = headers.get("etag")
+                if etag and etag.endswith('"'):
+                    headers["ETag"] = f'{etag[:-1]}-{self.encoding}"'
+            headers.add_vary_header("Accept-Encoding")
+            self.start = None
+            await self.send({**start, "headers": headers.raw})
+        elif self.compressor is not None:
+            body = self.compressor.compress(body, finish=not more_body)
+        await self.send({**message, "body": body})
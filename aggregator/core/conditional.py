@@ -0,0 +1,164 @@
+"""HTTP conditional caching for listings of stored articles.
+
+Stored listings only change when an ingest adds articles, which bumps the
+``generation`` in the metadata collection. Each worker polls that
+generation in the background, so strong ``ETag`` and ``Last-Modified``
+validators are derived from memory and a matching ``If-None-Match`` or
+``If-Modified-Since`` is answered with a 304 before Mongo is queried. A
+worker notices a new generation within ``HTTP_CACHE_POLL_INTERVAL``
+seconds.
+
+Only the absolute-timestamp representation carries validators: relative
+publish times ("5 mins ago") change between ingests, so those bodies are
+never byte-stable.
+"""
+
+import asyncio
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Optional
+
+from fastapi import Request
+from fastapi.responses import Response
+
+from aggregator.config import config
+from aggregator.core.db import async_db_conn
+from aggregator.core.logger import logger
+
+# Appended to the ETag of compressed bodies by the compression middleware
+ENCODING_SUFFIXES = ("-gzip", "-br")
+
+
+def _strip_encoding(etag: str) -> str:
+    etag = etag.strip().removeprefix("W/")
+    for suffix in ENCODING_SUFFIXES:
+        if etag.endswith(f'{suffix}"'):
+            return etag[: -len(suffix) - 1] + '"'
+    return etag
+
+
+def matching_etag(if_none_match: str, etag: str) -> Optional[str]:
+    """Tag of ``If-None-Match`` that matches ``etag``, with the encoding
+    suffix the client got it with; weak comparison, as ``If-None-Match``
+    uses, ignoring the encoding."""
+    if if_none_match.strip() == "*":
+        return etag
+    for candidate in if_none_match.split(","):
+        if _strip_encoding(candidate) == etag:
+            return candidate.strip()
+    return None
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    return matching_etag(if_none_match, etag) is not None
+
+
+class IngestGeneration:
+    """In-memory copy of the ingestion generation.
+
+    Args:
+        poll_interval (float): seconds between reads of the metadata.
+    """
+
+    def __init__(self, poll_interval: float = config.HTTP_CACHE_POLL_INTERVAL):
+        self.poll_interval = poll_interval
+        self.generation: Optional[int] = None
+        self.changed_at: Optional[datetime] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def refresh(self):
+        generation, changed_at = await async_db_conn.get_ingest_generation()
+        if changed_at is not None and changed_at.tzinfo is None:
+            changed_at = changed_at.replace(tzinfo=timezone.utc)
+        self.generation, self.changed_at = generation, changed_at
+
+    def headers(
+        self, request: Request, *parts, private=False, stable=True
+    ) -> dict:
+        """Caching headers for a listing whose body only depends on the
+        generation, the request's path and query, and ``parts``.
+
+        Bodies that are not ``stable`` between ingests, and any body before
+        the generation has been read once, get no validators.
+        """
+        if not stable or self.generation is None:
+            return {"Cache-Control": "no-cache"}
+        key = repr(
+            (
+                self.generation,
+                request.url.path,
+                sorted(request.query_params.multi_items()),
+                parts,
+            )
+        )
+        digest = hashlib.blake2b(key.encode(), digest_size=16).hexdigest()
+        scope = "private" if private else "public"
+        headers = {
+            "ETag": f'"{digest}"',
+            "Cache-Control": f"{scope}, max-age={config.HTTP_CACHE_MAX_AGE}",
+            # JSON and NDJSON pages of the same listing differ
+            "Vary": "Accept",
+        }
+        if self.changed_at is not None:
+            headers["Last-Modified"] = format_datetime(
+                self.changed_at.astimezone(timezone.utc), usegmt=True
+            )
+        return headers
+
+    async def _loop(self):
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.error(f"Ingest generation poll failed: {e}")
+            await asyncio.sleep(self.poll_interval)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+
+def is_not_modified(request: Request, headers: dict) -> bool:
+    """Whether a GET can be answered with 304 given the listing's headers."""
+    if request.method not in ("GET", "HEAD") or "ETag" not in headers:
+        return False
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return etag_matches(if_none_match, headers["ETag"])
+
+    if_modified_since = request.headers.get("if-modified-since")
+    last_modified = headers.get("Last-Modified")
+    if if_modified_since is None or last_modified is None:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        return False
+    return parsedate_to_datetime(last_modified) <= since
+
+
+def not_modified_response(request: Request, headers: dict) -> Response:
+    """304 carrying the ETag the 200 was sent with: the tag the client
+    holds, which for a compressed body has the encoding suffix."""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        etag = matching_etag(if_none_match, headers["ETag"])
+        if etag is not None:
+            headers = {**headers, "ETag": etag}
+    return Response(status_code=304, headers=headers)
+
+
+ingest_generation = IngestGeneration()
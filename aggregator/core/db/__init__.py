@@ -1,5 +1,7 @@
+from .async_connection import async_db_conn
 from .connection import db_conn
 
 __all__ = [
+    "async_db_conn",
     "db_conn",
 ]
@@ -0,0 +1,257 @@
+"""Async data access for the request path, on motor.
+
+Routes and auth await these instead of calling ``DBConnection`` from a
+threadpool worker or, worse, straight from the event loop. Queries are the
+same ones ``DBConnection`` runs and share its helpers. Ingestion, which
+runs in the scheduler's worker thread or the cron job, stays on the sync
+client.
+"""
+
+import asyncio
+import threading
+
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ReturnDocument
+
+from aggregator.config import config
+from aggregator.core import GatewayTimeout
+from aggregator.core.logger import logger
+from aggregator.core.metrics import db_in_flight, db_latency, timed_methods
+from aggregator.paginate import cursor_position, keyset_filter
+
+from .connection import (
+    ARCHIVE_COLLECTION,
+    ARTICLES_COLLECTION,
+    LAST_UPDATED_FILTER,
+    LISTING_SORT,
+    category_filter,
+    client_options,
+    listing_projection,
+    merge_timeline_ids,
+    source_query,
+    timeline_id,
+    timeline_items,
+    timeline_keys,
+    timeline_query,
+)
+
+
+def get_async_user_db():
+    try:
+        client = AsyncIOMotorClient(config.MONGO_DB_URL, **client_options())
+        db = client.prazo
+    except Exception as e:
+        logger.info(f"Error connecting to Weather DB: {e}.")
+        db = None
+
+    return db
+
+
+@timed_methods(db_latency, db_in_flight, "async")
+class AsyncDBConnection:
+    """Motor counterpart of ``DBConnection``. The client is opened by
+    ``connect`` in the app's lifespan, or on first use."""
+
+    def __init__(self):
+        self._db = None
+        self._connect_lock = threading.Lock()
+
+    @property
+    def db(self):
+        if self._db is None:
+            self.connect()
+        return self._db
+
+    @db.setter
+    def db(self, db):
+        self._db = db
+
+    def connect(self):
+        with self._connect_lock:
+            if self._db is None:
+                db = get_async_user_db()
+                if db is None:
+                    raise GatewayTimeout(
+                        "The connection to User DB could not be established."
+                    )
+                self._db = db
+        return self._db
+
+    def close(self):
+        if self._db is not None:
+            self._db.client.close()
+            self._db = None
+
+    async def insert_user(self, user):
+        return await self.db.users.insert_one(user.dict())
+
+    async def get_user_by_email(self, email: str):
+        return await self.db.users.find_one({"email": email})
+
+    async def update_password_hash(self, email: str, hashed_password: str):
+        return await self.db.users.update_one(
+            {"email": email}, {"$set": {"hashedPassword": hashed_password}}
+        )
+
+    async def add_feed_sources(self, email: str, sources: list[str]):
+        try:
+            await self.db.users.update_one(
+                {"email": email}, {"$set": {"feedSources": list(sources)}}
+            )
+        except Exception as e:
+            logger.error(f"Error adding feed sources: {e}")
+            raise e
+
+    async def add_quota_usage(self, usage_id, amount, expires_at):
+        """Count ``amount`` calls on an API key's daily usage and return the
+        updated usage document."""
+        return await self.db.quota_usage.find_one_and_update(
+            {"_id": usage_id},
+            {
+                "$inc": {"used": amount},
+                "$setOnInsert": {"expiresAt": expires_at},
+            },
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+
+    async def mark_quota_exhausted(self, usage_id, until, expires_at):
+        await self.db.quota_usage.update_one(
+            {"_id": usage_id},
+            {
+                "$max": {"exhaustedUntil": until},
+                "$setOnInsert": {"used": 0, "expiresAt": expires_at},
+            },
+            upsert=True,
+        )
+
+    async def get_quota_usage(self, usage_ids):
+        return {
+            usage["_id"]: usage
+            async for usage in self.db.quota_usage.find(
+                {"_id": {"$in": usage_ids}}
+            )
+        }
+
+    async def get_ingest_generation(self):
+        """Number of ingests that added articles and when the last one ran."""
+        metadata = await self.db.metadata.find_one(
+            LAST_UPDATED_FILTER,
+            {"generation": 1, "changedAt": 1, "lastUpdated": 1},
+        )
+        if metadata is None:
+            return 0, None
+        return (
+            metadata.get("generation", 0),
+            metadata.get("changedAt") or metadata["lastUpdated"],
+        )
+
+    def find_news(self, categories=None, limit=75, cursor=None, fields=None):
+        """Unread motor cursor over the listing; ``get_news`` reads it all."""
+        return (
+            self.db[ARTICLES_COLLECTION]
+            .find(
+                {**category_filter(categories), **keyset_filter(cursor)},
+                listing_projection(fields),
+            )
+            .sort(LISTING_SORT)
+            .limit(limit)
+        )
+
+    async def get_news(
+        self, categories=None, limit=75, cursor=None, fields=None
+    ):
+        return await self.find_news(categories, limit, cursor, fields).to_list(
+            limit
+        )
+
+    async def get_articles_by_ids(self, ids, fields=None):
+        return (
+            await self.db[ARTICLES_COLLECTION]
+            .find({"_id": {"$in": ids}}, listing_projection(fields))
+            .to_list(None)
+        )
+
+    async def get_article(self, article_id):
+        """A stored or archived article with its body, or None."""
+        document, content = await asyncio.gather(
+            self.db[ARTICLES_COLLECTION].find_one({"_id": article_id}),
+            self.db.article_content.find_one({"_id": article_id}),
+        )
+        if document is None:
+            document = await self.db[ARCHIVE_COLLECTION].find_one(
+                {"_id": article_id}
+            )
+        if document is None:
+            return None
+        return document, content
+
+    async def _query_feed_news(
+        self, sources, categories, limit=75, cursor=None, fields=None
+    ):
+        query = {
+            **category_filter(categories),
+            "source.name": {"$in": sources},
+            **keyset_filter(cursor),
+        }
+        return (
+            await self.db[ARTICLES_COLLECTION]
+            .find(query, listing_projection(fields))
+            .sort(LISTING_SORT)
+            .limit(limit)
+            .to_list(limit)
+        )
+
+    async def _merge_timelines(self, sources, categories, limit, cursor=None):
+        """Same merge as ``DBConnection._merge_timelines``, reading the
+        timelines that are missing or too short concurrently."""
+        after = cursor_position(cursor)
+        keys = timeline_keys(sources, categories)
+        query, projection = timeline_query(keys, limit, after)
+        timelines = {
+            timeline["_id"]: timeline["items"]
+            async for timeline in self.db.timelines.find(query, projection)
+        }
+
+        streams, missing = [], []
+        for category, source in keys:
+            items = timeline_items(
+                timelines.get(timeline_id(category, source)), after, limit
+            )
+            if items is None:
+                missing.append((category, source))
+            else:
+                streams.append(items[:limit])
+        # Timelines that cannot serve the page are read concurrently
+        streams += await asyncio.gather(
+            *(
+                self.db[ARTICLES_COLLECTION]
+                .find(
+                    source_query(source, category, cursor),
+                    {"datePublished": 1},
+                )
+                .sort(LISTING_SORT)
+                .limit(limit)
+                .to_list(limit)
+                for category, source in missing
+            )
+        )
+        return merge_timeline_ids(streams, limit)
+
+    async def get_feed_news(
+        self, sources, categories, limit=75, cursor=None, fields=None
+    ):
+        if not config.FEED_MATERIALIZED:
+            return await self._query_feed_news(
+                sources, categories, limit, cursor, fields
+            )
+
+        ids = await self._merge_timelines(sources, categories, limit, cursor)
+        documents = {
+            document["_id"]: document
+            for document in await self.get_articles_by_ids(ids, fields)
+        }
+        return [documents[_id] for _id in ids if _id in documents]
+
+
+async_db_conn = AsyncDBConnection()
@@ -1,17 +1,42 @@
+import heapq
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta
 
 import pytz
-from pymongo import MongoClient
+import requests
+from pymongo import ASCENDING, DESCENDING, MongoClient, ReplaceOne, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
 
 from aggregator.config import config
+from aggregator.constants import NEWS_CATEGORIES
 from aggregator.core import GatewayTimeout
 from aggregator.core.logger import logger
-from aggregator.utils.articles import get_articles
+from aggregator.core.metrics import db_in_flight, db_latency, timed_methods
+from aggregator.paginate import cursor_position, keyset_filter, listing_position
+from aggregator.utils.articles import FeedFetch, fetch_feed
+from aggregator.utils.content import content_document, content_snippet
+from aggregator.utils.dedup import ArticleDeduplicator, dedupe_articles
+from aggregator.utils.helper import get_relative_time, listing_fields
+
+
+def client_options() -> dict:
+    """Pool and timeout settings shared by the sync and async clients."""
+    return {
+        "maxPoolSize": config.MONGO_MAX_POOL_SIZE,
+        "minPoolSize": config.MONGO_MIN_POOL_SIZE,
+        "maxIdleTimeMS": config.MONGO_MAX_IDLE_TIME_MS or None,
+        "serverSelectionTimeoutMS": config.MONGO_SERVER_SELECTION_TIMEOUT_MS,
+        "connectTimeoutMS": config.MONGO_CONNECT_TIMEOUT_MS,
+        "socketTimeoutMS": config.MONGO_SOCKET_TIMEOUT_MS or None,
+        "waitQueueTimeoutMS": config.MONGO_WAIT_QUEUE_TIMEOUT_MS or None,
+    }
 
 
 def get_user_db():
     try:
-        db_conn = MongoClient(config.MONGO_DB_URL)
+        db_conn = MongoClient(config.MONGO_DB_URL, **client_options())
         db = db_conn.prazo
     except Exception as e:
         logger.info(f"Error connecting to Weather DB: {e}.")
@@ -20,13 +45,227 @@ def get_user_db():
     return db
 
 
+DUPLICATE_KEY_ERROR = 11000
+
+# Fields read by the listing endpoints
+LISTING_PROJECTION = {
+    "source": 1,
+    "title": 1,
+    "description": 1,
+    "url": 1,
+    "imageUrl": 1,
+    "datePublished": 1,
+    "contentHtml": 1,
+    "categories": 1,
+    "listing": 1,
+}
+
+# Stored fields each listing field is built from, for ``fields=`` projections.
+# Articles stored before listings were precomputed only have the raw ones.
+LISTING_FIELD_PATHS = {
+    "source": ("listing.source", "source"),
+    "author": ("listing.author",),
+    "title": ("listing.title", "title"),
+    "description": ("listing.description", "description"),
+    "url": ("listing.url", "url"),
+    "urlToImage": ("listing.urlToImage", "imageUrl"),
+    "id": (),
+    "publishedAt": ("datePublished",),
+    "content": ("listing.content", "contentHtml"),
+    "category": ("categories", "listing.category"),
+    "language": ("listing.language",),
+    "country": ("listing.country",),
+}
+
+LISTING_SORT = [("datePublished", DESCENDING), ("_id", DESCENDING)]
+
+TIMELINE_SORT = {"datePublished": DESCENDING, "_id": DESCENDING}
+
+# Every article, tagged with the categories whose feeds carried it
+ARTICLES_COLLECTION = "articles"
+# Moved to the article_content collection at ingest
+CONTENT_FIELDS = {"contentHtml", "attachments"}
+ARCHIVE_COLLECTION = "articles_archive"
+
+# Documents in the metadata collection
+INGEST_LEASE_ID = "ingest_lease"
+LAST_UPDATED_FILTER = {"lastUpdated": {"$exists": True}}
+
+
+def listing_projection(fields=None) -> dict:
+    """Projection reading only what ``fields`` of a listing need.
+
+    ``datePublished`` is always read, it is part of the pagination cursor.
+    """
+    if not fields:
+        # A copy: mongomock, used by the load tests, edits it in place
+        return dict(LISTING_PROJECTION)
+    projection = {"datePublished": 1}
+    for field in fields:
+        for path in LISTING_FIELD_PATHS[field]:
+            projection[path] = 1
+    return projection
+
+
+def category_filter(categories) -> dict:
+    """Filter matching articles in any of ``categories``, every article
+    when there are none."""
+    if not categories:
+        return {}
+    if isinstance(categories, str):
+        categories = [categories]
+    if len(categories) == 1:
+        return {"categories": categories[0]}
+    return {"categories": {"$in": list(categories)}}
+
+
+def timeline_id(category, source):
+    return f"{category}:{source}"
+
+
+def timeline_keys(sources, categories):
+    """``(category, source)`` of every timeline a feed is merged from."""
+    if isinstance(categories, str):
+        categories = [categories]
+    return [
+        (category, source)
+        for category in dict.fromkeys(categories)
+        for source in dict.fromkeys(sources)
+    ]
+
+
+def timeline_query(keys, limit, after):
+    """Filter and projection reading the timelines ``keys``."""
+    # The first page only needs the head of every timeline
+    projection = {
+        "items": {"$slice": config.FEED_TIMELINE_LENGTH if after else limit},
+    }
+    ids = [timeline_id(category, source) for category, source in keys]
+    return {"_id": {"$in": ids}}, projection
+
+
+def timeline_items(items, after, limit):
+    """Timeline entries older than ``after``, or None when the source has
+    to be read from its category instead."""
+    if items is not None and after is not None:
+        truncated = len(items) >= config.FEED_TIMELINE_LENGTH
+        items = [item for item in items if listing_position(item) < after]
+        if len(items) < limit and truncated:
+            return None
+    return items
+
+
+def source_query(source, category, cursor):
+    return {
+        "categories": category,
+        "source.name": source,
+        **keyset_filter(cursor),
+    }
+
+
+def merge_timeline_ids(streams, limit):
+    """Ids of the newest ``limit`` entries across the per-source streams."""
+    merged, seen = [], set()
+    for item in heapq.merge(*streams, key=listing_position, reverse=True):
+        # An article with several authors or categories is on each of
+        # their timelines
+        if item["_id"] not in seen:
+            seen.add(item["_id"])
+            merged.append(item["_id"])
+            if len(merged) == limit:
+                break
+    return merged
+
+
+@timed_methods(db_latency, db_in_flight, "sync")
 class DBConnection:
+    """Mongo access for the app. The client is opened by ``connect`` in the
+    app's lifespan, or on first use, never at import."""
+
     def __init__(self):
-        self.db = get_user_db()
-        if self.db is None:
-            raise GatewayTimeout(
-                "The connection to User DB could not be established."
+        self._db = None
+        self._connect_lock = threading.Lock()
+        self._indexes_ensured = False
+
+    @property
+    def db(self):
+        if self._db is None:
+            self.connect()
+        return self._db
+
+    @db.setter
+    def db(self, db):
+        self._db = db
+
+    def connect(self):
+        with self._connect_lock:
+            if self._db is None:
+                db = get_user_db()
+                if db is None:
+                    raise GatewayTimeout(
+                        "The connection to User DB could not be established."
+                    )
+                self._db = db
+        return self._db
+
+    def close(self):
+        if self._db is not None:
+            self._db.client.close()
+            self._db = None
+            self._indexes_ensured = False
+
+    def ensure_indexes(self):
+        if self._indexes_ensured:
+            return
+        try:
+            articles = self.db[ARTICLES_COLLECTION]
+            articles.create_index("url", unique=True, name="url_unique")
+            # Retention, and listings across every category
+            articles.create_index(LISTING_SORT, name="datePublished_id")
+            # A list of categories is read as one merge of index ranges
+            articles.create_index(
+                [("categories", ASCENDING), *LISTING_SORT],
+                name="categories_datePublished_id",
+            )
+            articles.create_index(
+                [
+                    ("categories", ASCENDING),
+                    ("source.name", ASCENDING),
+                    *LISTING_SORT,
+                ],
+                name="categories_source_datePublished_id",
             )
+            # Inserted and tagged articles, for the search indexes
+            articles.create_index("updatedAt", name="updatedAt", sparse=True)
+            self.db.users.create_index(
+                "email", unique=True, name="email_unique"
+            )
+            # Archived articles and their bodies expire with ARCHIVE_DAYS,
+            # upstream API usage the day after it was counted
+            for collection in (
+                self.db.article_content,
+                self.db.articles_archive,
+                self.db.quota_usage,
+            ):
+                collection.create_index(
+                    "expiresAt", expireAfterSeconds=0, name="expiresAt_ttl"
+                )
+            for category in NEWS_CATEGORIES:
+                self._backfill_timelines(category)
+            self._indexes_ensured = True
+        except Exception as e:
+            logger.error(f"Error creating indexes: {e}")
+
+        try:
+            # Bounded log of ingested articles for the live streams
+            if "article_events" not in self.db.list_collection_names():
+                self.db.create_collection(
+                    "article_events",
+                    capped=True,
+                    size=config.LIVE_EVENTS_MAX_BYTES,
+                )
+        except Exception as e:
+            logger.error(f"Error creating article_events: {e}")
 
     def insert_user(self, user):
         return self.db.users.insert_one(user.dict())
@@ -34,19 +273,53 @@ class DBConnection:
     def get_user_by_email(self, email: str):
         return self.db.users.find_one({"email": email})
 
-    def _is_news_updated(self):
-        metadata = self.db.metadata.find_one()
-
-        last_updated = (
-            metadata.get("lastUpdated").replace(tzinfo=pytz.UTC)
-            if metadata
-            else None
+    def update_password_hash(self, email: str, hashed_password: str):
+        return self.db.users.update_one(
+            {"email": email}, {"$set": {"hashedPassword": hashed_password}}
         )
-        current_time = datetime.now(tz=pytz.UTC)
 
-        if current_time - last_updated > timedelta(minutes=25):
+    def _is_news_updated(self, max_age=timedelta(minutes=25)):
+        """True when the stored news is older than ``max_age`` or missing."""
+        metadata = self.db.metadata.find_one(LAST_UPDATED_FILTER)
+        if not metadata:
             return True
-        return False
+
+        last_updated = metadata["lastUpdated"].replace(tzinfo=pytz.UTC)
+        current_time = datetime.now(tz=pytz.UTC)
+        return current_time - last_updated > max_age
+
+    def acquire_ingest_lease(self, owner: str, ttl: float) -> bool:
+        """Take or renew the ingestion lease for ``ttl`` seconds.
+
+        The lease is a single metadata document. It is taken when it has
+        expired or is already held by ``owner``; otherwise the upsert
+        collides on ``_id`` and the caller does not get it.
+        """
+        now = datetime.now(tz=pytz.UTC)
+        try:
+            self.db.metadata.update_one(
+                {
+                    "_id": INGEST_LEASE_ID,
+                    "$or": [{"expiresAt": {"$lte": now}}, {"owner": owner}],
+                },
+                {
+                    "$set": {
+                        "owner": owner,
+                        "expiresAt": now + timedelta(seconds=ttl),
+                        "acquiredAt": now,
+                    }
+                },
+                upsert=True,
+            )
+        except DuplicateKeyError:
+            return False
+        return True
+
+    def release_ingest_lease(self, owner: str):
+        self.db.metadata.update_one(
+            {"_id": INGEST_LEASE_ID, "owner": owner},
+            {"$set": {"expiresAt": datetime.now(tz=pytz.UTC)}},
+        )
 
     def add_feed_sources(self, email: str, sources: list[str]):
         try:
@@ -69,89 +342,663 @@ class DBConnection:
         return
 
     def _insert_articles(self, articles, category):
+        """Store articles in batches, one document per `url`.
+
+        Articles not stored yet are inserted; ones already stored from
+        another category's feed are tagged with ``category``. Returns the
+        number of inserted, tagged and already present articles.
+        """
+        counts = {"inserted": 0, "tagged": 0, "matched": 0}
         if len(articles) == 0:
             logger.info(f"No {category} news found from Feed")
+            return counts
 
+        # One entry per unique URL
+        entries = {}
         for article in articles:
-            article = article.dict()
-            self.db[category].update_one(
-                {"url": article["url"]},  # Filter for existing URL
-                {"$setOnInsert": article},  # Insert only if `url` is not found
-                upsert=True,  # Creates a new document if no match is found
+            listing = listing_fields(article)
+            if listing is None:
+                logger.info(
+                    f"Skipping invalid {category} article {article.url}"
+                )
+                continue
+            entries.setdefault(article.url, (article, listing))
+        entries = list(entries.values())
+
+        batch_size = config.INGEST_BATCH_SIZE
+        for start in range(0, len(entries), batch_size):
+            batch = entries[start : start + batch_size]
+            new, tagged, matched = self._classify_articles(batch, category)
+            inserted, raced = self._insert_new_articles(new, category)
+            if raced:
+                # Stored by a concurrent writer since they were looked up
+                _, raced_tagged, raced_matched = self._classify_articles(
+                    raced, category
+                )
+                tagged += raced_tagged
+                matched += raced_matched
+            self._tag_articles(tagged, category)
+
+            self._store_content(category, inserted)
+            self._fan_out_to_timelines(category, inserted + tagged)
+            self._publish_article_events(category, inserted + tagged)
+
+            counts["inserted"] += len(inserted)
+            counts["tagged"] += len(tagged)
+            counts["matched"] += matched
+            logger.info(
+                f"{category}: batch of {len(batch)} articles, "
+                f"{len(inserted)} inserted, {len(tagged)} tagged, "
+                f"{matched} matched"
             )
 
-    def _add_general_news(self):
-        logger.info("Adding general news")
-        general_articles = get_articles("general")
-        self._insert_articles(general_articles, "general")
-        return
+        return counts
 
-    def _add_politics_news(self):
-        logger.info("Adding politics news")
-        politics_articles = get_articles("politics")
-        self._insert_articles(politics_articles, "politics")
-        return
+    def _classify_articles(self, entries, category):
+        """Split ``(article, listing)`` entries into ones not stored yet,
+        ``(article, listing, _id)`` of ones stored without ``category``,
+        and the number already stored with it.
 
-    def _add_business_news(self):
-        logger.info("Adding business news")
-        articles = get_articles("business")
-        self._insert_articles(articles, "business")
-        return
+        A stored article keeps its publish date, which its entries on the
+        new category's timelines have to match.
+        """
+        stored = {
+            document["url"]: document
+            for document in self.db[ARTICLES_COLLECTION].find(
+                {"url": {"$in": [article.url for article, _ in entries]}},
+                {"url": 1, "categories": 1, "datePublished": 1},
+            )
+        }
+        new, tagged, matched = [], [], 0
+        for article, listing in entries:
+            document = stored.get(article.url)
+            if document is None:
+                new.append((article, listing))
+            elif category in document.get("categories", []):
+                matched += 1
+            else:
+                article = article.model_copy(
+                    update={"datePublished": document.get("datePublished")}
+                )
+                tagged.append((article, listing, document["_id"]))
+        return new, tagged, matched
 
-    def _add_science_technology_news(self):
-        logger.info("Adding Science and Technology news")
-        articles = get_articles("scienceandtechnology")
-        self._insert_articles(articles, "scienceandtechnology")
-        return
+    def _insert_new_articles(self, entries, category):
+        """Insert ``(article, listing)`` entries with unordered writes.
 
-    def _add_sports_news(self):
-        logger.info("Adding Sports news")
-        articles = get_articles("sports")
-        self._insert_articles(articles, "sports")
-        return
+        Returns ``(article, listing, _id)`` of the inserted articles and the
+        entries whose `url` a concurrent writer stored first.
+        """
+        if not entries:
+            return [], []
+        # `updatedAt` also lets search indexes find batches committed after
+        # a later one, whose `_id`s they have already gone past
+        now = datetime.now(tz=pytz.UTC)
+        documents = [
+            {
+                **article.dict(exclude=CONTENT_FIELDS),
+                "categories": [category],
+                "listing": listing,
+                "updatedAt": now,
+            }
+            for article, listing in entries
+        ]
+        failed = set()
+        try:
+            self.db[ARTICLES_COLLECTION].insert_many(documents, ordered=False)
+        except BulkWriteError as e:
+            # Losing the race on the unique `url` index is expected;
+            # anything else is a real failure
+            errors = e.details.get("writeErrors", [])
+            if any(error["code"] != DUPLICATE_KEY_ERROR for error in errors):
+                logger.error(f"Error writing {category} articles: {e}")
+                raise e
+            failed = {error["index"] for error in errors}
 
-    def _add_entertainment_news(self):
-        logger.info("Adding Entertainment news")
-        articles = get_articles("entertainment")
-        self._insert_articles(articles, "entertainment")
-        return
+        inserted, raced = [], []
+        for index, (entry, document) in enumerate(zip(entries, documents)):
+            if index in failed:
+                raced.append(entry)
+            else:
+                inserted.append((*entry, document["_id"]))
+        return inserted, raced
+
+    def _tag_articles(self, tagged, category):
+        if tagged:
+            # `updatedAt` is how search indexes find the new tags
+            self.db[ARTICLES_COLLECTION].update_many(
+                {"_id": {"$in": [_id for _, _, _id in tagged]}},
+                {
+                    "$addToSet": {"categories": category},
+                    "$set": {"updatedAt": datetime.now(tz=pytz.UTC)},
+                },
+            )
+
+    def _store_content(self, category, inserted):
+        """Store the bodies of newly inserted ``(article, listing, _id)``."""
+        if not inserted:
+            return
+        operations = [
+            ReplaceOne(
+                {"_id": _id},
+                content_document(
+                    _id,
+                    article.contentHtml,
+                    [
+                        attachment.dict()
+                        for attachment in article.attachments or []
+                    ],
+                ),
+                upsert=True,
+            )
+            for article, _, _id in inserted
+        ]
+        try:
+            self.db.article_content.bulk_write(operations, ordered=False)
+        except Exception as e:
+            # The listing is stored; the detail endpoint shows no body
+            logger.error(f"Error storing {category} article content: {e}")
+
+    def _fan_out_to_timelines(self, category, inserted):
+        """Push newly inserted ``(article, listing, _id)`` to their sources'
+        timelines, keeping the newest ``FEED_TIMELINE_LENGTH`` per source.
+        """
+        items = defaultdict(list)
+        for article, _, _id in inserted:
+            for source in article.source or []:
+                items[source.name].append(
+                    {"_id": _id, "datePublished": article.datePublished}
+                )
+        if not items:
+            return
+
+        operations = [
+            UpdateOne(
+                {"_id": timeline_id(category, source)},
+                {
+                    "$setOnInsert": {"category": category, "source": source},
+                    "$push": {
+                        "items": {
+                            "$each": source_items,
+                            "$sort": TIMELINE_SORT,
+                            "$slice": config.FEED_TIMELINE_LENGTH,
+                        }
+                    },
+                },
+                upsert=True,
+            )
+            for source, source_items in items.items()
+        ]
+        try:
+            self.db.timelines.bulk_write(operations, ordered=False)
+        except Exception as e:
+            # Feeds fall back to querying the category for missing sources
+            logger.error(f"Error updating {category} timelines: {e}")
+
+    def _publish_article_events(self, category, inserted):
+        """Record newly inserted articles for the live update streams."""
+        if not inserted:
+            return
+        try:
+            self.db.article_events.insert_one(
+                {
+                    "category": category,
+                    "articles": [
+                        {
+                            "sources": [
+                                source.name for source in article.source or []
+                            ],
+                            "listing": {
+                                **listing,
+                                "category": category,
+                                "publishedAt": (
+                                    get_relative_time(article.datePublished)
+                                    if article.datePublished
+                                    else None
+                                ),
+                            },
+                        }
+                        for article, listing, _ in inserted
+                    ],
+                }
+            )
+        except Exception as e:
+            logger.error(f"Error publishing {category} article events: {e}")
+
+    def get_last_event_id(self):
+        event = self.db.article_events.find_one(
+            {}, {"_id": 1}, sort=[("_id", DESCENDING)]
+        )
+        return event["_id"] if event else None
+
+    def get_article_events_after(self, last_id, limit=100):
+        return list(
+            self.db.article_events.find({"_id": {"$gt": last_id}})
+            .sort("_id", ASCENDING)
+            .limit(limit)
+        )
+
+    def _backfill_timelines(self, category):
+        """Build timelines from stored articles the first time they are needed."""
+        if self.db.timelines.find_one({"category": category}, {"_id": 1}):
+            return
+
+        pipeline = [
+            {"$match": {"categories": category}},
+            {"$sort": TIMELINE_SORT},
+            {"$unwind": "$source"},
+            {
+                "$group": {
+                    "_id": "$source.name",
+                    "items": {
+                        "$push": {
+                            "_id": "$_id",
+                            "datePublished": "$datePublished",
+                        }
+                    },
+                }
+            },
+            {
+                "$project": {
+                    "items": {"$slice": ["$items", config.FEED_TIMELINE_LENGTH]}
+                }
+            },
+        ]
+        operations = [
+            UpdateOne(
+                {"_id": timeline_id(category, timeline["_id"])},
+                {
+                    "$set": {
+                        "category": category,
+                        "source": timeline["_id"],
+                        "items": timeline["items"],
+                    }
+                },
+                upsert=True,
+            )
+            for timeline in self.db[ARTICLES_COLLECTION].aggregate(
+                pipeline, allowDiskUse=True
+            )
+            if timeline["_id"] is not None
+        ]
+        if operations:
+            self.db.timelines.bulk_write(operations, ordered=False)
+            logger.info(f"Built {len(operations)} {category} timelines")
+
+    def rebuild_timelines(self):
+        """Drop every timeline and build them again from stored articles."""
+        self.db.timelines.delete_many({})
+        for category in NEWS_CATEGORIES:
+            self._backfill_timelines(category)
+
+    def _get_feed_validators(self) -> dict:
+        return {feed["_id"]: feed for feed in self.db.feeds.find()}
+
+    def _save_feed_validators(self, feed: FeedFetch):
+        self.db.feeds.update_one(
+            {"_id": feed.category},
+            {
+                "$set": {
+                    "etag": feed.etag,
+                    "lastModified": feed.last_modified,
+                    "fetchedAt": datetime.now(tz=pytz.UTC),
+                }
+            },
+            upsert=True,
+        )
+
+    def _drop_duplicate_articles(self, articles, category):
+        """Skip articles already stored under another URL or as a lightly
+        edited copy of a recent story in the same category."""
+        deduplicator = ArticleDeduplicator(config.DEDUP_THRESHOLD)
+        recent = (
+            self.db[ARTICLES_COLLECTION]
+            .find(
+                {"categories": category},
+                {"url": 1, "title": 1, "description": 1},
+            )
+            .sort(LISTING_SORT)
+            .limit(config.DEDUP_WINDOW)
+        )
+        for article in recent:
+            deduplicator.remember(
+                article["url"], article.get("title"), article.get("description")
+            )
+
+        unique = dedupe_articles(
+            articles,
+            get_fields=lambda article: (
+                article.url,
+                article.title,
+                article.description,
+            ),
+            deduplicator=deduplicator,
+        )
+        if len(unique) < len(articles):
+            logger.info(
+                f"{category}: skipped {len(articles) - len(unique)} "
+                "duplicate articles"
+            )
+        return unique
+
+    def _add_category_news(self, category, validators):
+        logger.info(f"Adding {category} news")
+        # Sessions are not thread-safe; each worker gets its own
+        with requests.Session() as session:
+            feed = fetch_feed(
+                category,
+                etag=validators.get("etag"),
+                last_modified=validators.get("lastModified"),
+                session=session,
+            )
+        if feed.not_modified:
+            logger.info(f"{category} feed not modified since last fetch")
+            return {"inserted": 0, "tagged": 0, "matched": 0}
+
+        articles = self._drop_duplicate_articles(feed.articles, category)
+        counts = self._insert_articles(articles, category)
+        # Only remember validators once the articles are stored
+        self._save_feed_validators(feed)
+        return counts
 
     def add_news(self):
+        """Fetch every category feed concurrently and store new articles.
+
+        A feed that fails or times out is logged and skipped; the others
+        are still written. Returns the per-category insert counts.
+        """
+        self.ensure_indexes()
+        validators = self._get_feed_validators()
+        results, failed = {}, []
+        with ThreadPoolExecutor(max_workers=len(NEWS_CATEGORIES)) as executor:
+            futures = {
+                executor.submit(
+                    self._add_category_news,
+                    category,
+                    validators.get(category, {}),
+                ): category
+                for category in NEWS_CATEGORIES
+            }
+            for future in as_completed(futures):
+                category = futures[future]
+                try:
+                    results[category] = future.result()
+                except Exception as e:
+                    logger.error(f"Error adding {category} news: {e}")
+                    failed.append(category)
+
+        if len(failed) == len(NEWS_CATEGORIES):
+            raise GatewayTimeout("Every category feed failed to ingest")
+
+        # Update metadata; the generation only moves when articles were
+        # added to a category, it is what listing responses are
+        # revalidated against
+        now = datetime.now(tz=pytz.UTC)
+        update = {"$set": {"lastUpdated": now}}
+        if any(
+            counts["inserted"] or counts["tagged"]
+            for counts in results.values()
+        ):
+            update["$set"]["changedAt"] = now
+            update["$inc"] = {"generation": 1}
+        self.db.metadata.update_one(LAST_UPDATED_FILTER, update, upsert=True)
+        return results
+
+    def apply_retention(self):
+        """Split bodies out of articles stored before the content collection
+        and retire articles older than ``RETENTION_DAYS``.
+
+        Listings change when articles are retired, so the ingest generation
+        is bumped. Timelines drop the retired entries; search indexes drop
+        them at their next refresh, by the same cutoff.
+        """
+        now = datetime.now(tz=pytz.UTC)
+        cutoff = now - timedelta(days=config.RETENTION_DAYS)
+        retired = 0
         try:
-            # if not self._is_news_updated():
-            #     logger.info("News is already updated")
-            #     return
-
-            self._add_general_news()
-            self._add_politics_news()
-            self._add_business_news()
-            self._add_science_technology_news()
-            self._add_sports_news()
-            self._add_entertainment_news()
-
-            # Update metadata
+            self._split_content()
+            if config.RETENTION_DAYS:
+                retired = self._retire_articles(cutoff, now)
+        except Exception as e:
+            logger.error(f"Error applying retention: {e}")
+
+        if retired:
             self.db.metadata.update_one(
-                {},
-                {"$set": {"lastUpdated": datetime.now(tz=pytz.UTC)}},
+                LAST_UPDATED_FILTER,
+                {"$set": {"changedAt": now}, "$inc": {"generation": 1}},
                 upsert=True,
             )
+        return retired
 
-        except Exception as e:
-            logger.error(f"Error adding general news: {e}")
-            raise e
+    def _split_content(self):
+        """Move the bodies of up to ``RETENTION_BATCH_SIZE`` articles that
+        still carry them to the content collection; a large backlog moves
+        a batch per run."""
+        articles = self.db[ARTICLES_COLLECTION]
+        documents = list(
+            articles.find(
+                {"contentHtml": {"$exists": True}},
+                {"contentHtml": 1, "attachments": 1, "listing": 1},
+            ).limit(config.RETENTION_BATCH_SIZE)
+        )
+        if not documents:
+            return
+        self.db.article_content.bulk_write(
+            [
+                ReplaceOne(
+                    {"_id": document["_id"]},
+                    content_document(
+                        document["_id"],
+                        document.get("contentHtml"),
+                        document.get("attachments"),
+                    ),
+                    upsert=True,
+                )
+                for document in documents
+            ],
+            ordered=False,
+        )
+        operations = []
+        for document in documents:
+            update = {"$unset": {"contentHtml": "", "attachments": ""}}
+            if "listing" in document:
+                update["$set"] = {
+                    "listing.content": content_snippet(
+                        document.get("contentHtml")
+                    )
+                }
+            operations.append(UpdateOne({"_id": document["_id"]}, update))
+        articles.bulk_write(operations, ordered=False)
+        logger.info(f"Moved {len(documents)} article bodies")
+
+    def _retire_articles(self, cutoff, now):
+        """Archive or delete articles published before ``cutoff``."""
+        articles = self.db[ARTICLES_COLLECTION]
+        expired = {"datePublished": {"$lt": cutoff}}
+        archive = config.RETENTION_MODE == "archive"
+        expires_at = (
+            now + timedelta(days=config.ARCHIVE_DAYS)
+            if config.ARCHIVE_DAYS
+            else None
+        )
+        retired = 0
+        while True:
+            documents = list(
+                articles.find(expired, None if archive else {"_id": 1}).limit(
+                    config.RETENTION_BATCH_SIZE
+                )
+            )
+            if not documents:
+                break
+            ids = [document["_id"] for document in documents]
+            if archive:
+                self.db[ARCHIVE_COLLECTION].bulk_write(
+                    [
+                        ReplaceOne(
+                            {"_id": document["_id"]},
+                            {
+                                **document,
+                                "archivedAt": now,
+                                "expiresAt": expires_at,
+                            },
+                            upsert=True,
+                        )
+                        for document in documents
+                    ],
+                    ordered=False,
+                )
+                self.db.article_content.update_many(
+                    {"_id": {"$in": ids}}, {"$set": {"expiresAt": expires_at}}
+                )
+            else:
+                self.db.article_content.delete_many({"_id": {"$in": ids}})
+            retired += articles.delete_many({"_id": {"$in": ids}}).deleted_count
+
+        if retired:
+            self.db.timelines.update_many(
+                {}, {"$pull": {"items": {"datePublished": {"$lt": cutoff}}}}
+            )
+            logger.info(
+                f"{'Archived' if archive else 'Deleted'} {retired} articles "
+                f"published before {cutoff:%Y-%m-%d}"
+            )
+        return retired
+
+    def get_ingest_generation(self):
+        """Number of ingests that added articles and when the last one ran."""
+        metadata = self.db.metadata.find_one(
+            LAST_UPDATED_FILTER,
+            {"generation": 1, "changedAt": 1, "lastUpdated": 1},
+        )
+        if metadata is None:
+            return 0, None
+        return (
+            metadata.get("generation", 0),
+            metadata.get("changedAt") or metadata["lastUpdated"],
+        )
+
+    def find_news(self, categories=None, limit=75, cursor=None, fields=None):
+        """Unread cursor over the listing of ``categories``, merged newest
+        first; ``get_news`` reads it all."""
+        return (
+            self.db[ARTICLES_COLLECTION]
+            .find(
+                {**category_filter(categories), **keyset_filter(cursor)},
+                listing_projection(fields),
+            )
+            .sort(LISTING_SORT)
+            .limit(limit)
+        )
+
+    def get_news(self, categories=None, limit=75, cursor=None, fields=None):
+        return list(self.find_news(categories, limit, cursor, fields))
+
+    def get_articles_after(self, last_id=None):
+        """Search fields of articles stored after ``last_id``, oldest first."""
+        query = {"_id": {"$gt": last_id}} if last_id else {}
+        return (
+            self.db[ARTICLES_COLLECTION]
+            .find(
+                query,
+                {
+                    "categories": 1,
+                    "title": 1,
+                    "description": 1,
+                    "datePublished": 1,
+                },
+            )
+            .sort("_id", ASCENDING)
+            .batch_size(5000)
+        )
 
-    def get_news(self, category=None):
+    def get_articles_updated_since(self, since):
+        """Search fields of articles inserted or tagged at or after
+        ``since``."""
+        return (
+            self.db[ARTICLES_COLLECTION]
+            .find(
+                {"updatedAt": {"$gte": since}},
+                {
+                    "categories": 1,
+                    "title": 1,
+                    "description": 1,
+                    "datePublished": 1,
+                },
+            )
+            .batch_size(5000)
+        )
+
+    def get_articles_by_ids(self, ids, fields=None):
         return list(
-            self.db[category].find({}).limit(75).sort("datePublished", -1)
+            self.db[ARTICLES_COLLECTION].find(
+                {"_id": {"$in": ids}}, listing_projection(fields)
+            )
         )
 
-    def get_feed_news(self, sources, category):
+    def _query_feed_news(
+        self, sources, categories, limit=75, cursor=None, fields=None
+    ):
+        query = {
+            **category_filter(categories),
+            "source.name": {"$in": sources},
+            **keyset_filter(cursor),
+        }
         return list(
-            self.db[category]
-            .find({"source.name": {"$in": sources}})
-            .limit(75)
-            .sort("datePublished", -1)
+            self.db[ARTICLES_COLLECTION]
+            .find(query, listing_projection(fields))
+            .sort(LISTING_SORT)
+            .limit(limit)
         )
 
+    def _merge_timelines(self, sources, categories, limit, cursor=None):
+        """Ids of the next ``limit`` articles from ``sources`` in
+        ``categories`` after ``cursor``.
+
+        Each timeline contributes at most ``limit`` entries, which are
+        merged newest first. A timeline that is missing, or too short for a
+        deep cursor, is read from the articles through the
+        ``categories_source_datePublished_id`` index instead.
+        """
+        after = cursor_position(cursor)
+        keys = timeline_keys(sources, categories)
+        query, projection = timeline_query(keys, limit, after)
+        timelines = {
+            timeline["_id"]: timeline["items"]
+            for timeline in self.db.timelines.find(query, projection)
+        }
+
+        streams = []
+        for category, source in keys:
+            items = timeline_items(
+                timelines.get(timeline_id(category, source)), after, limit
+            )
+            if items is None:
+                items = list(
+                    self.db[ARTICLES_COLLECTION]
+                    .find(
+                        source_query(source, category, cursor),
+                        {"datePublished": 1},
+                    )
+                    .sort(LISTING_SORT)
+                    .limit(limit)
+                )
+            streams.append(items[:limit])
+        return merge_timeline_ids(streams, limit)
+
+    def get_feed_news(
+        self, sources, categories, limit=75, cursor=None, fields=None
+    ):
+        if not config.FEED_MATERIALIZED:
+            return self._query_feed_news(
+                sources, categories, limit, cursor, fields
+            )
+
+        ids = self._merge_timelines(sources, categories, limit, cursor)
+        documents = {
+            document["_id"]: document
+            for document in self.get_articles_by_ids(ids, fields)
+        }
+        return [documents[_id] for _id in ids if _id in documents]
+
 
 db_conn = DBConnection()
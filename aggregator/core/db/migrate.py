@@ -0,0 +1,137 @@
+"""Move articles from the per-category collections into ``articles``.
+
+Articles used to be stored in one collection per category (``general``,
+``politics``, ...). This copies them into the ``articles`` collection, one
+document per URL tagged with every category it was stored under. An
+article keeps its ``_id``, so its body in ``article_content`` stays
+attached; when the same URL was stored under several categories the first
+copy is kept and the body of the others is dropped. Timelines are rebuilt
+from the result and archived articles get their ``categories`` too.
+
+    python -m aggregator.core.db.migrate [--drop] [--batch-size 1000]
+
+It is safe to run again, e.g. once more after deploying to pick up what the
+previous version ingested in the meantime. ``--drop`` removes the old
+collections after everything was copied.
+"""
+
+import argparse
+
+from pymongo import ASCENDING, UpdateOne
+
+from aggregator.constants import NEWS_CATEGORIES
+from aggregator.core.logger import logger
+
+from .connection import ARCHIVE_COLLECTION, ARTICLES_COLLECTION, db_conn
+
+
+def stored_document(document):
+    """``document`` as stored in ``articles``, whose listings no longer
+    carry a category; it is read from ``categories``."""
+    stored = {
+        key: value for key, value in document.items() if key != "categories"
+    }
+    if "listing" in stored:
+        stored["listing"] = {
+            key: value
+            for key, value in stored["listing"].items()
+            if key != "category"
+        }
+    return stored
+
+
+def migrate_category(db, category, batch_size=1000):
+    """Copy the ``category`` collection into ``articles``.
+
+    Returns the number of articles copied and, of those, how many were
+    already stored under another category.
+    """
+    articles = db[ARTICLES_COLLECTION]
+    copied = merged = 0
+    last_id = None
+    while True:
+        query = {"_id": {"$gt": last_id}} if last_id else {}
+        documents = list(
+            db[category].find(query).sort("_id", ASCENDING).limit(batch_size)
+        )
+        if not documents:
+            break
+        last_id = documents[-1]["_id"]
+        documents = [document for document in documents if document.get("url")]
+        if not documents:
+            continue
+
+        articles.bulk_write(
+            [
+                UpdateOne(
+                    {"url": document["url"]},
+                    {
+                        "$setOnInsert": stored_document(document),
+                        "$addToSet": {"categories": category},
+                    },
+                    upsert=True,
+                )
+                for document in documents
+            ],
+            ordered=False,
+        )
+        ids = [document["_id"] for document in documents]
+        kept = {
+            document["_id"]
+            for document in articles.find({"_id": {"$in": ids}}, {"_id": 1})
+        }
+        duplicates = [_id for _id in ids if _id not in kept]
+        if duplicates:
+            # The copy stored under the other category keeps its own body
+            db.article_content.delete_many({"_id": {"$in": duplicates}})
+        copied += len(documents)
+        merged += len(duplicates)
+    return copied, merged
+
+
+def migrate(batch_size=1000, drop=False):
+    db = db_conn.db
+    # The unique `url` index has to exist before copying
+    db_conn.ensure_indexes()
+    for category in NEWS_CATEGORIES:
+        copied, merged = migrate_category(db, category, batch_size)
+        logger.info(
+            f"{category}: copied {copied} articles, {merged} already stored "
+            "under another category"
+        )
+        db[ARCHIVE_COLLECTION].update_many(
+            {"category": category},
+            {"$set": {"categories": [category]}, "$unset": {"category": ""}},
+        )
+    db.article_content.update_many(
+        {"category": {"$exists": True}}, {"$unset": {"category": ""}}
+    )
+    for collection in (ARTICLES_COLLECTION, ARCHIVE_COLLECTION):
+        db[collection].update_many(
+            {"listing.category": {"$exists": True}},
+            {"$unset": {"listing.category": ""}},
+        )
+    db_conn.rebuild_timelines()
+
+    if drop:
+        for category in NEWS_CATEGORIES:
+            db.drop_collection(category)
+            logger.info(f"Dropped the {category} collection")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawTextHelpFormatter
+    )
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument(
+        "--drop",
+        action="store_true",
+        help="drop the per-category collections once they are copied",
+    )
+    args = parser.parse_args()
+    migrate(args.batch_size, args.drop)
+
+
+if __name__ == "__main__":
+    main()
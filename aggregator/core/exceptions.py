@@ -53,6 +53,18 @@ class GatewayTimeout(CustomException):
     message = HTTPStatus.GATEWAY_TIMEOUT.description
 
 
+class TooManyRequestsException(CustomException):
+    code = HTTPStatus.TOO_MANY_REQUESTS
+    error_code = HTTPStatus.TOO_MANY_REQUESTS
+    message = HTTPStatus.TOO_MANY_REQUESTS.description
+
+
+class ServiceUnavailableException(CustomException):
+    code = HTTPStatus.SERVICE_UNAVAILABLE
+    error_code = HTTPStatus.SERVICE_UNAVAILABLE
+    message = HTTPStatus.SERVICE_UNAVAILABLE.description
+
+
 class InternalServerException(CustomException):
     code = HTTPStatus.INTERNAL_SERVER_ERROR
     error_code = HTTPStatus.INTERNAL_SERVER_ERROR
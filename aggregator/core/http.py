@@ -0,0 +1,108 @@
+import asyncio
+import json
+import time
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+import aiohttp
+
+from aggregator.config import config
+from aggregator.core.exceptions import CustomException, GatewayTimeout
+from aggregator.core.logger import logger
+from aggregator.core.metrics import (
+    observe_upstream,
+    upstream_in_flight,
+    upstream_provider,
+)
+
+
+@dataclass
+class UpstreamResponse:
+    """Fully read upstream response, detached from the connection."""
+
+    url: str
+    status_code: int
+    content: bytes
+    headers: dict = field(default_factory=dict)
+
+    def json(self) -> Any:
+        return json.loads(self.content)
+
+
+class UpstreamClient:
+    """Shared, pooled HTTP client for the upstream news providers.
+
+    One ``aiohttp.ClientSession`` is kept for the lifetime of the app so that
+    connections to NewsAPI, Mediastack and rss.app are pooled per host and
+    kept alive across requests. The app lifespan opens and closes it.
+    """
+
+    def __init__(self):
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    def _build_session(self) -> aiohttp.ClientSession:
+        connector = aiohttp.TCPConnector(
+            limit=config.HTTP_MAX_CONNECTIONS,
+            limit_per_host=config.HTTP_MAX_CONNECTIONS_PER_HOST,
+            keepalive_timeout=config.HTTP_KEEPALIVE_EXPIRY,
+            ttl_dns_cache=300,
+        )
+        timeout = aiohttp.ClientTimeout(
+            sock_connect=config.HTTP_CONNECT_TIMEOUT,
+            sock_read=config.HTTP_READ_TIMEOUT,
+        )
+        return aiohttp.ClientSession(connector=connector, timeout=timeout)
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        # Fall back to a lazily created session when used outside the app
+        # lifespan (scripts, cron jobs)
+        if self._session is None or self._session.closed:
+            self._session = self._build_session()
+        return self._session
+
+    async def start(self):
+        logger.info("Opening upstream HTTP client")
+        self.session
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            logger.info("Closing upstream HTTP client")
+            await self._session.close()
+        self._session = None
+
+    async def get(
+        self, url: str, params: dict = None, headers: dict = None
+    ) -> UpstreamResponse:
+        if params:
+            # Match `requests`, which silently drops params set to None
+            params = {k: v for k, v in params.items() if v is not None}
+        provider = upstream_provider(url)
+        in_flight = upstream_in_flight.labels(provider)
+        in_flight.inc()
+        started, status = time.perf_counter(), None
+        try:
+            async with self.session.get(
+                url, params=params, headers=headers
+            ) as response:
+                status = response.status
+                return UpstreamResponse(
+                    url=url,
+                    status_code=response.status,
+                    content=await response.read(),
+                    headers=dict(response.headers),
+                )
+        except asyncio.TimeoutError as e:
+            status = None
+            logger.error(f"Timed out fetching {url}: {e!r}")
+            raise GatewayTimeout(f"Upstream request timed out: {url}")
+        except aiohttp.ClientError as e:
+            status = None
+            logger.error(f"Error fetching {url}: {e!r}")
+            raise CustomException(f"Error contacting upstream: {url}")
+        finally:
+            in_flight.dec()
+            observe_upstream(provider, status, started)
+
+
+http_client = UpstreamClient()
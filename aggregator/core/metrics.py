@@ -0,0 +1,405 @@
+"""Prometheus metrics for routes, upstream providers and Mongo.
+
+Values are kept per thread: every thread that records a value gets its own
+shard of plain counters the first time, so recording is a list update with
+no lock, from the event loop and from the threadpool alike. A scrape sums
+the shards. Label sets are registered up front (routes when the app is
+built, providers and DB methods at import) so the hot path only looks up an
+existing child.
+"""
+
+import inspect
+import threading
+import time
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from functools import wraps
+from typing import Callable, Optional
+
+import anyio.to_thread
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from aggregator.config import config
+
+DEFAULT_BUCKETS = (
+    0.001,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+)
+# Registered for every route up front; others are added on first use
+COMMON_STATUSES = ("200", "201", "304", "400", "401", "404", "422", "500")
+UPSTREAM_STATUSES = ("200", "304", "401", "404", "429", "500", "error")
+PROVIDERS = ("newsapi", "mediastack", "rssapp", "other")
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: tuple, values: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Sharded:
+    """Counters with one shard per recording thread."""
+
+    def __init__(self, width: int):
+        self._width = width
+        self._local = threading.local()
+        self._shards: list[list] = []
+        self._lock = threading.Lock()
+
+    def _new_shard(self) -> list:
+        shard = [0] * self._width
+        # Only taken once per thread
+        with self._lock:
+            self._shards.append(shard)
+        self._local.shard = shard
+        return shard
+
+    def totals(self) -> list:
+        totals = [0] * self._width
+        for shard in list(self._shards):
+            for index, value in enumerate(shard):
+                totals[index] += value
+        return totals
+
+
+class HistogramChild(_Sharded):
+    def __init__(self, bounds: tuple):
+        # One counter per bucket, then +Inf, then the sum
+        super().__init__(len(bounds) + 2)
+        self._bounds = bounds
+
+    def observe(self, value: float):
+        try:
+            shard = self._local.shard
+        except AttributeError:
+            shard = self._new_shard()
+        shard[bisect_left(self._bounds, value)] += 1
+        shard[-1] += value
+
+
+class GaugeChild(_Sharded):
+    def __init__(self):
+        super().__init__(1)
+
+    def inc(self, amount: float = 1):
+        try:
+            shard = self._local.shard
+        except AttributeError:
+            shard = self._new_shard()
+        shard[0] += amount
+
+    def dec(self, amount: float = 1):
+        self.inc(-amount)
+
+    @property
+    def value(self) -> float:
+        return self.totals()[0]
+
+
+class _Metric(ABC):
+    kind = ""
+
+    def __init__(self, name: str, documentation: str):
+        self.name = name
+        self.documentation = documentation
+        metrics_registry.register(self)
+
+    @abstractmethod
+    def _samples(self) -> list[str]:
+        """Exposition lines of the current values."""
+
+    def render(self) -> list[str]:
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+            *self._samples(),
+        ]
+
+
+class _LabeledMetric(_Metric):
+    """Metric with a child per set of label values."""
+
+    def __init__(self, name: str, documentation: str, labelnames=()):
+        self.labelnames = tuple(labelnames)
+        self._children: dict = {}
+        self._lock = threading.Lock()
+        super().__init__(name, documentation)
+
+    @abstractmethod
+    def _new_child(self):
+        """Child recording the values of one label set."""
+
+    def labels(self, *values: str):
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.get(values)
+                if child is None:
+                    child = self._children[values] = self._new_child()
+        return child
+
+
+class Histogram(_LabeledMetric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames=(),
+        buckets: tuple = DEFAULT_BUCKETS,
+    ):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self) -> HistogramChild:
+        return HistogramChild(self.buckets)
+
+    def _samples(self) -> list[str]:
+        lines = []
+        bounds = [str(bound) for bound in self.buckets] + ["+Inf"]
+        for values, child in list(self._children.items()):
+            totals = child.totals()
+            count = sum(totals[:-1])
+            if not count:
+                continue
+            cumulative = 0
+            for bound, bucket in zip(bounds, totals):
+                cumulative += bucket
+                labels = _format_labels(
+                    self.labelnames, values, f'le="{bound}"'
+                )
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, values)
+            lines.append(f"{self.name}_sum{labels} {totals[-1]}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class Gauge(_LabeledMetric):
+    kind = "gauge"
+
+    def _new_child(self) -> GaugeChild:
+        return GaugeChild()
+
+    def _samples(self) -> list[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, values)} "
+            f"{child.value}"
+            for values, child in list(self._children.items())
+        ]
+
+
+class CallbackGauge(_Metric):
+    """Gauge read from ``function`` at scrape time."""
+
+    kind = "gauge"
+
+    def __init__(
+        self, name: str, documentation: str, function: Callable[[], float]
+    ):
+        self.function = function
+        super().__init__(name, documentation)
+
+    def _samples(self) -> list[str]:
+        return [f"{self.name} {self.function()}"]
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: list[_Metric] = []
+
+    def register(self, metric: _Metric):
+        self._metrics.append(metric)
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines += metric.render()
+        return "\n".join(lines) + "\n"
+
+
+metrics_registry = MetricsRegistry()
+
+request_latency = Histogram(
+    "aggregator_http_request_duration_seconds",
+    "Time to send the full response, by route and status code.",
+    ("method", "route", "status"),
+)
+requests_in_flight = Gauge(
+    "aggregator_http_requests_in_flight", "HTTP requests being served."
+).labels()
+upstream_latency = Histogram(
+    "aggregator_upstream_request_duration_seconds",
+    "Upstream provider request time, by provider and HTTP status.",
+    ("provider", "status"),
+)
+upstream_in_flight = Gauge(
+    "aggregator_upstream_requests_in_flight",
+    "Upstream provider requests in flight.",
+    ("provider",),
+)
+db_latency = Histogram(
+    "aggregator_db_operation_duration_seconds",
+    "Time spent in each data-access method, by client (sync or async).",
+    ("client", "method"),
+)
+db_in_flight = Gauge(
+    "aggregator_db_operations_in_flight",
+    "Data-access calls in flight, by client (sync or async).",
+    ("client", "method"),
+)
+
+for _provider in PROVIDERS:
+    upstream_in_flight.labels(_provider)
+    for _status in UPSTREAM_STATUSES:
+        upstream_latency.labels(_provider, _status)
+
+
+def _thread_limiter():
+    # Only readable from the event loop; scrapes are served there
+    return anyio.to_thread.current_default_thread_limiter()
+
+
+CallbackGauge(
+    "aggregator_threadpool_busy_threads",
+    "Threadpool workers running sync routes and blocking calls.",
+    lambda: _thread_limiter().borrowed_tokens,
+)
+CallbackGauge(
+    "aggregator_threadpool_max_threads",
+    "Threadpool size.",
+    lambda: _thread_limiter().total_tokens,
+)
+CallbackGauge(
+    "aggregator_threadpool_waiting_tasks",
+    "Calls queued for a threadpool worker; non-zero means saturated.",
+    lambda: _thread_limiter().statistics().tasks_waiting,
+)
+
+
+def upstream_provider(url: str) -> str:
+    if url.startswith(config.NEWS_API_URL):
+        return "newsapi"
+    if url.startswith(config.MEDIASTACK_URL):
+        return "mediastack"
+    return "other"
+
+
+def observe_upstream(provider: str, status: Optional[int], started: float):
+    """Record an upstream call; ``status`` is None when it failed."""
+    upstream_latency.labels(
+        provider, "error" if status is None else str(status)
+    ).observe(time.perf_counter() - started)
+
+
+def timed_methods(histogram: Histogram, in_flight: Gauge, *labels: str):
+    """Class decorator recording the latency of every method, labelled by
+    ``labels`` and the method name. Coroutine methods are timed until they
+    complete. Children are bound once, when the class is built."""
+
+    def decorate(cls):
+        for name, method in list(vars(cls).items()):
+            if name.startswith("__") or not callable(method):
+                continue
+            setattr(
+                cls,
+                name,
+                _timed(
+                    method,
+                    histogram.labels(*labels, name),
+                    in_flight.labels(*labels, name),
+                ),
+            )
+        return cls
+
+    return decorate
+
+
+def _timed(method, latency: HistogramChild, in_flight: GaugeChild):
+    if inspect.iscoroutinefunction(method):
+
+        @wraps(method)
+        async def async_wrapper(*args, **kwargs):
+            in_flight.inc()
+            started = time.perf_counter()
+            try:
+                return await method(*args, **kwargs)
+            finally:
+                latency.observe(time.perf_counter() - started)
+                in_flight.dec()
+
+        return async_wrapper
+
+    @wraps(method)
+    def wrapper(*args, **kwargs):
+        in_flight.inc()
+        started = time.perf_counter()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            latency.observe(time.perf_counter() - started)
+            in_flight.dec()
+
+    return wrapper
+
+
+def register_routes(app):
+    """Create the latency children of every route up front."""
+    for route in app.routes:
+        for method in getattr(route, "methods", None) or ():
+            for status in COMMON_STATUSES:
+                request_latency.labels(method, route.path, status)
+
+
+class MetricsMiddleware:
+    """Records the latency and status of every HTTP request, labelled by
+    the route's path template rather than the raw path."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_wrapper(message: Message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        requests_in_flight.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            requests_in_flight.dec()
+            # Set by the router once a route matched
+            route = scope.get("route")
+            request_latency.labels(
+                scope["method"],
+                route.path if route is not None else "unmatched",
+                str(status),
+            ).observe(time.perf_counter() - started)
@@ -0,0 +1,378 @@
+"""Opt-in sampling profiler for single requests, startup and ingestion.
+
+A background thread reads ``sys._current_frames()`` every
+``PROFILING_INTERVAL`` seconds and records the stacks of the threads being
+profiled. Sync routes run in the threadpool, so a request profile covers
+the event loop thread and whichever worker threads are running the
+request's endpoint. Profiles are written as speedscope JSON (one profile
+per thread, open at https://www.speedscope.app) or as folded stacks for
+``flamegraph.pl``.
+
+A request is profiled when ``PROFILING_ENABLED`` is set and it carries a
+token signed with ``PROFILING_SECRET`` in the ``X-Profile`` header or the
+``profile`` query parameter. The profile is kept in a ring of the newest
+``PROFILING_MAX_FILES`` files in ``PROFILING_DIR``, or returned instead of
+the response with ``profileOutput=inline``. When profiling is disabled the
+middleware is not installed at all.
+
+    python -m aggregator.core.profiling sign --ttl 3600
+    python -m aggregator.core.profiling startup
+    python -m aggregator.core.profiling ingest
+"""
+
+import argparse
+import asyncio
+import hashlib
+import hmac
+import itertools
+import os
+import sys
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Callable, Optional
+from urllib.parse import parse_qs
+
+import orjson
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from aggregator.config import config
+from aggregator.core.logger import logger
+
+FORMATS = {
+    "speedscope": ("json", "application/json"),
+    "folded": ("folded", "text/plain; charset=utf-8"),
+}
+
+
+def sign_token(secret: str, ttl: float) -> str:
+    """Profiling token valid for ``ttl`` seconds."""
+    expires = int(time.time() + ttl)
+    signature = hmac.new(
+        secret.encode(), f"profile:{expires}".encode(), hashlib.sha256
+    ).hexdigest()
+    return f"{expires}.{signature}"
+
+
+def verify_token(secret: str, token: str) -> bool:
+    expires, _, signature = token.partition(".")
+    if not secret or not expires.isdigit() or int(expires) < time.time():
+        return False
+    expected = hmac.new(
+        secret.encode(), f"profile:{expires}".encode(), hashlib.sha256
+    ).hexdigest()
+    return hmac.compare_digest(expected, signature)
+
+
+class Sampler:
+    """Samples thread stacks from a background thread.
+
+    Args:
+        interval (float): seconds between samples.
+        include (callable): ``include(thread_id, frame)`` selects the
+            threads to record; all other threads when None.
+    """
+
+    def __init__(
+        self,
+        interval: float = config.PROFILING_INTERVAL,
+        include: Optional[Callable] = None,
+    ):
+        self.interval = interval
+        self.include = include
+        self.samples: dict[int, list[tuple]] = defaultdict(list)
+        self.frames: dict = {}
+        self.started = self.ended = 0.0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _frame_index(self, code) -> int:
+        index = self.frames.get(code)
+        if index is None:
+            index = self.frames[code] = len(self.frames)
+        return index
+
+    def _sample(self, own_id: int):
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own_id:
+                continue
+            if self.include is not None and not self.include(thread_id, frame):
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(self._frame_index(frame.f_code))
+                frame = frame.f_back
+            stack.reverse()
+            self.samples[thread_id].append(tuple(stack))
+
+    def _run(self):
+        own_id = threading.get_ident()
+        while True:
+            self._sample(own_id)
+            if self._stop.wait(self.interval):
+                return
+
+    def start(self):
+        self.started = time.perf_counter()
+        self._thread = threading.Thread(
+            target=self._run, name="profiler", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        self.ended = time.perf_counter()
+
+    def _thread_names(self) -> dict:
+        return {thread.ident: thread.name for thread in threading.enumerate()}
+
+    def speedscope(self, name: str) -> bytes:
+        frames = [
+            {
+                "name": code.co_name,
+                "file": code.co_filename,
+                "line": code.co_firstlineno,
+            }
+            for code in self.frames
+        ]
+        names = self._thread_names()
+        profiles = [
+            {
+                "type": "sampled",
+                "name": names.get(thread_id, f"thread {thread_id}"),
+                "unit": "seconds",
+                "startValue": 0,
+                "endValue": len(stacks) * self.interval,
+                "samples": [list(stack) for stack in stacks],
+                "weights": [self.interval] * len(stacks),
+            }
+            for thread_id, stacks in self.samples.items()
+        ]
+        return orjson.dumps(
+            {
+                "$schema": "https://www.speedscope.app/file-format-schema.json",
+                "name": name,
+                "exporter": "news-aggregator",
+                "shared": {"frames": frames},
+                "profiles": profiles,
+            }
+        )
+
+    def folded(self) -> bytes:
+        labels = [
+            f"{code.co_name} ({os.path.basename(code.co_filename)}:"
+            f"{code.co_firstlineno})"
+            for code in self.frames
+        ]
+        names = self._thread_names()
+        counts = defaultdict(int)
+        for thread_id, stacks in self.samples.items():
+            thread = names.get(thread_id, f"thread {thread_id}")
+            for stack in stacks:
+                counts[(thread, stack)] += 1
+        return "".join(
+            ";".join([thread, *(labels[index] for index in stack)])
+            + f" {count}\n"
+            for (thread, stack), count in counts.items()
+        ).encode()
+
+    def render(self, name: str, format: str = "speedscope") -> bytes:
+        if format == "folded":
+            return self.folded()
+        return self.speedscope(name)
+
+
+class ProfileStore:
+    """Ring of the newest ``max_files`` profiles in ``directory``."""
+
+    def __init__(
+        self,
+        directory: str = config.PROFILING_DIR,
+        max_files: int = config.PROFILING_MAX_FILES,
+    ):
+        self.directory = directory
+        self.max_files = max_files
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+
+    def path(self, name: str, extension: str) -> str:
+        """Path for a new profile; its file name is the profile id."""
+        stamp = datetime.now().strftime("%Y%m%dT%H%M%S")
+        filename = (
+            f"{stamp}-{os.getpid()}-{next(self._counter)}-{name}.{extension}"
+        )
+        return os.path.join(self.directory, filename)
+
+    def write(self, path: str, data: bytes) -> str:
+        os.makedirs(self.directory, exist_ok=True)
+        with open(path, "wb") as file:
+            file.write(data)
+        self._prune()
+        return path
+
+    def _prune(self):
+        with self._lock:
+            paths = sorted(
+                (
+                    os.path.join(self.directory, filename)
+                    for filename in os.listdir(self.directory)
+                ),
+                key=os.path.getmtime,
+            )
+            for path in paths[: max(0, len(paths) - self.max_files)]:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+
+profile_store = ProfileStore()
+
+
+@contextmanager
+def profiled(name: str, enabled: bool = True, format: str = "speedscope"):
+    """Profile every thread for the duration of the block and store it."""
+    if not enabled:
+        yield
+        return
+    sampler = Sampler()
+    sampler.start()
+    try:
+        yield
+    finally:
+        sampler.stop()
+        extension, _ = FORMATS[format]
+        path = profile_store.write(
+            profile_store.path(name, extension), sampler.render(name, format)
+        )
+        logger.info(
+            f"Profiled {name} in {sampler.ended - sampler.started:.2f}s: {path}"
+        )
+
+
+def _runs_endpoint(frame, scope: Scope) -> bool:
+    endpoint = scope.get("endpoint")
+    code = getattr(endpoint, "__code__", None)
+    if code is None:
+        return False
+    while frame is not None:
+        if frame.f_code is code:
+            return True
+        frame = frame.f_back
+    return False
+
+
+class ProfilingMiddleware:
+    """Profiles requests that carry a valid signed profiling token."""
+
+    def __init__(self, app: ASGIApp, secret: str = config.PROFILING_SECRET):
+        self.app = app
+        self.secret = secret
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        query = parse_qs(scope.get("query_string", b"").decode())
+        token = Headers(scope=scope).get("x-profile") or next(
+            iter(query.get("profile", [])), None
+        )
+        if not token or not verify_token(self.secret, token):
+            await self.app(scope, receive, send)
+            return
+
+        format = next(iter(query.get("profileFormat", [])), "speedscope")
+        if format not in FORMATS:
+            format = "speedscope"
+        inline = next(iter(query.get("profileOutput", [])), "") == "inline"
+        loop_thread = threading.get_ident()
+        sampler = Sampler(
+            include=lambda thread_id, frame: thread_id == loop_thread
+            or _runs_endpoint(frame, scope)
+        )
+        extension, media_type = FORMATS[format]
+        name = scope["path"].strip("/").replace("/", "_") or "root"
+        path = None if inline else profile_store.path(name, extension)
+        status = 500
+
+        async def send_wrapper(message: Message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if path is not None:
+                    headers = MutableHeaders(raw=list(message["headers"]))
+                    headers["X-Profile-Id"] = os.path.basename(path)
+                    message = {**message, "headers": headers.raw}
+            if not inline:
+                await send(message)
+
+        sampler.start()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            sampler.stop()
+
+        body = sampler.render(scope["path"], format)
+        if path is not None:
+            profile_store.write(path, body)
+            logger.info(f"Profiled {scope['path']} ({status}): {path}")
+            return
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 200,
+                "headers": [
+                    (b"content-type", media_type.encode()),
+                    (b"content-length", str(len(body)).encode()),
+                    (b"x-profiled-status", str(status).encode()),
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
+
+
+def _profile_startup():
+    from aggregator.main import app, lifespan
+
+    async def run():
+        async with lifespan(app):
+            pass
+
+    asyncio.run(run())
+
+
+def _profile_ingest():
+    from aggregator.core.db import db_conn
+
+    db_conn.add_news()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile the aggregator.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("startup", help="import the app and run its startup")
+    commands.add_parser("ingest", help="run one full add_news ingestion")
+    sign = commands.add_parser("sign", help="print a request profiling token")
+    sign.add_argument("--ttl", type=float, default=3600)
+    for command in ("startup", "ingest"):
+        commands.choices[command].add_argument(
+            "--format", choices=list(FORMATS), default="speedscope"
+        )
+    args = parser.parse_args()
+
+    if args.command == "sign":
+        if not config.PROFILING_SECRET:
+            parser.error("PROFILING_SECRET is not set")
+        print(sign_token(config.PROFILING_SECRET, args.ttl))
+        return
+    target = _profile_startup if args.command == "startup" else _profile_ingest
+    with profiled(args.command, format=args.format):
+        target()
+
+
+if __name__ == "__main__":
+    main()
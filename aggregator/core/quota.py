@@ -0,0 +1,410 @@
+"""Budgets for the metered upstream APIs.
+
+NewsAPI and Mediastack bill every request to the key it was made with.
+Calls go through the provider's ``ProviderBudget``, which picks a key with
+budget left and adds it to the request:
+
+* a key has a daily quota, counted in the ``quota_usage`` collection so
+  every worker spends from the same budget, and a per-minute token bucket
+  kept in the worker. A count Mongo does not take within
+  ``QUOTA_COUNT_TIMEOUT`` seconds is left to the worker's own tally;
+* keys are tried most remaining budget first, round robin among equals. A
+  key the provider answers with 429 is set aside for its ``Retry-After``,
+  or ``QUOTA_EXHAUSTED_BACKOFF`` seconds;
+* calls run at a ``Priority``. Ticker fan-outs and background cache
+  refreshes leave ``QUOTA_BULK_RESERVE`` and ``QUOTA_BACKGROUND_RESERVE``
+  of each budget to interactive requests;
+* when no key can take a call, ``QuotaExceeded`` is raised right away with
+  the seconds until one can. Nothing queues for budget.
+"""
+
+import asyncio
+import contextvars
+import hashlib
+import math
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from enum import IntEnum
+from typing import Optional
+
+import pytz
+
+from aggregator.config import config
+from aggregator.core.db import async_db_conn
+from aggregator.core.exceptions import TooManyRequestsException
+from aggregator.core.http import UpstreamResponse
+from aggregator.core.logger import logger
+
+
+class Priority(IntEnum):
+    INTERACTIVE = 0
+    # Many calls for one request, like the ticker's keyword variants
+    BULK = 1
+    # Nobody is waiting, like stale-while-revalidate cache refreshes
+    BACKGROUND = 2
+
+
+upstream_priority = contextvars.ContextVar(
+    "upstream_priority", default=Priority.INTERACTIVE
+)
+
+
+@contextmanager
+def priority(level: Priority):
+    """Make upstream calls in the block, and tasks created in it, at
+    ``level``."""
+    token = upstream_priority.set(level)
+    try:
+        yield
+    finally:
+        upstream_priority.reset(token)
+
+
+def reserve(level: Priority) -> float:
+    """Share of a budget that calls at ``level`` leave untouched."""
+    if level == Priority.BULK:
+        return config.QUOTA_BULK_RESERVE
+    if level == Priority.BACKGROUND:
+        return config.QUOTA_BACKGROUND_RESERVE
+    return 0.0
+
+
+class QuotaExceeded(TooManyRequestsException):
+    def __init__(self, provider: str, retry_after: float):
+        retry_after = max(1, math.ceil(retry_after))
+        super().__init__(
+            f"The {provider} budget is spent, retry in {retry_after}s"
+        )
+        self.provider = provider
+        self.retry_after = retry_after
+        self.headers = {"Retry-After": str(retry_after)}
+
+
+def _next_day(now: datetime) -> datetime:
+    return (now + timedelta(days=1)).replace(
+        hour=0, minute=0, second=0, microsecond=0
+    )
+
+
+def _retry_after(response: UpstreamResponse) -> Optional[float]:
+    for name, value in response.headers.items():
+        if name.lower() == "retry-after":
+            try:
+                return float(value)
+            except ValueError:
+                return None
+    return None
+
+
+class KeyBudget:
+    """Daily quota and per-minute token bucket of one API key.
+
+    Args:
+        provider (str): provider the key belongs to.
+        key (str): the API key; only a hash of it is stored or reported.
+        daily_quota (int): calls per UTC day, 0 for unlimited.
+        minute_quota (int): bucket size, refilled over a minute; 0 for
+            unlimited.
+    """
+
+    def __init__(
+        self, provider: str, key: str, daily_quota: int, minute_quota: int
+    ):
+        self.key = key
+        self.id = hashlib.sha256(key.encode()).hexdigest()[:12]
+        self.daily_quota = daily_quota
+        self.minute_quota = minute_quota
+        self._usage_prefix = f"{provider}:{self.id}"
+        self._tokens = float(minute_quota)
+        self._refilled = time.monotonic()
+        # Latest daily count seen, by this worker or in the usage collection
+        self.day: Optional[str] = None
+        self.used_today = 0
+        self.exhausted_until: Optional[datetime] = None
+
+    def usage_id(self, day: str) -> str:
+        return f"{self._usage_prefix}:{day}"
+
+    def used(self, day: str) -> int:
+        return self.used_today if self.day == day else 0
+
+    def remaining(self, day: str) -> float:
+        if not self.daily_quota:
+            return math.inf
+        return max(0, self.daily_quota - self.used(day))
+
+    def is_exhausted(self, now: datetime) -> bool:
+        return self.exhausted_until is not None and now < self.exhausted_until
+
+    def minute_tokens(self) -> float:
+        if self.minute_quota:
+            now = time.monotonic()
+            self._tokens = min(
+                self.minute_quota,
+                self._tokens + (now - self._refilled) * self.minute_quota / 60,
+            )
+            self._refilled = now
+        return self._tokens
+
+    def minute_wait(self, share: float) -> float:
+        """Seconds until a call leaving ``share`` of the bucket may be
+        made, 0 when it may now."""
+        if not self.minute_quota:
+            return 0.0
+        needed = min(self.minute_quota, share * self.minute_quota + 1)
+        return max(
+            0.0, (needed - self.minute_tokens()) * 60 / self.minute_quota
+        )
+
+    def retry_after(self, now: datetime) -> float:
+        if self.is_exhausted(now):
+            return (self.exhausted_until - now).total_seconds()
+        return (_next_day(now) - now).total_seconds()
+
+    async def take(self, now: datetime, share: float) -> bool:
+        """Spend one call, unless it would dig into ``share`` of today's
+        budget or the key is set aside."""
+        day = now.strftime("%Y-%m-%d")
+        if self.day != day:
+            self.day, self.used_today = day, 0
+        allowance = (
+            self.daily_quota * (1 - share) if self.daily_quota else math.inf
+        )
+        if self.used_today + 1 > allowance:
+            return False
+
+        # Taken before awaiting the count, so concurrent calls see it
+        if self.minute_quota:
+            self._tokens -= 1
+        if not self.daily_quota:
+            # Unmetered; there is no shared count to keep
+            self.used_today += 1
+            return True
+        usage = await self._count(now, 1)
+        if usage is None:
+            self.used_today += 1
+        else:
+            self.used_today = usage.get("used", 0)
+            until = usage.get("exhaustedUntil")
+            if until is not None:
+                self.exhausted_until = until.replace(tzinfo=pytz.UTC)
+        if self.used_today > allowance or self.is_exhausted(now):
+            # Give the call back; another worker got there first
+            await self._count(now, -1)
+            self.used_today -= 1
+            if self.minute_quota:
+                self._tokens += 1
+            return False
+        return True
+
+    async def exhaust(self, now: datetime, seconds: float):
+        """Set the key aside for ``seconds``, in every worker."""
+        until = now + timedelta(seconds=seconds)
+        if self.exhausted_until is None or until > self.exhausted_until:
+            self.exhausted_until = until
+        try:
+            await asyncio.wait_for(
+                async_db_conn.mark_quota_exhausted(
+                    self.usage_id(now.strftime("%Y-%m-%d")),
+                    until,
+                    _next_day(now) + timedelta(days=1),
+                ),
+                config.QUOTA_COUNT_TIMEOUT,
+            )
+        except Exception as e:
+            logger.error(f"Error recording exhausted key {self.id}: {e!r}")
+
+    async def _count(self, now: datetime, amount: int) -> Optional[dict]:
+        """Add ``amount`` calls to today's shared count; None when it is
+        unavailable and the call is only counted here."""
+        try:
+            return await asyncio.wait_for(
+                async_db_conn.add_quota_usage(
+                    self.usage_id(self.day),
+                    amount,
+                    _next_day(now) + timedelta(days=1),
+                ),
+                config.QUOTA_COUNT_TIMEOUT,
+            )
+        except Exception as e:
+            logger.error(f"Error counting upstream usage of {self.id}: {e!r}")
+            return None
+
+    def status(self, now: datetime, day: str) -> dict:
+        return {
+            "id": self.id,
+            "dailyQuota": self.daily_quota or None,
+            "usedToday": self.used(day),
+            "remainingToday": (
+                self.remaining(day) if self.daily_quota else None
+            ),
+            "minuteQuota": self.minute_quota or None,
+            "minuteTokens": (
+                max(0, math.floor(self.minute_tokens()))
+                if self.minute_quota
+                else None
+            ),
+            "exhaustedUntil": (
+                self.exhausted_until.isoformat()
+                if self.is_exhausted(now)
+                else None
+            ),
+        }
+
+
+class ProviderBudget:
+    """API keys of one upstream provider and their budgets.
+
+    Args:
+        name (str): provider name, as in the upstream metrics.
+        key_param (str): query parameter the key is sent in.
+        keys (list[str]): API keys to rotate.
+        daily_quota (int): calls per key per UTC day, 0 for unlimited.
+        minute_quota (int): calls per key per minute, 0 for unlimited.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        key_param: str,
+        keys: list[str],
+        daily_quota: int,
+        minute_quota: int,
+    ):
+        self.name = name
+        self.key_param = key_param
+        self.keys = [
+            KeyBudget(name, key, daily_quota, minute_quota)
+            for key in dict.fromkeys(keys)
+            if key
+        ]
+        self._next = 0
+        self.rejected = 0
+
+    async def acquire(
+        self, level: Optional[Priority] = None
+    ) -> Optional[KeyBudget]:
+        """A key with budget for one call at ``level``, the caller's
+        ``upstream_priority`` by default.
+
+        Returns None when no key is configured; the call then goes out
+        without one, as it always has.
+        """
+        if not self.keys:
+            return None
+        share = reserve(upstream_priority.get() if level is None else level)
+        now = datetime.now(tz=pytz.UTC)
+        day = now.strftime("%Y-%m-%d")
+        count = len(self.keys)
+        order = sorted(
+            range(count),
+            key=lambda index: (
+                -self.keys[index].remaining(day),
+                (index - self._next) % count,
+            ),
+        )
+
+        waits = []
+        for index in order:
+            key = self.keys[index]
+            if key.is_exhausted(now):
+                waits.append(key.retry_after(now))
+                continue
+            wait = key.minute_wait(share)
+            if wait:
+                waits.append(wait)
+                continue
+            if await key.take(now, share):
+                self._next = (index + 1) % count
+                return key
+            waits.append(key.retry_after(now))
+
+        self.rejected += 1
+        raise QuotaExceeded(self.name, min(waits))
+
+    def key_params(self, key: Optional[KeyBudget], params: dict) -> dict:
+        """``params`` of a call made with ``key``."""
+        if key is None:
+            return params
+        return {**(params or {}), self.key_param: key.key}
+
+    async def rate_limited(self, key: KeyBudget, response: UpstreamResponse):
+        """Set aside a key answered with 429."""
+        backoff = max(
+            1, _retry_after(response) or config.QUOTA_EXHAUSTED_BACKOFF
+        )
+        logger.info(
+            f"{self.name} key {key.id} is rate limited for {backoff:.0f}s"
+        )
+        await key.exhaust(datetime.now(tz=pytz.UTC), backoff)
+
+    def spent(self) -> QuotaExceeded:
+        """Error once every key was answered with 429."""
+        now = datetime.now(tz=pytz.UTC)
+        self.rejected += 1
+        return QuotaExceeded(
+            self.name, min(key.retry_after(now) for key in self.keys)
+        )
+
+    async def status(self) -> dict:
+        """Remaining budget of every key, as counted by all workers."""
+        now = datetime.now(tz=pytz.UTC)
+        day = now.strftime("%Y-%m-%d")
+        try:
+            usage = await async_db_conn.get_quota_usage(
+                [key.usage_id(day) for key in self.keys]
+            )
+        except Exception as e:
+            logger.error(f"Error reading {self.name} usage: {e}")
+            usage = {}
+        for key in self.keys:
+            document = usage.get(key.usage_id(day))
+            if document is not None:
+                key.day, key.used_today = day, document.get("used", 0)
+                until = document.get("exhaustedUntil")
+                if until is not None:
+                    key.exhausted_until = until.replace(tzinfo=pytz.UTC)
+
+        keys = [key.status(now, day) for key in self.keys]
+        limited = all(key.daily_quota for key in self.keys)
+        return {
+            "provider": self.name,
+            "keys": keys,
+            "remainingToday": (
+                sum(key["remainingToday"] for key in keys)
+                if self.keys and limited
+                else None
+            ),
+            "resetsAt": _next_day(now).isoformat(),
+            "reserves": {
+                "bulk": config.QUOTA_BULK_RESERVE,
+                "background": config.QUOTA_BACKGROUND_RESERVE,
+            },
+            "rejected": self.rejected,
+        }
+
+
+def _keys(keys: str, fallback: Optional[str]) -> list[str]:
+    keys = [key.strip() for key in (keys or "").split(",") if key.strip()]
+    return keys or ([fallback] if fallback else [])
+
+
+newsapi_budget = ProviderBudget(
+    "newsapi",
+    "apiKey",
+    _keys(config.NEWS_API_KEYS, config.NEWS_API_KEY),
+    config.NEWS_API_DAILY_QUOTA,
+    config.NEWS_API_MINUTE_QUOTA,
+)
+mediastack_budget = ProviderBudget(
+    "mediastack",
+    "access_key",
+    _keys(config.MEDIASTACK_API_KEYS, config.MEDIASTACK_API_KEY),
+    config.MEDIASTACK_DAILY_QUOTA,
+    config.MEDIASTACK_MINUTE_QUOTA,
+)
+# By provider adapter name; providers without one are not metered
+provider_budgets = {
+    budget.name: budget for budget in (newsapi_budget, mediastack_budget)
+}
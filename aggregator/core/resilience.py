@@ -0,0 +1,433 @@
+"""Deadlines, retries, hedging and circuit breaking for upstream calls.
+
+Every upstream call runs through the ``ResilientUpstream`` of its provider:
+
+* a request gets ``UPSTREAM_DEADLINE`` seconds for all of its upstream
+  calls from ``DeadlineMiddleware``. The deadline lives in a contextvar, so
+  it reaches calls made deep in the route, and in tasks the route starts,
+  without being passed around. Calls are cut off when it expires;
+* transport errors, timeouts and 5xx answers are retried with exponential
+  backoff and full jitter, as long as the backoff fits in the deadline.
+  Other statuses, 4xx included, are returned as they are;
+* an interactive call still running after ``UPSTREAM_HEDGE_DELAY`` seconds
+  is sent a second time, with the same key, and the first answer wins. Off
+  by default, since the provider bills every hedge like any other call;
+* after ``CIRCUIT_FAILURE_THRESHOLD`` failures in a row a provider's
+  circuit opens and calls fail fast with ``CircuitOpen`` for
+  ``CIRCUIT_RESET_TIMEOUT`` seconds, after which a single probe call
+  decides whether it closes again.
+
+Ingestion fetches rss.app from worker threads, so the breaker is thread
+safe and ``call_sync`` runs the same policy without the event loop.
+"""
+
+import asyncio
+import contextvars
+import math
+import random
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from functools import partial
+from typing import Awaitable, Callable, Optional
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from aggregator.config import config
+from aggregator.core.exceptions import (
+    CustomException,
+    GatewayTimeout,
+    ServiceUnavailableException,
+    TooManyRequestsException,
+)
+from aggregator.core.logger import logger
+
+# Answers worth another try; 429 is left to the key budgets
+RETRY_STATUSES = frozenset({500, 502, 503, 504})
+
+# time.monotonic() by which the current request's upstream calls must end
+upstream_deadline = contextvars.ContextVar("upstream_deadline", default=None)
+
+
+@contextmanager
+def deadline(seconds: Optional[float], inherit: bool = True):
+    """Give upstream calls in the block at most ``seconds``.
+
+    A deadline already set is only ever shortened, unless ``inherit`` is
+    off, as for background work that outlives the request that started it.
+    ``seconds`` of None or 0 sets no new limit.
+    """
+    current = upstream_deadline.get() if inherit else None
+    if seconds:
+        limit = time.monotonic() + seconds
+        current = limit if current is None else min(current, limit)
+    token = upstream_deadline.set(current)
+    try:
+        yield
+    finally:
+        upstream_deadline.reset(token)
+
+
+def time_left() -> Optional[float]:
+    """Seconds until the deadline, None when there is none."""
+    limit = upstream_deadline.get()
+    if limit is None:
+        return None
+    return limit - time.monotonic()
+
+
+class DeadlineMiddleware:
+    """Sets the ``UPSTREAM_DEADLINE`` of every HTTP request."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        with deadline(config.UPSTREAM_DEADLINE, inherit=False):
+            await self.app(scope, receive, send)
+
+
+@dataclass
+class RetryPolicy:
+    """Exponential backoff with full jitter.
+
+    Args:
+        attempts (int): calls made at most, the first one included.
+        base_delay (float): backoff before the first retry, doubled for
+            each one after.
+        max_delay (float): backoff cap.
+    """
+
+    attempts: int = 3
+    base_delay: float = 0.2
+    max_delay: float = 2.0
+
+    def backoff(self, retry: int) -> float:
+        """Seconds to wait before retry number ``retry``, from 1."""
+        return random.uniform(
+            0, min(self.max_delay, self.base_delay * 2 ** (retry - 1))
+        )
+
+
+class CircuitOpen(ServiceUnavailableException):
+    def __init__(self, provider: str, retry_after: float):
+        retry_after = max(1, math.ceil(retry_after))
+        super().__init__(f"{provider} is unavailable, retry in {retry_after}s")
+        self.provider = provider
+        self.retry_after = retry_after
+        self.headers = {"Retry-After": str(retry_after)}
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker of one provider.
+
+    Closed, calls go through. ``failure_threshold`` failures in a row open
+    it: calls are refused for ``reset_timeout`` seconds. Then it is half
+    open and lets one probe through, which closes it on success and opens
+    it again on failure.
+    """
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, name: str, failure_threshold: int, reset_timeout: float):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened = 0
+        self.rejected = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def check(self):
+        """Raise ``CircuitOpen`` while calls are refused, without taking
+        the probe of a half open circuit."""
+        with self._lock:
+            if self.state != self.OPEN:
+                return
+            waited = time.monotonic() - self._opened_at
+            if waited < self.reset_timeout:
+                self.rejected += 1
+                raise CircuitOpen(self.name, self.reset_timeout - waited)
+
+    def before_call(self):
+        """Raise ``CircuitOpen`` unless a call may be made now."""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return
+            if self.state == self.OPEN:
+                waited = time.monotonic() - self._opened_at
+                if waited < self.reset_timeout:
+                    self.rejected += 1
+                    raise CircuitOpen(self.name, self.reset_timeout - waited)
+                self.state = self.HALF_OPEN
+            if self._probing:
+                self.rejected += 1
+                raise CircuitOpen(self.name, 1)
+            self._probing = True
+
+    def record_success(self):
+        with self._lock:
+            if self.state != self.CLOSED:
+                logger.info(f"{self.name} circuit closed")
+            self.state = self.CLOSED
+            self.failures = 0
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._probing = False
+            if self.state == self.HALF_OPEN or (
+                self.state == self.CLOSED
+                and self.failures >= self.failure_threshold
+            ):
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+                self.opened += 1
+                logger.error(
+                    f"{self.name} circuit opened after {self.failures} "
+                    "failures in a row"
+                )
+
+    def release(self):
+        """Neither outcome; only lets the next probe through."""
+        with self._lock:
+            self._probing = False
+
+    def stats(self) -> dict:
+        return {
+            "state": self.state,
+            "consecutiveFailures": self.failures,
+            "opened": self.opened,
+            "rejected": self.rejected,
+        }
+
+
+class ResilientUpstream:
+    """Retry policy, hedging and circuit breaker of one provider.
+
+    ``send`` makes one call and returns its response, which must have a
+    ``status_code``. A ``TooManyRequestsException``, i.e. a spent key
+    budget, is neither retried nor held against the provider.
+
+    With ``prepare``, each attempt first awaits it, e.g. for an API key,
+    and calls ``send`` with the result. It runs outside the attempt's
+    timeout and the breaker's accounting, as its time and errors are not
+    the provider's.
+
+    Args:
+        name (str): provider name, as in the upstream metrics.
+        retry (RetryPolicy): backoff between attempts.
+        breaker (CircuitBreaker): the provider's circuit.
+        hedge_delay (float): seconds before a hedged call is sent a second
+            time, 0 to never hedge.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        retry: RetryPolicy,
+        breaker: CircuitBreaker,
+        hedge_delay: float = 0.0,
+    ):
+        self.name = name
+        self.retry = retry
+        self.breaker = breaker
+        self.hedge_delay = hedge_delay
+        self.retries = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.deadline_exceeded = 0
+
+    async def call(
+        self,
+        send: Callable[..., Awaitable],
+        hedge: bool = False,
+        attempts: Optional[int] = None,
+        prepare: Optional[Callable[[], Awaitable]] = None,
+    ):
+        """Make the call under the current deadline.
+
+        Returns the first response that is not retryable, else the last
+        one. Raises ``CircuitOpen`` when the provider is failing fast and
+        ``GatewayTimeout`` or the transport error when no attempt got an
+        answer.
+        """
+        response, error = None, None
+        for attempt in range(max(1, attempts or self.retry.attempts)):
+            if attempt:
+                delay, left = self.retry.backoff(attempt), time_left()
+                if left is not None and delay >= left:
+                    break
+                self.retries += 1
+                await asyncio.sleep(delay)
+            left = time_left()
+            if left is not None and left <= 0:
+                break
+            attempt_send = send
+            if prepare is not None:
+                # An open circuit costs no key budget
+                self.breaker.check()
+                attempt_send = partial(send, await prepare())
+                left = time_left()
+                if left is not None and left <= 0:
+                    break
+            self.breaker.before_call()
+            try:
+                call = (
+                    self._hedged(attempt_send)
+                    if hedge and self.hedge_delay
+                    else attempt_send()
+                )
+                response = await asyncio.wait_for(call, left)
+            except TooManyRequestsException:
+                self.breaker.release()
+                raise
+            except asyncio.TimeoutError:
+                self.breaker.record_failure()
+                self.deadline_exceeded += 1
+                response = None
+                error = GatewayTimeout(f"{self.name} deadline exceeded")
+                continue
+            except CustomException as e:
+                self.breaker.record_failure()
+                response, error = None, e
+                continue
+            except BaseException:
+                self.breaker.release()
+                raise
+            if response.status_code in RETRY_STATUSES:
+                self.breaker.record_failure()
+                continue
+            self.breaker.record_success()
+            return response
+
+        if response is not None:
+            return response
+        if error is None:
+            self.deadline_exceeded += 1
+            error = GatewayTimeout(f"{self.name} deadline exceeded")
+        raise error
+
+    async def _hedged(self, send: Callable[[], Awaitable]):
+        """First successful answer of ``send``, called a second time when
+        the first call is still running after ``hedge_delay``."""
+        tasks = [asyncio.ensure_future(send())]
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=self.hedge_delay)
+            if not done:
+                self.hedges += 1
+                tasks.append(asyncio.ensure_future(send()))
+            pending, failed = set(tasks), None
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    if task.exception() is None:
+                        self.hedge_wins += task is not tasks[0]
+                        return task.result()
+                    failed = failed or task.exception()
+            raise failed
+        finally:
+            # The loser, or both when the deadline cancels the hedge
+            for task in tasks:
+                task.cancel()
+
+    def call_sync(
+        self,
+        send: Callable[[float], object],
+        seconds: float,
+        errors: tuple = (),
+    ):
+        """``call`` for blocking code, which cannot use the contextvar
+        deadline: all attempts must end within ``seconds``.
+
+        ``send`` gets the seconds left as its timeout; ``errors`` are the
+        transport errors it raises, retried like a 5xx.
+        """
+        limit = time.monotonic() + seconds
+        response, error = None, None
+        for attempt in range(max(1, self.retry.attempts)):
+            left = limit - time.monotonic()
+            if attempt:
+                delay = self.retry.backoff(attempt)
+                if delay >= left:
+                    break
+                self.retries += 1
+                time.sleep(delay)
+                left -= delay
+            if left <= 0:
+                break
+            self.breaker.before_call()
+            try:
+                response = send(left)
+            except errors as e:
+                self.breaker.record_failure()
+                response, error = None, e
+                continue
+            except BaseException:
+                self.breaker.release()
+                raise
+            if response.status_code in RETRY_STATUSES:
+                self.breaker.record_failure()
+                continue
+            self.breaker.record_success()
+            return response
+
+        if response is not None:
+            return response
+        if error is None:
+            self.deadline_exceeded += 1
+            error = GatewayTimeout(f"{self.name} deadline exceeded")
+        raise error
+
+    def stats(self) -> dict:
+        return {
+            "provider": self.name,
+            "circuit": self.breaker.stats(),
+            "retries": self.retries,
+            "hedges": self.hedges,
+            "hedgeWins": self.hedge_wins,
+            "deadlineExceeded": self.deadline_exceeded,
+        }
+
+
+_upstreams: dict[str, ResilientUpstream] = {}
+_upstreams_lock = threading.Lock()
+
+
+def resilient_upstream(name: str) -> ResilientUpstream:
+    """The ``ResilientUpstream`` of provider ``name``, built from the
+    ``UPSTREAM_*`` and ``CIRCUIT_*`` settings on first use."""
+    upstream = _upstreams.get(name)
+    if upstream is None:
+        with _upstreams_lock:
+            upstream = _upstreams.get(name)
+            if upstream is None:
+                upstream = _upstreams[name] = ResilientUpstream(
+                    name,
+                    RetryPolicy(
+                        attempts=config.UPSTREAM_RETRY_ATTEMPTS,
+                        base_delay=config.UPSTREAM_RETRY_BASE_DELAY,
+                        max_delay=config.UPSTREAM_RETRY_MAX_DELAY,
+                    ),
+                    CircuitBreaker(
+                        name,
+                        failure_threshold=config.CIRCUIT_FAILURE_THRESHOLD,
+                        reset_timeout=config.CIRCUIT_RESET_TIMEOUT,
+                    ),
+                    hedge_delay=config.UPSTREAM_HEDGE_DELAY,
+                )
+    return upstream
+
+
+def upstream_stats() -> list[dict]:
+    return [upstream.stats() for upstream in list(_upstreams.values())]
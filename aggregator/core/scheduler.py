@@ -0,0 +1,100 @@
+import asyncio
+import os
+import random
+import socket
+import uuid
+from datetime import timedelta
+from typing import Optional
+
+from fastapi.concurrency import run_in_threadpool
+
+from aggregator.config import config
+from aggregator.core.db import db_conn
+from aggregator.core.logger import logger
+
+
+class IngestScheduler:
+    """Runs ``db_conn.add_news()``, then the retention pass, every
+    ``interval`` seconds.
+
+    Every uvicorn worker and pod starts its own scheduler. Ingestion only
+    happens in the one that holds the lease document in ``metadata``, so N
+    workers do not fetch every feed N times. A worker that gets the lease
+    also skips the run when another worker stored fresh news less than half
+    an interval ago. Runs are spread by up to ``jitter`` random seconds so
+    workers started together do not all race for the lease at once.
+
+    Args:
+        interval (float): seconds between runs.
+        jitter (float): upper bound of the random delay added to each wait.
+        lease_ttl (float): seconds the lease is held; must be longer than
+            one ingestion run, after which a crashed holder is replaced.
+    """
+
+    def __init__(
+        self,
+        interval: float = config.INGEST_INTERVAL,
+        jitter: float = config.INGEST_JITTER,
+        lease_ttl: float = config.INGEST_LEASE_TTL,
+    ):
+        self.interval = interval
+        self.jitter = jitter
+        self.lease_ttl = lease_ttl
+        self.owner = (
+            f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        )
+        self._task: Optional[asyncio.Task] = None
+
+    def run_once(self, force: bool = False) -> Optional[dict]:
+        """Ingest if this process gets the lease and the news is stale.
+
+        Returns the per-category counts, or None when the run was skipped.
+        """
+        if not db_conn.acquire_ingest_lease(self.owner, self.lease_ttl):
+            logger.info("Ingestion lease is held by another worker")
+            return None
+        try:
+            max_age = timedelta(seconds=self.interval / 2)
+            if not force and not db_conn._is_news_updated(max_age):
+                logger.info("News is already updated")
+                return None
+            results = db_conn.add_news()
+            db_conn.apply_retention()
+            return results
+        finally:
+            db_conn.release_ingest_lease(self.owner)
+
+    def _next_delay(self) -> float:
+        return self.interval + random.uniform(0, self.jitter)
+
+    async def _loop(self):
+        # First run soon after startup, still jittered across workers
+        delay = random.uniform(0, self.jitter)
+        while True:
+            await asyncio.sleep(delay)
+            delay = self._next_delay()
+            try:
+                await run_in_threadpool(self.run_once)
+            except Exception as e:
+                logger.error(f"Scheduled ingestion failed: {e}")
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop())
+            logger.info(
+                f"Ingestion scheduler started every {self.interval}s "
+                f"as {self.owner}"
+            )
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+
+ingest_scheduler = IngestScheduler()
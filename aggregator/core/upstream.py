@@ -0,0 +1,100 @@
+"""Calls to the upstream news providers, through their adapters.
+
+A call goes, outermost first, through the provider's response cache, its
+``ResilientUpstream`` (deadline, retries, hedging, circuit breaker) and the
+shared HTTP client. Each attempt takes a key from the provider's budget
+before it is sent; only the HTTP call is timed and held against the
+provider, not the usage count kept in Mongo. The answer is decoded once
+and normalized by the adapter, and that is what the cache keeps.
+"""
+
+from typing import Optional
+
+from aggregator.core.cache import upstream_cache, upstream_cache_key
+from aggregator.core.http import UpstreamResponse, http_client
+from aggregator.core.quota import Priority, provider_budgets, upstream_priority
+from aggregator.core.resilience import resilient_upstream
+from aggregator.providers import ArticleQuery, Provider, ProviderPage
+
+
+async def upstream_get(
+    provider: Provider,
+    url: str,
+    params: dict = None,
+    level: Optional[Priority] = None,
+    attempts: Optional[int] = None,
+) -> UpstreamResponse:
+    """GET ``url`` of ``provider`` at ``level``, the caller's
+    ``upstream_priority`` by default. Only interactive calls are hedged."""
+    level = upstream_priority.get() if level is None else level
+    budget = provider_budgets.get(provider.name)
+
+    resilient = resilient_upstream(provider.name)
+    hedge = level == Priority.INTERACTIVE
+    if budget is None:
+        return await resilient.call(
+            lambda: http_client.get(url, params=params),
+            hedge=hedge,
+            attempts=attempts,
+        )
+
+    # The key is taken, and its use counted, before the attempt is timed
+    used = None
+
+    async def prepare():
+        return await budget.acquire(level)
+
+    def send(key):
+        nonlocal used
+        used = key
+        return http_client.get(url, params=budget.key_params(key, params))
+
+    # A key answered with 429 is set aside and the call is made again with
+    # the next one; QuotaExceeded once none is left
+    for _ in range(max(len(budget.keys), 1)):
+        response = await resilient.call(
+            send, hedge=hedge, attempts=attempts, prepare=prepare
+        )
+        if used is None or response.status_code != 429:
+            return response
+        await budget.rate_limited(used, response)
+    raise budget.spent()
+
+
+async def fetch_articles(
+    provider: Provider,
+    endpoint: str,
+    query: ArticleQuery,
+    level: Optional[Priority] = None,
+    attempts: Optional[int] = None,
+    cached: bool = True,
+) -> ProviderPage:
+    """Articles of ``provider`` matching ``query``.
+
+    Raises ``QuotaExceeded`` when the budget is spent and ``CircuitOpen``
+    while the provider is failing fast.
+    """
+
+    async def fetch() -> ProviderPage:
+        response = await upstream_get(
+            provider,
+            provider.url(endpoint),
+            provider.params(query),
+            level,
+            attempts,
+        )
+        return provider.page(response.status_code, response.content)
+
+    if not cached:
+        return await fetch()
+    key = upstream_cache_key(
+        provider.name,
+        endpoint,
+        keywords=query.keywords,
+        start_date=query.start.isoformat() if query.start else None,
+        end_date=query.end.isoformat() if query.end else None,
+        language=query.language,
+        sources=query.sources,
+        categories=query.categories,
+    )
+    return await upstream_cache(provider.name).get_or_fetch(key, fetch)
@@ -5,22 +5,33 @@ Refer to generic user schema in callisto which has separate schemas for user cre
 
 from datetime import datetime
 
-from aggregator.core.db import db_conn
+from pymongo.errors import DuplicateKeyError
+
+from aggregator.core import DuplicateValueException
+from aggregator.core.db import async_db_conn
 from aggregator.schemas import User, UserCreate, UserInDB
-from aggregator.utils.auth import get_password_hash
+from aggregator.utils.auth import invalidate_user
 
 
 class CRUDUser:
-    def create(self, user: UserCreate) -> UserInDB:
+    async def create(self, user: UserCreate, hashed_password: str) -> UserInDB:
         user_data = user.dict()
-        user_data["hashedPassword"] = get_password_hash(user.password)
+        user_data["hashedPassword"] = hashed_password
         user_data["createdAt"] = datetime.now()
         user_data["updatedAt"] = datetime.now()
         user_data["isVerified"] = False
         user_data["disabled"] = False
 
         user = User(**user_data)
-        db_conn.insert_user(UserInDB(**user_data))
+        try:
+            await async_db_conn.insert_user(UserInDB(**user_data))
+        except DuplicateKeyError:
+            # Lost a race with a concurrent sign-up for the same email
+            raise DuplicateValueException(
+                message=f"User with email {user.email} already exists"
+            )
+        finally:
+            invalidate_user(user.email)
         return user
 
     def read(self):
@@ -32,14 +43,17 @@ class CRUDUser:
     def delete(self):
         pass
 
-    def get_by_email(self, email: str) -> User:
-        user_data = db_conn.get_user_by_email(email)
+    async def get_by_email(self, email: str) -> User:
+        user_data = await async_db_conn.get_user_by_email(email)
         if not user_data:
             return None
         return User(**user_data)
 
-    def add_feed_sources(self, email: str, sources: list[str]):
-        return db_conn.add_feed_sources(email, sources)
+    async def add_feed_sources(self, email: str, sources: list[str]):
+        try:
+            return await async_db_conn.add_feed_sources(email, sources)
+        finally:
+            invalidate_user(email)
 
 
 user_crud = CRUDUser()
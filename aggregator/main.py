@@ -1,9 +1,26 @@
+import asyncio
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, ORJSONResponse
 
+from aggregator.config import config
 from aggregator.controllers.routes import v1_router as router
 from aggregator.core import CustomException
+from aggregator.core.broadcast import live_broadcaster
+from aggregator.core.compression import CompressionMiddleware
+from aggregator.core.conditional import ingest_generation
+from aggregator.core.db import async_db_conn, db_conn
+from aggregator.core.http import http_client
+from aggregator.core.metrics import MetricsMiddleware, register_routes
+from aggregator.core.profiling import ProfilingMiddleware, profiled
+from aggregator.core.resilience import DeadlineMiddleware
+from aggregator.core.scheduler import ingest_scheduler
+from aggregator.utils.nse import nse_index
+from aggregator.utils.passwords import password_hasher
+from aggregator.utils.search import search_index
 
 APP_URL_PREFIX: str = "/weather"
 
@@ -25,6 +42,7 @@ def init_listeners(app: FastAPI) -> None:
         return JSONResponse(
             status_code=exc.code,
             content={"errorCode": exc.error_code, "msg": exc.message},
+            headers=getattr(exc, "headers", None),
         )
 
 
@@ -42,7 +60,44 @@ def on_auth_error(request: Request, exc: Exception):
 
 
 def init_middleware(app: FastAPI) -> None:
-    return
+    # Innermost; only the route's own time counts against the deadline
+    app.add_middleware(DeadlineMiddleware)
+    # Not installed at all unless enabled, so it costs nothing when off
+    if config.PROFILING_ENABLED and config.PROFILING_SECRET:
+        app.add_middleware(ProfilingMiddleware)
+    app.add_middleware(CompressionMiddleware)
+    # Outermost, so compression is part of the recorded latency
+    app.add_middleware(MetricsMiddleware)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    with profiled("startup", enabled=config.PROFILE_STARTUP):
+        await http_client.start()
+        # Spawning the hashing workers takes seconds; serve meanwhile
+        hasher_warmup = asyncio.create_task(password_hasher.start())
+        await run_in_threadpool(nse_index.load)
+        nse_index.start()
+        await run_in_threadpool(db_conn.connect)
+        async_db_conn.connect()
+        await run_in_threadpool(db_conn.ensure_indexes)
+        if config.INGEST_SCHEDULER_ENABLED:
+            ingest_scheduler.start()
+        if config.SEARCH_ENABLED:
+            search_index.start()
+        live_broadcaster.start()
+        ingest_generation.start()
+    yield
+    await ingest_generation.stop()
+    await nse_index.stop()
+    await live_broadcaster.stop()
+    await search_index.stop()
+    await ingest_scheduler.stop()
+    await http_client.close()
+    hasher_warmup.cancel()
+    password_hasher.close()
+    async_db_conn.close()
+    db_conn.close()
 
 
 def create_app() -> FastAPI:
@@ -54,11 +109,14 @@ def create_app() -> FastAPI:
         redoc_url="/aggregator/swagger-redoc",
         openapi_url="/aggregator/swagger.json",
         # dependencies=[Depends(get_db)],
+        lifespan=lifespan,
+        default_response_class=ORJSONResponse,
     )
     init_cors(app=app)
     init_listeners(app=app)
     init_middleware(app=app)
     app.include_router(router)
+    register_routes(app)
 
     return app
 
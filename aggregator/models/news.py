@@ -2,6 +2,8 @@ from typing import Optional, Union
 
 from pydantic import BaseModel, HttpUrl
 
+from aggregator.schemas import Attachment
+
 
 class NewsSource(BaseModel):
     id: Optional[str]
@@ -9,6 +11,8 @@ class NewsSource(BaseModel):
 
 
 class Article(BaseModel):
+    # Stored articles only; pass it to /news/articles/{id} for the body
+    id: Optional[str] = None
     source: Union[NewsSource, str]
     author: Optional[str]
     title: str
@@ -22,6 +26,11 @@ class Article(BaseModel):
     country: Optional[str]
 
 
+class ArticleDetail(Article):
+    contentHtml: Optional[str] = None
+    attachments: list[Attachment] = []
+
+
 class Source(BaseModel):
     id: Optional[str]
     name: str
@@ -1,16 +1,250 @@
-from typing import Generic, List, TypeVar
+import base64
+import json
+from datetime import datetime
+from functools import lru_cache
+from itertools import islice
+from typing import (
+    AsyncIterable,
+    Callable,
+    Generic,
+    Iterable,
+    List,
+    Optional,
+    TypeVar,
+    Union,
+)
 
-from pydantic.generics import GenericModel
+import orjson
+from bson import ObjectId
+from bson.errors import InvalidId
+from fastapi import Request
+from fastapi.responses import ORJSONResponse, Response, StreamingResponse
+from pydantic import BaseModel, TypeAdapter
+
+from aggregator.constants import NEWS_CATEGORIES
+from aggregator.core import BadRequestException
 
 OutSchema = TypeVar("OutSchema")
 
+MAX_PER_PAGE = 100
+# Streamed pages are written as they are read, so they can be much larger
+MAX_STREAMED_PER_PAGE = 5000
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
 
-class Paginate(GenericModel, Generic[OutSchema]):
+class Paginate(BaseModel, Generic[OutSchema]):
     page: int = 1
     perPage: int = 10
     total: int = 0
     results: List[OutSchema]
+    nextCursor: Optional[str] = None
 
     @property
     def pages(self) -> int:
         return self.total // self.perPage + (self.total % self.perPage > 0)
+
+
+@lru_cache(maxsize=None)
+def page_adapter(schema: type) -> TypeAdapter:
+    return TypeAdapter(Paginate[schema])
+
+
+def validated_page(schema: type, **content) -> Response:
+    """Validate a page of untrusted (upstream) results once and serialize it
+    straight to JSON, skipping FastAPI's second validation pass."""
+    adapter = page_adapter(schema)
+    page = adapter.validate_python(content)
+    return Response(adapter.dump_json(page), media_type="application/json")
+
+
+def trusted_page(
+    results: list,
+    page: int = 1,
+    perPage: int = 10,
+    total: Optional[int] = None,
+    nextCursor: Optional[str] = None,
+) -> ORJSONResponse:
+    """Serialize results that were validated at ingest time, without
+    re-validating them."""
+    return ORJSONResponse(
+        {
+            "page": page,
+            "perPage": perPage,
+            "total": len(results) if total is None else total,
+            "results": results,
+            "nextCursor": nextCursor,
+        }
+    )
+
+
+def encode_cursor(document: dict) -> str:
+    """Opaque continuation token for the ``(datePublished, _id)`` keyset."""
+    published = document.get("datePublished")
+    payload = [
+        published.isoformat() if published else None,
+        str(document["_id"]),
+    ]
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[Optional[datetime], ObjectId]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        published, object_id = json.loads(raw)
+        return (
+            datetime.fromisoformat(published) if published else None,
+            ObjectId(object_id),
+        )
+    except (ValueError, TypeError, InvalidId):
+        raise BadRequestException("Invalid pagination cursor")
+
+
+def keyset_filter(cursor: Optional[str]) -> dict:
+    """Mongo filter for documents after ``cursor`` in
+    ``datePublished desc, _id desc`` order.
+
+    Documents without ``datePublished`` sort last, after every dated one.
+    """
+    if not cursor:
+        return {}
+
+    published, object_id = decode_cursor(cursor)
+    if published is None:
+        return {"datePublished": None, "_id": {"$lt": object_id}}
+    return {
+        "$or": [
+            {"datePublished": {"$lt": published}},
+            {"datePublished": published, "_id": {"$lt": object_id}},
+            {"datePublished": None},
+        ]
+    }
+
+
+def listing_position(document: dict) -> tuple:
+    """Sort key matching ``datePublished desc, _id desc`` when reversed."""
+    published = document.get("datePublished")
+    return (published is not None, published or datetime.min, document["_id"])
+
+
+def cursor_position(cursor: Optional[str]) -> Optional[tuple]:
+    if not cursor:
+        return None
+    published, object_id = decode_cursor(cursor)
+    return listing_position({"datePublished": published, "_id": object_id})
+
+
+def clamp_per_page(perPage: int, maximum: int = MAX_PER_PAGE) -> int:
+    return max(1, min(perPage, maximum))
+
+
+def split_page(documents: list, perPage: int) -> tuple[list, Optional[str]]:
+    """Trim a ``perPage + 1`` read to one page and derive the next cursor."""
+    if len(documents) > perPage:
+        return documents[:perPage], encode_cursor(documents[perPage - 1])
+    return documents, None
+
+
+def parse_fields(fields: Optional[str], schema: type) -> Optional[tuple]:
+    """Validate a comma separated ``fields=`` parameter against the fields
+    of ``schema``. Returns None when every field is wanted."""
+    if not fields:
+        return None
+    selected = tuple(
+        dict.fromkeys(field.strip() for field in fields.split(",") if field)
+    )
+    unknown = [field for field in selected if field not in schema.model_fields]
+    if unknown:
+        raise BadRequestException(f"Unknown fields: {', '.join(unknown)}")
+    return selected
+
+
+def parse_categories(category: str) -> list[str]:
+    """Validate a comma separated ``category=`` parameter, such as
+    ``business,sports``, against ``NEWS_CATEGORIES``."""
+    selected = list(
+        dict.fromkeys(c.strip() for c in category.split(",") if c.strip())
+    )
+    unknown = [c for c in selected if c not in NEWS_CATEGORIES]
+    if unknown:
+        raise BadRequestException(f"Unknown categories: {', '.join(unknown)}")
+    if not selected:
+        raise BadRequestException("No category given")
+    return selected
+
+
+def select_fields(records: Iterable[dict], fields: Optional[tuple]):
+    if not fields:
+        return records
+    return (
+        {field: record.get(field) for field in fields} for record in records
+    )
+
+
+def wants_ndjson(request: Request) -> bool:
+    return NDJSON_MEDIA_TYPE in request.headers.get("accept", "")
+
+
+def stream_page(
+    documents: Union[Iterable[dict], AsyncIterable[dict]],
+    perPage: int,
+    transform: Callable[[dict], dict],
+):
+    """Records of a ``perPage + 1`` read as they are read, followed by a
+    ``{"nextCursor": ...}`` line when there is another page. An async
+    ``documents``, such as a motor cursor, gives an async generator."""
+    if hasattr(documents, "__aiter__"):
+        return _astream_page(documents, perPage, transform)
+    return _stream_page(documents, perPage, transform)
+
+
+def _stream_page(documents, perPage, transform):
+    last = None
+    for index, document in enumerate(documents):
+        if index == perPage:
+            yield {"nextCursor": encode_cursor(last)}
+            return
+        last = document
+        yield transform(document)
+
+
+async def _astream_page(documents, perPage, transform):
+    index, last = 0, None
+    async for document in documents:
+        if index == perPage:
+            yield {"nextCursor": encode_cursor(last)}
+            return
+        index += 1
+        last = document
+        yield transform(document)
+
+
+def ndjson_response(
+    records: Union[Iterable[dict], AsyncIterable[dict]], batch_size: int = 100
+) -> StreamingResponse:
+    """Stream one JSON document per line instead of building the whole
+    page. Lines are written in batches so a Mongo cursor is read a batch at
+    a time rather than a thread hop per record."""
+    if hasattr(records, "__aiter__"):
+        return StreamingResponse(
+            _alines(records, batch_size), media_type=NDJSON_MEDIA_TYPE
+        )
+    records = iter(records)
+
+    def lines():
+        while batch := list(islice(records, batch_size)):
+            yield b"".join(orjson.dumps(record) + b"\n" for record in batch)
+
+    return StreamingResponse(lines(), media_type=NDJSON_MEDIA_TYPE)
+
+
+async def _alines(records: AsyncIterable[dict], batch_size: int):
+    batch = []
+    async for record in records:
+        batch.append(orjson.dumps(record) + b"\n")
+        if len(batch) == batch_size:
+            yield b"".join(batch)
+            batch = []
+    if batch:
+        yield b"".join(batch)
@@ -0,0 +1,40 @@
+"""Adapters for the upstream news providers.
+
+Each provider gets a ``Provider`` subclass that builds its query params
+and maps its payload, decoded once with orjson, into ``ArticleRecord``s.
+A new provider is an adapter registered here (and, when it is metered, a
+budget in ``aggregator.core.quota``); routes look adapters up by name, so
+pointing ``LIVE_NEWS_PROVIDER`` at it needs no route change.
+"""
+
+from .base import (
+    ArticleQuery,
+    ArticleRecord,
+    Provider,
+    ProviderPage,
+    get_provider,
+    parse_timestamp,
+    providers,
+    register_provider,
+)
+from .mediastack import Mediastack
+from .newsapi import NewsAPI
+from .rssapp import RssApp
+
+newsapi_provider = register_provider(NewsAPI())
+mediastack_provider = register_provider(Mediastack())
+rssapp_provider = register_provider(RssApp())
+
+__all__ = [
+    "ArticleQuery",
+    "ArticleRecord",
+    "Provider",
+    "ProviderPage",
+    "get_provider",
+    "parse_timestamp",
+    "providers",
+    "register_provider",
+    "newsapi_provider",
+    "mediastack_provider",
+    "rssapp_provider",
+]
@@ -0,0 +1,149 @@
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from datetime import date, datetime, timezone
+from typing import Any, NamedTuple, Optional, Union
+
+import orjson
+import pytz
+
+from aggregator.core.exceptions import CustomException, InternalServerException
+from aggregator.utils.helper import get_relative_time
+
+
+class ArticleRecord(NamedTuple):
+    """An upstream article, the same whichever provider sent it."""
+
+    url: str
+    title: str
+    # A name, or NewsAPI's {"id", "name"}
+    source: Union[str, dict, None] = None
+    author: Optional[str] = None
+    description: Optional[str] = None
+    image: Optional[str] = None
+    published_at: Optional[datetime] = None
+    content: Optional[str] = None
+    category: Optional[str] = None
+    language: Optional[str] = None
+    country: Optional[str] = None
+    # Feed articles only, kept for ingestion
+    content_html: Optional[str] = None
+    authors: tuple = ()
+    attachments: tuple = ()
+
+    def listing(self, now: Optional[datetime] = None) -> dict:
+        """Shape of an `Article` in responses."""
+        return {
+            "source": self.source,
+            "author": self.author,
+            "title": self.title,
+            "description": self.description,
+            "url": self.url,
+            "urlToImage": self.image,
+            "publishedAt": get_relative_time(self.published_at, now),
+            "content": self.content,
+            "category": self.category,
+            "language": self.language,
+            "country": self.country,
+        }
+
+
+@dataclass
+class ArticleQuery:
+    """Provider-neutral article search; adapters turn it into params."""
+
+    keywords: Optional[list[str]] = None
+    start: Optional[date] = None
+    end: Optional[date] = None
+    language: str = "en"
+    sources: Optional[list[str]] = None
+    categories: Optional[list[str]] = None
+
+
+@dataclass
+class ProviderPage:
+    """Decoded and normalized answer of one provider call."""
+
+    status_code: int
+    records: list = field(default_factory=list)
+    total: int = 0
+    # Decoded body of an error answer
+    error: Any = None
+    # Bytes of the upstream payload, as the response cache counts them
+    size: int = 0
+
+    def listings(self, limit: Optional[int] = None) -> list[dict]:
+        now = datetime.now(tz=pytz.UTC)
+        return [record.listing(now) for record in self.records[:limit]]
+
+
+def parse_timestamp(value: Optional[str]) -> Optional[datetime]:
+    """UTC datetime of an ISO 8601 timestamp, None when there is none or
+    it does not parse."""
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except (TypeError, ValueError):
+        return None
+    if parsed.tzinfo is None:
+        return parsed.replace(tzinfo=timezone.utc)
+    if parsed.utcoffset():
+        return parsed.astimezone(timezone.utc)
+    # Already UTC; converting would only cost time
+    return parsed
+
+
+class Provider(ABC):
+    """Adapter for one upstream news provider.
+
+    Knows the provider's URLs and query params and maps its payload into
+    ``ArticleRecord``s. Adapters do no I/O; ``aggregator.core.upstream``
+    makes the calls, through the provider's budget and circuit breaker.
+    """
+
+    name = ""
+
+    @abstractmethod
+    def url(self, endpoint: str) -> str:
+        """URL of ``endpoint``, e.g. a NewsAPI path or a feed category."""
+
+    @abstractmethod
+    def params(self, query: ArticleQuery) -> dict:
+        """Query params of ``query``."""
+
+    @abstractmethod
+    def normalize(self, payload: Any) -> tuple[list[ArticleRecord], int]:
+        """Records of a decoded payload and the total the provider
+        reports. Items without a URL, title or date are dropped."""
+
+    def decode(self, content: bytes) -> Any:
+        return orjson.loads(content)
+
+    def page(self, status_code: int, content: bytes) -> ProviderPage:
+        """Decode ``content`` once and normalize it."""
+        try:
+            payload = self.decode(content)
+        except orjson.JSONDecodeError:
+            if status_code == 200:
+                raise CustomException(f"Invalid response from {self.name}")
+            payload = content.decode(errors="replace")
+        if status_code != 200:
+            return ProviderPage(status_code, error=payload, size=len(content))
+        records, total = self.normalize(payload)
+        return ProviderPage(status_code, records, total, size=len(content))
+
+
+providers: dict[str, Provider] = {}
+
+
+def register_provider(provider: Provider) -> Provider:
+    """Make ``provider`` available to the routes under its name."""
+    providers[provider.name] = provider
+    return provider
+
+
+def get_provider(name: str) -> Provider:
+    try:
+        return providers[name]
+    except KeyError:
+        raise InternalServerException(f"Unknown news provider {name}")
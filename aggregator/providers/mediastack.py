@@ -0,0 +1,50 @@
+from aggregator.config import config
+
+from .base import ArticleQuery, ArticleRecord, Provider, parse_timestamp
+
+
+class Mediastack(Provider):
+    name = "mediastack"
+
+    def url(self, endpoint: str) -> str:
+        return f"{config.MEDIASTACK_URL}/{endpoint}"
+
+    def params(self, query: ArticleQuery) -> dict:
+        params = {
+            "languages": query.language,
+            "limit": 100,
+        }
+        dates = [day.isoformat() for day in (query.start, query.end) if day]
+        if dates:
+            params["date"] = ",".join(dates)
+        if query.keywords:
+            params["keywords"] = " +".join(query.keywords)
+        if query.categories:
+            params["categories"] = ",".join(query.categories)
+        if query.sources:
+            params["sources"] = ",".join(query.sources)
+        return params
+
+    def normalize(self, payload: dict) -> tuple[list[ArticleRecord], int]:
+        records = []
+        for item in payload.get("data") or ():
+            url, title = item.get("url"), item.get("title")
+            published_at = parse_timestamp(item.get("published_at"))
+            if url and title and published_at:
+                records.append(
+                    ArticleRecord(
+                        url,
+                        title,
+                        item.get("source"),
+                        item.get("author"),
+                        item.get("description"),
+                        item.get("image"),
+                        published_at,
+                        None,
+                        item.get("category"),
+                        item.get("language"),
+                        item.get("country"),
+                    )
+                )
+        pagination = payload.get("pagination") or {}
+        return records, pagination.get("total", len(records))
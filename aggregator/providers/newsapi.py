@@ -0,0 +1,48 @@
+from aggregator.config import config
+
+from .base import ArticleQuery, ArticleRecord, Provider, parse_timestamp
+
+
+class NewsAPI(Provider):
+    name = "newsapi"
+
+    def url(self, endpoint: str) -> str:
+        return f"{config.NEWS_API_URL}/{endpoint}"
+
+    def params(self, query: ArticleQuery) -> dict:
+        params = {
+            "language": query.language,
+            "sortBy": "relevancy" if query.start else "publishedAt",
+            "searcgIn": "title",
+            "pageSize": 10,
+            "page": 1,
+        }
+        if query.start:
+            params["from"] = query.start.isoformat()
+        if query.end:
+            params["to"] = query.end.isoformat()
+        if query.keywords:
+            params["q"] = " OR ".join(query.keywords)
+        if query.sources:
+            params["sources"] = ",".join(query.sources)
+        return params
+
+    def normalize(self, payload: dict) -> tuple[list[ArticleRecord], int]:
+        records = []
+        for item in payload.get("articles") or ():
+            url, title = item.get("url"), item.get("title")
+            published_at = parse_timestamp(item.get("publishedAt"))
+            if url and title and published_at:
+                records.append(
+                    ArticleRecord(
+                        url,
+                        title,
+                        item.get("source"),
+                        item.get("author"),
+                        item.get("description"),
+                        item.get("urlToImage"),
+                        published_at,
+                        item.get("content"),
+                    )
+                )
+        return records, payload.get("totalResults", len(records))
@@ -0,0 +1,66 @@
+import pytz
+
+from aggregator.config import config
+
+from .base import ArticleQuery, ArticleRecord, Provider, parse_timestamp
+
+IST = pytz.timezone("Asia/Kolkata")
+
+
+class RssApp(Provider):
+    """rss.app JSON feeds, one per category; ingested, never searched."""
+
+    name = "rssapp"
+
+    def url(self, endpoint: str) -> str:
+        feed_urls = {
+            "general": config.GENERAL_FEED_URL,
+            "politics": config.POLITICS_FEED_URL,
+            "business": config.BUSINESS_FEED_URL,
+            "scienceandtechnology": config.SCIENCE_TECHNOLOGY_FEED_URL,
+            "sports": config.SPORTS_FEED_URL,
+            "entertainment": config.ENTERTAINMENT_FEED_URL,
+        }
+        return feed_urls[endpoint]
+
+    def params(self, query: ArticleQuery) -> dict:
+        return {}
+
+    def normalize(self, payload: dict) -> tuple[list[ArticleRecord], int]:
+        items = payload.get("items") or ()
+        return self.normalize_items(items), len(items)
+
+    def normalize_items(self, items: list) -> list[ArticleRecord]:
+        records = []
+        for item in items:
+            url, title = item.get("url"), item.get("title")
+            published_at = parse_timestamp(item.get("date_published"))
+            if not (url and title and published_at):
+                continue
+            authors = tuple(
+                [author["name"] for author in item.get("authors") or ()]
+            )
+            if authors and "The Times of India" in authors[0]:
+                # Its feed sends IST times marked as UTC
+                published_at = IST.localize(
+                    published_at.replace(tzinfo=None)
+                ).astimezone(pytz.UTC)
+            records.append(
+                ArticleRecord(
+                    url,
+                    title,
+                    authors[0] if authors else None,
+                    description=item.get("content_text"),
+                    image=item.get("image"),
+                    published_at=published_at,
+                    content_html=item.get("content_html"),
+                    authors=authors,
+                    attachments=tuple(
+                        [
+                            attachment["url"]
+                            for attachment in item.get("attachments") or ()
+                        ]
+                    ),
+                )
+            )
+        return records
@@ -1,84 +1,122 @@
-from datetime import datetime
+import time
+from dataclasses import dataclass, field
+from typing import Optional
 
-import pytz
 import requests
 
 from aggregator.config import config
-from aggregator.core import logger
+from aggregator.core.metrics import observe_upstream, upstream_in_flight
+from aggregator.core.resilience import resilient_upstream
+from aggregator.providers import ArticleRecord, rssapp_provider
 from aggregator.schemas import Attachment, Author, NewsArticle
 
+FEED_HEADERS = {
+    "authority": "rss.app",
+    "method": "GET",
+    "scheme": "https",
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7",
+    "Accept-Encoding": "gzip, deflate, br, zstd",
+    "Accept-Language": "en-GB,en-US;q=0.9,en;q=0.8",
+    "Sec-Ch-Ua": '"Chromium";v="130", "Google Chrome";v="130", "Not?A_Brand";v="99"',
+    "Sec-Ch-Ua-Mobile": "?1",
+    "Sec-Ch-Ua-Platform": '"Android"',
+    "Sec-Fetch-Dest": "document",
+    "Sec-Fetch-Mode": "navigate",
+    "Sec-Fetch-Site": "none",
+    "Upgrade-Insecure-Requests": "1",
+    "User-Agent": "Mozilla/5.0 (Linux; Android 6.0; Nexus 5 Build/MRA58N) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/130.0.0.0 Mobile Safari/537.36",
+}
 
-def convert_ist_to_utc(date: str):
-    ist_datetime = datetime.strptime(date, "%Y-%m-%dT%H:%M:%S.%fZ")
-    ist_timezone = pytz.timezone("Asia/Kolkata")
-    ist_aware_datetime = ist_timezone.localize(ist_datetime)
-    utc_datetime = ist_aware_datetime.astimezone(pytz.utc)
-    utc_datetime_str = utc_datetime.strftime("%Y-%m-%dT%H:%M:%S.%f")[:-3] + "Z"
-
-    return utc_datetime_str
-
-
-def get_articles(category: str):
-    articles = []
-    headers = {
-        "authority": "rss.app",
-        "method": "GET",
-        "scheme": "https",
-        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7",
-        "Accept-Encoding": "gzip, deflate, br, zstd",
-        "Accept-Language": "en-GB,en-US;q=0.9,en;q=0.8",
-        "Sec-Ch-Ua": '"Chromium";v="130", "Google Chrome";v="130", "Not?A_Brand";v="99"',
-        "Sec-Ch-Ua-Mobile": "?1",
-        "Sec-Ch-Ua-Platform": '"Android"',
-        "Sec-Fetch-Dest": "document",
-        "Sec-Fetch-Mode": "navigate",
-        "Sec-Fetch-Site": "none",
-        "Upgrade-Insecure-Requests": "1",
-        "User-Agent": "Mozilla/5.0 (Linux; Android 6.0; Nexus 5 Build/MRA58N) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/130.0.0.0 Mobile Safari/537.36",
-    }
-
-    if category == "general":
-        feed_url = config.GENERAL_FEED_URL
-    elif category == "politics":
-        feed_url = config.POLITICS_FEED_URL
-    elif category == "business":
-        feed_url = config.BUSINESS_FEED_URL
-    elif category == "scienceandtechnology":
-        feed_url = config.SCIENCE_TECHNOLOGY_FEED_URL
-    elif category == "sports":
-        feed_url = config.SPORTS_FEED_URL
-    elif category == "entertainment":
-        feed_url = config.ENTERTAINMENT_FEED_URL
-
-    try:
-        response = requests.get(feed_url, headers=headers)
-        response.raise_for_status()  # Check if the request was successful
-
-        for article in response.json().get("items", []):
-            if "The Times of India" in article["authors"][0]["name"]:
-                article["date_published"] = convert_ist_to_utc(
-                    article["date_published"]
-                )
-
-            articles.append(
-                NewsArticle(
-                    url=article["url"],
-                    title=article["title"],
-                    description=article["content_text"],
-                    contentHtml=article["content_html"],
-                    imageUrl=article["image"],
-                    datePublished=article["date_published"],
-                    source=[
-                        Author(name=author["name"])
-                        for author in article.get("authors", [])
-                    ],
-                    attachments=[
-                        Attachment(url=attachment["url"])
-                        for attachment in article.get("attachments", [])
-                    ],
-                )
+
+@dataclass
+class FeedFetch:
+    """Result of one conditional fetch of a category feed."""
+
+    category: str
+    articles: list = field(default_factory=list)
+    not_modified: bool = False
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+
+def news_article(record: ArticleRecord) -> NewsArticle:
+    return NewsArticle(
+        url=record.url,
+        title=record.title,
+        description=record.description,
+        contentHtml=record.content_html,
+        imageUrl=record.image,
+        datePublished=record.published_at,
+        source=[Author(name=name) for name in record.authors],
+        attachments=[Attachment(url=url) for url in record.attachments],
+    )
+
+
+def parse_feed_items(items: list) -> list[NewsArticle]:
+    return [
+        news_article(record)
+        for record in rssapp_provider.normalize_items(items)
+    ]
+
+
+def fetch_feed(
+    category: str,
+    etag: Optional[str] = None,
+    last_modified: Optional[str] = None,
+    session: Optional[requests.Session] = None,
+) -> FeedFetch:
+    """Fetch and parse a category feed from rss.app.
+
+    Sends the validators from the previous fetch, so an unchanged feed comes
+    back as a 304 and is neither parsed nor written. Transport errors and
+    5xx are retried within ``FEED_DEADLINE``; raises once they are not, or
+    on other HTTP errors, so the caller can isolate the failing feed.
+    """
+    headers = dict(FEED_HEADERS)
+    if etag:
+        headers["If-None-Match"] = etag
+    if last_modified:
+        headers["If-Modified-Since"] = last_modified
+
+    url = rssapp_provider.url(category)
+    in_flight = upstream_in_flight.labels("rssapp")
+
+    def send(timeout: float) -> requests.Response:
+        in_flight.inc()
+        started, status = time.perf_counter(), None
+        try:
+            response = (session or requests).get(
+                url,
+                headers=headers,
+                timeout=(
+                    min(config.FEED_CONNECT_TIMEOUT, timeout),
+                    min(config.FEED_READ_TIMEOUT, timeout),
+                ),
             )
-        return articles
-    except Exception as e:
-        logger.error(f"Error fetching general articles: {str(e)}")
-        return articles
+            status = response.status_code
+            return response
+        finally:
+            in_flight.dec()
+            observe_upstream("rssapp", status, started)
+
+    response = resilient_upstream("rssapp").call_sync(
+        send, config.FEED_DEADLINE, errors=(requests.RequestException,)
+    )
+    if response.status_code == 304:
+        return FeedFetch(
+            category=category,
+            not_modified=True,
+            etag=etag,
+            last_modified=last_modified,
+        )
+    response.raise_for_status()  # Check if the request was successful
+
+    return FeedFetch(
+        category=category,
+        articles=[
+            news_article(record)
+            for record in rssapp_provider.page(200, response.content).records
+        ],
+        etag=response.headers.get("ETag"),
+        last_modified=response.headers.get("Last-Modified"),
+    )
@@ -1,41 +1,89 @@
+import time
 from datetime import datetime, timedelta
 from typing import Optional
 
 from fastapi import Depends
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
-from passlib.context import CryptContext
 
 from aggregator.config import config
 from aggregator.core import NotFoundException, UnauthorizedException
-from aggregator.core.db import db_conn
+from aggregator.core.cache import TTLCache
+from aggregator.core.db import async_db_conn
 from aggregator.schemas import TokenData, User, UserInDB
+from aggregator.utils.passwords import password_hasher
 
-pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(
     tokenUrl="/user/token"
 )  # listen to /token endpoint to generate token
 
+# Decoded tokens (token -> email, kept until the token expires) and the
+# users they belong to. Writes to a user go through invalidate_user; other
+# workers pick the change up within AUTH_CACHE_TTL.
+token_cache = TTLCache(
+    ttl=config.AUTH_CACHE_TTL, max_entries=config.AUTH_CACHE_MAX_ENTRIES
+)
+user_cache = TTLCache(
+    ttl=config.AUTH_CACHE_TTL, max_entries=config.AUTH_CACHE_MAX_ENTRIES
+)
 
-def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
 
+async def get_user(email: str):
+    return await async_db_conn.get_user_by_email(email)
 
-def get_password_hash(password):
-    return pwd_context.hash(password)
 
+def invalidate_user(email: str):
+    user_cache.pop(email)
 
-def get_user(email: str):
-    return db_conn.get_user_by_email(email)
 
+async def get_cached_user(email: str) -> Optional[User]:
+    user = user_cache.get(email)
+    if user is None:
+        user_data = await get_user(email)
+        # Unknown users are not cached so a new sign-up is seen at once
+        if user_data is None:
+            return None
+        user = User(**user_data)
+        user_cache.set(email, user)
+    return user
 
-def authenticate_user(email: str, password: str):
-    user = get_user(email)
-    user = UserInDB(**user)
+
+def decode_token(token: str) -> str:
+    """Return the email in ``token``, verifying it only on a cache miss."""
+    email = token_cache.get(token)
+    if email is not None:
+        return email
+    try:
+        payload = jwt.decode(
+            token, config.SECRET_KEY, algorithms=[config.ALGORITHM]
+        )
+        email: str = payload.get("sub")
+        if email is None:
+            raise UnauthorizedException
+
+        token_data = TokenData(email=email)
+    except JWTError:
+        raise UnauthorizedException
+
+    expires_at = payload.get("exp")
+    ttl = expires_at - time.time() if expires_at else None
+    token_cache.set(token, token_data.email, ttl)
+    return token_data.email
+
+
+async def authenticate_user(email: str, password: str):
+    user = await get_user(email)
     if not user:
         return False
-    if not verify_password(password, user.hashedPassword):
+    user = UserInDB(**user)
+    verified, new_hash = await password_hasher.verify(
+        password, user.hashedPassword
+    )
+    if not verified:
         return False
+    if new_hash:
+        # Hashed with older Argon2 parameters
+        await async_db_conn.update_password_hash(user.email, new_hash)
 
     return user
 
@@ -58,24 +106,10 @@ async def get_current_user(
     token: str = Depends(oauth2_scheme),
 ):  # listen to /token endpoint to generate token
     """Decode the token and verify the user based on the token data."""
-    try:
-        payload = jwt.decode(
-            token, config.SECRET_KEY, algorithms=[config.ALGORITHM]
-        )
-        email: str = payload.get("sub")
-        if email is None:
-            raise UnauthorizedException
-
-        token_data = TokenData(email=email)
-    except JWTError:
-        raise UnauthorizedException
-
-    user = get_user(email=token_data.email)
+    user = await get_cached_user(decode_token(token))
     if user is None:
         raise UnauthorizedException
 
-    user = User(**user)
-
     return user
 
 
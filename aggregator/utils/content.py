@@ -0,0 +1,52 @@
+"""Article bodies kept apart from the hot articles collection.
+
+Listings only need a few small fields, so an article's ``contentHtml`` and
+``attachments`` are stored zlib-compressed in the ``article_content``
+collection under the article's ``_id`` and read by the detail endpoint.
+The listing keeps a short plain-text ``content`` snippet instead.
+"""
+
+import html
+import re
+import zlib
+from typing import Optional
+
+from bson import Binary
+
+from aggregator.config import config
+
+_TAGS = re.compile(r"<[^>]+>")
+_SPACES = re.compile(r"\s+")
+
+
+def content_snippet(
+    content_html: Optional[str], length: int = config.CONTENT_SNIPPET_LENGTH
+) -> Optional[str]:
+    """Start of the article's text, without markup."""
+    if not content_html:
+        return None
+    text = _SPACES.sub(" ", html.unescape(_TAGS.sub(" ", content_html)))
+    text = text.strip()
+    if len(text) <= length:
+        return text or None
+    return text[:length].rstrip() + "…"
+
+
+def content_document(_id, content_html, attachments) -> dict:
+    return {
+        "_id": _id,
+        "html": Binary(
+            zlib.compress(
+                (content_html or "").encode(), config.CONTENT_COMPRESSION_LEVEL
+            )
+        ),
+        "attachments": attachments or [],
+    }
+
+
+def read_content(document: dict) -> dict:
+    """``contentHtml`` and ``attachments`` of a content document."""
+    return {
+        "contentHtml": zlib.decompress(document["html"]).decode() or None,
+        "attachments": document.get("attachments", []),
+    }
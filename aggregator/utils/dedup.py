@@ -0,0 +1,180 @@
+"""Exact and near-duplicate detection for articles.
+
+Exact duplicates are keyed on a canonical URL: scheme, ``www.``, fragments,
+tracking params and trailing slashes are dropped and the remaining query is
+sorted. Near duplicates (the same story syndicated with a slightly edited
+headline) are found with a MinHash signature over the words of the title and
+description, built with one-permutation hashing so each article costs a
+single pass over its words. Signatures are split into bands and candidates
+are only compared within a shared band bucket, which keeps the whole pass
+linear in the number of articles.
+
+Signatures use Python's string hash, which is salted per process, so they
+are only comparable within one process and are never stored.
+"""
+
+import re
+from typing import Callable, Iterable, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+TRACKING_PARAMS = {
+    "fbclid",
+    "gclid",
+    "dclid",
+    "msclkid",
+    "mc_cid",
+    "mc_eid",
+    "igshid",
+    "ref",
+    "ref_src",
+    "cmpid",
+    "ocid",
+    "spm",
+    "__twitter_impression",
+}
+
+_WORD = re.compile(r"\w+")
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "has",
+    "in", "is", "it", "its", "of", "on", "or", "that", "the", "to", "was",
+    "were", "will", "with",
+}  # fmt: skip
+
+# One-permutation MinHash: the top bits of a word's hash pick its bin and
+# each bin keeps the smallest remaining value
+MIN_WORDS = 6
+_BINS = 16
+_BAND_ROWS = 2
+_BIN_SHIFT = 60
+_MASK = (1 << 64) - 1
+_VALUE_MASK = (1 << _BIN_SHIFT) - 1
+_EMPTY = _VALUE_MASK + 1
+
+
+def canonicalize_url(url: str) -> str:
+    parts = urlsplit(url.strip())
+    host = parts.netloc.lower()
+    if host.startswith("www."):
+        host = host[4:]
+    query = sorted(
+        (key, value)
+        for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith("utm_")
+        and key.lower() not in TRACKING_PARAMS
+    )
+    path = parts.path.rstrip("/")
+    canonical = f"{host}{path}"
+    if query:
+        canonical += f"?{urlencode(query)}"
+    return canonical
+
+
+def minhash(text: str) -> Optional[tuple]:
+    """MinHash signature of ``text``, or None when it is too short to compare."""
+    words = {
+        word for word in _WORD.findall(text.lower()) if word not in STOPWORDS
+    }
+    # Too few words to tell an edited copy from a different story
+    if len(words) < MIN_WORDS:
+        return None
+
+    signature = [_EMPTY] * _BINS
+    for word in words:
+        digest = hash(word) & _MASK
+        index, value = digest >> _BIN_SHIFT, digest & _VALUE_MASK
+        if value < signature[index]:
+            signature[index] = value
+    return tuple(signature)
+
+
+def similarity(left: tuple, right: tuple) -> float:
+    """Estimated Jaccard similarity of two signatures."""
+    matches = filled = 0
+    for a, b in zip(left, right):
+        if a == _EMPTY and b == _EMPTY:
+            continue
+        filled += 1
+        matches += a == b
+    return matches / filled if filled else 0.0
+
+
+class ArticleDeduplicator:
+    """Remembers seen articles and flags exact or near duplicates.
+
+    Args:
+        threshold (float): lowest estimated Jaccard similarity between two
+            articles' words still treated as the same story.
+    """
+
+    def __init__(self, threshold: float = 0.7):
+        self.threshold = threshold
+        self._urls: set[str] = set()
+        self._buckets: dict[tuple, list[tuple]] = {}
+
+    @staticmethod
+    def _band_keys(signature: tuple):
+        for start in range(0, _BINS, _BAND_ROWS):
+            band = signature[start : start + _BAND_ROWS]
+            if _EMPTY not in band:
+                yield start, band
+
+    def is_near_duplicate(self, signature: Optional[tuple]) -> bool:
+        if signature is None:
+            return False
+        for key in self._band_keys(signature):
+            for candidate in self._buckets.get(key, ()):
+                if similarity(candidate, signature) >= self.threshold:
+                    return True
+        return False
+
+    def add(self, canonical_url: str, signature: Optional[tuple]):
+        self._urls.add(canonical_url)
+        if signature is not None:
+            for key in self._band_keys(signature):
+                self._buckets.setdefault(key, []).append(signature)
+
+    def remember(
+        self,
+        url: str,
+        title: Optional[str] = None,
+        description: Optional[str] = None,
+    ):
+        """Seed with an article that is already stored."""
+        self.add(
+            canonicalize_url(url), minhash(article_text(title, description))
+        )
+
+    def check(self, canonical_url: str, signature: Optional[tuple]) -> bool:
+        """Return True if the article was already seen, else remember it."""
+        if canonical_url in self._urls or self.is_near_duplicate(signature):
+            return True
+        self.add(canonical_url, signature)
+        return False
+
+
+def article_text(title: Optional[str], description: Optional[str]) -> str:
+    return f"{title or ''} {description or ''}"
+
+
+def dedupe_articles(
+    articles: Iterable,
+    get_fields: Callable = lambda article: (
+        article["url"],
+        article.get("title"),
+        article.get("description"),
+    ),
+    deduplicator: Optional[ArticleDeduplicator] = None,
+) -> list:
+    """Drop exact and near-duplicate articles, keeping the first occurrence.
+
+    ``get_fields`` returns ``(url, title, description)`` for an article; the
+    default reads dict keys.
+    """
+    deduplicator = deduplicator or ArticleDeduplicator()
+    unique = []
+    for article in articles:
+        url, title, description = get_fields(article)
+        signature = minhash(article_text(title, description))
+        if not deduplicator.check(canonicalize_url(url), signature):
+            unique.append(article)
+    return unique
@@ -1,121 +1,198 @@
-from datetime import datetime, timedelta
+from datetime import datetime
+from functools import partial
+from operator import attrgetter
 
-import pandas as pd
 import pytz
+from pydantic import ValidationError
 
-from aggregator.constants import NSE_COMPANIES_CSV
+from aggregator.config import config
+from aggregator.models.news import Article
+from aggregator.paginate import (
+    ndjson_response,
+    split_page,
+    stream_page,
+    trusted_page,
+)
+from aggregator.utils.content import content_snippet
+from aggregator.utils.dedup import ArticleDeduplicator, dedupe_articles
+from aggregator.utils.nse import nse_index
 
 
 # Have all datetimes in UTC while storing in the database
-def get_relative_time(published_at):
+def get_relative_time(published_at, now=None):
     # Assuming publishedAt is an ISO 8601 string (e.g., "2023-10-24T14:00:00Z")
     if isinstance(published_at, str):
         article_time = datetime.fromisoformat(
             published_at.replace("Z", "+00:00")
         ).replace(tzinfo=pytz.UTC)
-    else:
+    elif published_at.tzinfo is None:
         article_time = published_at.replace(tzinfo=pytz.UTC)
-    current_time = datetime.now(tz=pytz.UTC)
+    else:
+        article_time = published_at
+    current_time = now or datetime.now(tz=pytz.UTC)
 
-    # Calculate the time difference
-    time_difference = current_time - article_time
+    # Calculate the time difference, in seconds; cheaper to compare than
+    # timedeltas, and this runs for every listed article
+    seconds = (current_time - article_time).total_seconds()
 
     # Format the time difference
-    if time_difference < timedelta(minutes=1):
+    if seconds < 60:
         return "just now"
-    elif time_difference < timedelta(hours=1):
-        minutes = int(time_difference.total_seconds() // 60)
-        return f"{minutes} mins ago"
-    elif time_difference < timedelta(days=1):
-        hours = int(time_difference.total_seconds() // 3600)
-        return f"{hours} hours ago"
+    elif seconds < 3600:
+        return f"{int(seconds // 60)} mins ago"
+    elif seconds < 86400:
+        return f"{int(seconds // 3600)} hours ago"
     else:
-        days = time_difference.days
-        return f"{days} days ago"
-
-
-def fix_live_response(data):
-    data = [
-        {
-            "source": article["source"],
-            "author": article["author"],
-            "title": article["title"],
-            "description": article["description"],
-            "url": article["url"],
-            "urlToImage": article["image"],
-            "publishedAt": get_relative_time(article["published_at"]),
-            "country": article["country"],
-            "language": article["language"],
-            "content": None,
-            "category": article["category"],
-        }
+        return f"{int(seconds // 86400)} days ago"
+
+
+def listing_fields(article):
+    """Validate a feed article once at ingest time and return its listing
+    shape without the per-request `publishedAt` and `category`. `content`
+    is a short text snippet; the body is stored apart, see
+    `aggregator.utils.content`.
+
+    Returns None when the article would fail `Article` validation.
+    """
+    try:
+        listing = Article(
+            source=article.source[0].name if article.source else None,
+            author=None,
+            title=article.title,
+            description=article.description,
+            url=article.url,
+            urlToImage=article.imageUrl or None,
+            publishedAt="",
+            content=content_snippet(article.contentHtml),
+            category=None,
+            language=None,
+            country=None,
+        )
+    except ValidationError:
+        return None
+    return listing.model_dump(
+        mode="json", exclude={"id", "publishedAt", "category"}
+    )
+
+
+def listing_category(article, categories=None):
+    """Category an article is listed under: the first of the requested
+    ``categories`` it is tagged with, else the first it was tagged with."""
+    tagged = article.get("categories") or ()
+    for category in categories or ():
+        if category in tagged:
+            return category
+    if tagged:
+        return tagged[0]
+    # Stored before articles were tagged with their categories
+    return (article.get("listing") or {}).get("category", "general")
+
+
+def get_absolute_time(published_at):
+    """ISO 8601 UTC timestamp, which unlike the relative time does not
+    change between requests."""
+    if published_at is None:
+        return None
+    return published_at.replace(tzinfo=None).isoformat() + "Z"
+
+
+def fix_feed_articles(data, fields=None, absolute=False, categories=None):
+    now = datetime.now(tz=pytz.UTC)
+    return [
+        fix_feed_article(article, now, fields, absolute, categories)
         for article in data
     ]
-    return data
-
-
-def fix_response(data):
-    data = [
-        {
-            "source": article["source"],
-            "author": article["author"],
-            "title": article["title"],
-            "description": article["description"],
-            "url": article["url"],
-            "urlToImage": article["urlToImage"],
-            "publishedAt": get_relative_time(article["publishedAt"]),
-            "content": article["content"],
-            "category": None,
-            "language": None,
-            "country": None,
-        }
-        for article in data
-    ]
-    return data
 
 
-def fix_feed_articles(data):
-    data = [
-        {
-            "source": article["source"][0]["name"]
-            if article["source"]
-            else None,
+def fix_feed_article(
+    article, now=None, fields=None, absolute=False, categories=None
+):
+    """Listing shape of a stored article.
+
+    Args:
+        fields (tuple): only return these fields, all when empty.
+        absolute (bool): `publishedAt` as an ISO timestamp instead of
+            relative to `now`.
+        categories (list): the requested categories, see
+            `listing_category`.
+    """
+    published_at = (
+        get_absolute_time(article.get("datePublished"))
+        if absolute
+        else get_relative_time(article["datePublished"], now)
+    )
+    _id = article.get("_id")
+    listing = article.get("listing")
+    if listing is not None:
+        result = {
+            "id": str(_id) if _id is not None else None,
+            **listing,
+            "publishedAt": published_at,
+            "category": listing_category(article, categories),
+        }
+        if "content" not in listing:
+            # Stored before bodies were split out of the listing
+            result["content"] = article.get("contentHtml")
+    else:
+        # Stored before listings were precomputed at ingest time
+        source = article.get("source")
+        result = {
+            "id": str(_id) if _id is not None else None,
+            "source": source[0]["name"] if source else None,
             "author": None,
-            "title": article["title"],
-            "description": article["description"],
-            "url": article["url"],
-            "urlToImage": article["imageUrl"],
-            "publishedAt": get_relative_time(article["datePublished"]),
-            "content": article["contentHtml"],
-            "category": "general",
+            "title": article.get("title"),
+            "description": article.get("description"),
+            "url": article.get("url"),
+            "urlToImage": article.get("imageUrl"),
+            "publishedAt": published_at,
+            "content": article.get("contentHtml"),
+            "category": listing_category(article, categories),
             "language": None,
             "country": None,
         }
-        for article in data
-    ]
-
-    return data
+    if fields:
+        return {field: result.get(field) for field in fields}
+    return result
+
+
+def listing_response(
+    documents,
+    page,
+    perPage,
+    fields=None,
+    absolute=False,
+    ndjson=False,
+    categories=None,
+):
+    """Page of stored articles from a ``perPage + 1`` read of
+    ``categories``.
+
+    With ``ndjson`` the articles are streamed as ``documents`` is read,
+    otherwise they are sent as one JSON page.
+    """
+    if ndjson:
+        transform = partial(
+            fix_feed_article,
+            now=datetime.now(tz=pytz.UTC),
+            fields=fields,
+            absolute=absolute,
+            categories=categories,
+        )
+        return ndjson_response(stream_page(documents, perPage, transform))
+
+    data, next_cursor = split_page(list(documents), perPage)
+    data = fix_feed_articles(data, fields, absolute, categories)
+    return trusted_page(
+        results=data,
+        total=len(data),
+        page=page,
+        perPage=perPage,
+        nextCursor=next_cursor,
+    )
 
 
 def get_nse_companies():
-    df_nse = pd.read_csv(NSE_COMPANIES_CSV)
-
-    # Create NSECompany instances for each row
-    companies = []
-    for _, row in df_nse.iterrows():
-        company = {
-            "symbol": row["SYMBOL"],
-            "name": row["NAME OF COMPANY"],
-            "series": row[" SERIES"],
-            "dateOfListing": row[" DATE OF LISTING"],
-            "paidUpValue": int(row[" PAID UP VALUE"]),
-            "marketLot": int(row[" MARKET LOT"]),
-            "isinNumber": row[" ISIN NUMBER"],
-            "faceValue": int(row[" FACE VALUE"]),
-        }
-        companies.append(company)
-
-    return companies
+    return nse_index.companies()
 
 
 def get_acronym(name):
@@ -128,15 +205,13 @@ def remove_limited_from_name(name):
 
 
 def get_nse_ticker(name):
-    # Get ticker
-    df_nse = pd.read_csv(NSE_COMPANIES_CSV)
-    company_row = df_nse[df_nse["NAME OF COMPANY"] == name]
-    return company_row["SYMBOL"].values[0] if not company_row.empty else None
-
-
-def remove_duplicates(data):
-    unique_data = []
-    for article in data:
-        if article not in unique_data:
-            unique_data.append(article)
-    return unique_data
+    return nse_index.ticker(name)
+
+
+def remove_duplicates(records):
+    """Drop duplicate upstream ``ArticleRecord``s, keeping the first."""
+    return dedupe_articles(
+        records,
+        get_fields=attrgetter("url", "title", "description"),
+        deduplicator=ArticleDeduplicator(config.DEDUP_THRESHOLD),
+    )
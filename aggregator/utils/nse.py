@@ -0,0 +1,177 @@
+import asyncio
+import csv
+import os
+import re
+from bisect import bisect_left
+from dataclasses import dataclass, field
+from typing import Optional
+
+from fastapi.concurrency import run_in_threadpool
+
+from aggregator.constants import NSE_COMPANIES_CSV
+from aggregator.core.logger import logger
+
+_PUNCTUATION = re.compile(r"[^\w\s&]")
+_SUFFIXES = ("limited", "ltd")
+
+
+def normalize_company_name(name: str) -> str:
+    """Lower-case, drop punctuation and a trailing "Limited"/"Ltd"."""
+    words = _PUNCTUATION.sub(" ", name.lower()).split()
+    while words and words[-1] in _SUFFIXES:
+        words.pop()
+    return " ".join(words)
+
+
+@dataclass
+class _Snapshot:
+    mtime: float = 0.0
+    companies: list = field(default_factory=list)
+    by_name: dict = field(default_factory=dict)
+    by_symbol: dict = field(default_factory=dict)
+    by_normalized: dict = field(default_factory=dict)
+    # Sorted (key, position) pairs over normalized names and symbols
+    prefixes: list = field(default_factory=list)
+
+
+def _read_companies(path: str) -> list:
+    with open(path, newline="") as f:
+        reader = csv.reader(f)
+        header = [column.strip() for column in next(reader)]
+        companies = []
+        for row in reader:
+            record = dict(zip(header, row))
+            companies.append(
+                {
+                    "symbol": record["SYMBOL"],
+                    "name": record["NAME OF COMPANY"],
+                    "series": record["SERIES"],
+                    "dateOfListing": record["DATE OF LISTING"],
+                    "paidUpValue": int(record["PAID UP VALUE"]),
+                    "marketLot": int(record["MARKET LOT"]),
+                    "isinNumber": record["ISIN NUMBER"],
+                    "faceValue": int(record["FACE VALUE"]),
+                }
+            )
+    return companies
+
+
+def _build_snapshot(path: str) -> _Snapshot:
+    mtime = os.stat(path).st_mtime
+    snapshot = _Snapshot(mtime=mtime, companies=_read_companies(path))
+    for position, company in enumerate(snapshot.companies):
+        normalized = normalize_company_name(company["name"])
+        symbol = company["symbol"].lower()
+        snapshot.by_name.setdefault(company["name"], company)
+        snapshot.by_symbol.setdefault(symbol, company)
+        snapshot.by_normalized.setdefault(normalized, company)
+        snapshot.prefixes.append((normalized, position))
+        snapshot.prefixes.append((symbol, position))
+    snapshot.prefixes.sort()
+    return snapshot
+
+
+class NSECompanyIndex:
+    """In-memory index over the NSE equity list in ``static/nse.csv``.
+
+    The CSV is parsed once into plain dicts with lookup tables by name,
+    symbol and normalized name, plus a sorted key list for prefix search.
+    A background task re-checks the file's mtime every ``check_interval``
+    seconds in the thread pool, so lookups never parse on the event loop;
+    a new snapshot is swapped in with a single assignment, so readers never
+    see a half-built index.
+    """
+
+    def __init__(self, path: str = NSE_COMPANIES_CSV, check_interval=5.0):
+        self.path = path
+        self.check_interval = check_interval
+        self._snapshot: Optional[_Snapshot] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def load(self):
+        snapshot = _build_snapshot(self.path)
+        self._snapshot = snapshot
+        logger.info(
+            f"Loaded {len(snapshot.companies)} NSE companies from {self.path}"
+        )
+
+    def reload_if_changed(self):
+        """Rebuild the snapshot when the file changed on disk."""
+        try:
+            snapshot = self._snapshot
+            if (
+                snapshot is None
+                or os.stat(self.path).st_mtime != snapshot.mtime
+            ):
+                self.load()
+        except Exception as e:
+            # e.g. a half-written file; keep serving the previous snapshot
+            logger.error(f"Error reloading NSE companies: {e!r}")
+
+    def _current(self) -> _Snapshot:
+        if self._snapshot is None:
+            # Outside the app lifespan, e.g. in scripts
+            self.load()
+        return self._snapshot
+
+    async def _loop(self):
+        while True:
+            await asyncio.sleep(self.check_interval)
+            await run_in_threadpool(self.reload_if_changed)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    def companies(self) -> list:
+        return self._current().companies
+
+    def by_name(self, name: str) -> Optional[dict]:
+        return self._current().by_name.get(name)
+
+    def by_symbol(self, symbol: str) -> Optional[dict]:
+        return self._current().by_symbol.get(symbol.lower())
+
+    def lookup(self, name: str) -> Optional[dict]:
+        """Exact name match first, then case- and suffix-insensitive."""
+        snapshot = self._current()
+        company = snapshot.by_name.get(name)
+        if company is None:
+            company = snapshot.by_normalized.get(normalize_company_name(name))
+        return company
+
+    def ticker(self, name: str) -> Optional[str]:
+        company = self.lookup(name)
+        return company["symbol"] if company else None
+
+    def search(self, prefix: str, limit: int = 10) -> list:
+        """Companies whose normalized name or symbol starts with ``prefix``."""
+        snapshot = self._current()
+        prefix = normalize_company_name(prefix)
+        if not prefix:
+            return []
+
+        results, seen = [], set()
+        index = bisect_left(snapshot.prefixes, (prefix,))
+        while index < len(snapshot.prefixes) and len(results) < limit:
+            key, position = snapshot.prefixes[index]
+            if not key.startswith(prefix):
+                break
+            if position not in seen:
+                seen.add(position)
+                results.append(snapshot.companies[position])
+            index += 1
+        return results
+
+
+nse_index = NSECompanyIndex()
@@ -0,0 +1,141 @@
+"""Argon2 hashing in a process pool.
+
+Argon2 is deliberately slow and CPU-bound, so hashing on the event loop
+stalls every other request for the length of a hash. ``PasswordHasher``
+runs it in worker processes instead. Only a bounded number of hashes may be
+queued; once ``max_pending`` are in flight new ones are refused with a 503
+rather than building an unbounded backlog during a login storm.
+
+Workers are spawned rather than forked and only import this module, not
+the app; the cost parameters travel with each call.
+"""
+
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache
+from typing import Optional
+
+from passlib.context import CryptContext
+
+from aggregator.config import config
+from aggregator.core import ServiceUnavailableException
+from aggregator.core.logger import logger
+
+
+@lru_cache
+def password_context(
+    time_cost: int, memory_cost: int, parallelism: int
+) -> CryptContext:
+    return CryptContext(
+        schemes=["argon2"],
+        deprecated="auto",
+        argon2__rounds=time_cost,
+        argon2__memory_cost=memory_cost,
+        argon2__parallelism=parallelism,
+    )
+
+
+def _hash(password: str, params: tuple) -> str:
+    return password_context(*params).hash(password)
+
+
+def _verify_and_update(
+    password: str, hashed_password: str, params: tuple
+) -> tuple[bool, Optional[str]]:
+    return password_context(*params).verify_and_update(
+        password, hashed_password
+    )
+
+
+class PasswordHasher:
+    """Hashes and verifies passwords in a pool of worker processes.
+
+    Args:
+        workers (int): number of worker processes.
+        max_pending (int): hashes allowed in flight before refusing more.
+        time_cost, memory_cost, parallelism (int): Argon2 parameters. Hashes
+            made with other parameters still verify and are reported for
+            rehashing by ``verify``.
+    """
+
+    def __init__(
+        self,
+        workers: int = config.PASSWORD_HASH_WORKERS,
+        max_pending: int = config.PASSWORD_HASH_MAX_PENDING,
+        time_cost: int = config.ARGON2_TIME_COST,
+        memory_cost: int = config.ARGON2_MEMORY_COST,
+        parallelism: int = config.ARGON2_PARALLELISM,
+    ):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.params = (int(time_cost), int(memory_cost), int(parallelism))
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pending = 0
+
+    @property
+    def context(self) -> CryptContext:
+        return password_context(*self.params)
+
+    @property
+    def pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # spawn: forking a process that already runs threads can deadlock
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._pool
+
+    async def start(self):
+        """Start the workers up front so the first login does not pay for it."""
+        logger.info(f"Starting {self.workers} password hashing workers")
+        try:
+            await asyncio.gather(
+                *(
+                    self._submit(_hash, "warmup", self.params)
+                    for _ in range(self.workers)
+                )
+            )
+        except Exception as e:
+            # Logins retry on a fresh pool; the rest of the app still starts
+            logger.error(f"Password hashing workers failed to start: {e!r}")
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    async def _submit(self, fn, *args):
+        if self._pending >= self.max_pending:
+            raise ServiceUnavailableException(
+                message="Too many password checks in progress, retry shortly"
+            )
+        self._pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.pool, fn, *args)
+        except BrokenProcessPool:
+            # A worker died (e.g. OOM-killed); start a fresh pool next time
+            logger.error("Password hashing pool is broken, restarting it")
+            self.close()
+            raise ServiceUnavailableException(
+                message="Password check failed, retry shortly"
+            )
+        finally:
+            self._pending -= 1
+
+    async def hash(self, password: str) -> str:
+        return await self._submit(_hash, password, self.params)
+
+    async def verify(
+        self, password: str, hashed_password: str
+    ) -> tuple[bool, Optional[str]]:
+        """Check ``password``; also return a new hash if the stored one is outdated."""
+        return await self._submit(
+            _verify_and_update, password, hashed_password, self.params
+        )
+
+
+password_hasher = PasswordHasher()
@@ -0,0 +1,391 @@
+"""In-process full-text search over stored articles.
+
+``SearchIndex`` keeps an inverted index over the title and description of
+every stored article and ranks matches with BM25. Postings, document
+lengths, category bitmasks and dates live in flat ``array`` buffers
+indexed by an internal document number, so a million articles fit in a few
+hundred megabytes and a query only touches the postings of its own terms.
+
+Each worker builds its own index. It is filled from Mongo in the
+background and then kept current by reading only documents whose ``_id``
+is greater than the last one seen, plus the ones whose ``updatedAt`` moved
+since the last refresh: batches committed after a later one, whose
+``_id``s were already gone past, and articles another category's feed
+tagged. Ingestion running in another worker shows up within
+``SEARCH_REFRESH_INTERVAL`` seconds.
+
+Articles published before the ``RETENTION_DAYS`` cutoff are not indexed
+and are dropped from the index as they age past it, as are ids that no
+longer resolve when results are read. Dropped documents are skipped by
+searches and compacted away once they outnumber the live ones, so the
+index stays the size of the hot set.
+"""
+
+import asyncio
+import heapq
+import math
+import re
+import threading
+from array import array
+from collections import Counter
+from datetime import datetime, timedelta
+from operator import itemgetter
+from typing import Optional
+
+import pytz
+from bson import ObjectId
+from fastapi.concurrency import run_in_threadpool
+
+from aggregator.config import config
+from aggregator.constants import NEWS_CATEGORIES
+from aggregator.core.db import db_conn
+from aggregator.core.logger import logger
+from aggregator.utils.dedup import STOPWORDS
+
+_WORD = re.compile(r"\w+")
+_MAX_TF = 255
+# Tags are re-read from slightly before the last refresh, in case the
+# clocks of the workers writing them differ
+_CLOCK_SKEW = timedelta(minutes=1)
+
+
+def tokenize(text: str) -> list[str]:
+    return [
+        word
+        for word in _WORD.findall(text.lower())
+        if len(word) > 1 and word not in STOPWORDS
+    ]
+
+
+def category_mask(categories) -> int:
+    """Bit per category of ``NEWS_CATEGORIES``; unknown ones are ignored."""
+    mask = 0
+    for category in categories:
+        if category in NEWS_CATEGORIES:
+            mask |= 1 << NEWS_CATEGORIES.index(category)
+    return mask
+
+
+def retention_cutoff() -> Optional[datetime]:
+    """Publish date before which retention retires articles, None when
+    articles are kept."""
+    if not config.RETENTION_DAYS:
+        return None
+    return datetime.now(tz=pytz.UTC) - timedelta(days=config.RETENTION_DAYS)
+
+
+def _timestamp(value: Optional[datetime]) -> float:
+    if value is None:
+        return math.nan
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=pytz.UTC)
+    return value.timestamp()
+
+
+class SearchIndex:
+    """BM25 inverted index over article titles and descriptions.
+
+    Args:
+        k1 (float): term frequency saturation.
+        b (float): document length normalization.
+        refresh_interval (float): seconds between incremental refreshes.
+    """
+
+    def __init__(
+        self,
+        k1: float = 1.2,
+        b: float = 0.75,
+        refresh_interval: float = config.SEARCH_REFRESH_INTERVAL,
+    ):
+        self.k1 = k1
+        self.b = b
+        self.refresh_interval = refresh_interval
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._terms: dict[str, int] = {}
+        self._posting_docs: list[array] = []
+        self._posting_tfs: list[array] = []
+        self._doc_lengths = array("H")
+        self._doc_categories = array("B")
+        self._doc_dates = array("d")
+        self._doc_ids = bytearray()
+        # 1 per document still stored, 0 once dropped
+        self._doc_live = bytearray()
+        self._doc_numbers: dict[bytes, int] = {}
+        self._live_count = 0
+        self._total_length = 0
+        self._pending_removals: set[bytes] = set()
+        self._last_id: Optional[ObjectId] = None
+        self._updated_since: Optional[datetime] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def __len__(self):
+        return self._live_count
+
+    def add(
+        self,
+        categories: list[str],
+        _id: ObjectId,
+        title: Optional[str],
+        description: Optional[str],
+        published: Optional[datetime] = None,
+    ):
+        tokens = tokenize(f"{title or ''} {description or ''}")
+        with self._lock:
+            doc = len(self._doc_lengths)
+            self._doc_lengths.append(min(len(tokens), 0xFFFF))
+            self._doc_categories.append(category_mask(categories))
+            self._doc_dates.append(_timestamp(published))
+            self._doc_ids += _id.binary
+            self._doc_live.append(1)
+            self._doc_numbers[_id.binary] = doc
+            self._live_count += 1
+            self._total_length += len(tokens)
+            for term, tf in Counter(tokens).items():
+                posting = self._terms.get(term)
+                if posting is None:
+                    posting = self._terms[term] = len(self._posting_docs)
+                    self._posting_docs.append(array("I"))
+                    self._posting_tfs.append(array("B"))
+                self._posting_docs[posting].append(doc)
+                self._posting_tfs[posting].append(min(tf, _MAX_TF))
+
+    def retag(self, _id: ObjectId, categories: list[str]) -> bool:
+        """Replace the categories of an indexed article."""
+        with self._lock:
+            doc = self._doc_numbers.get(_id.binary)
+            if doc is None:
+                return False
+            self._doc_categories[doc] = category_mask(categories)
+            return True
+
+    def discard(self, ids: list[ObjectId]):
+        """Drop articles that are no longer stored at the next refresh."""
+        with self._lock:
+            self._pending_removals.update(_id.binary for _id in ids)
+
+    def search(
+        self,
+        query: str,
+        categories: Optional[list[str]] = None,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        limit: int = 10,
+    ) -> tuple[list[tuple[ObjectId, float]], int]:
+        """Best ``limit`` matches as ``(_id, score)`` and the number of
+        matching articles.
+        """
+        terms = set(tokenize(query))
+        allowed = category_mask(categories) if categories else None
+        start_ts = _timestamp(start) if start else -math.inf
+        end_ts = _timestamp(end) if end else math.inf
+
+        with self._lock:
+            count = self._live_count
+            if not count or not terms:
+                return [], 0
+            average_length = self._total_length / count or 1.0
+            lengths = self._doc_lengths
+            k1, b = self.k1, self.b
+            scores: dict[int, float] = {}
+            for term in terms:
+                posting = self._terms.get(term)
+                if posting is None:
+                    continue
+                docs = self._posting_docs[posting]
+                idf = math.log(
+                    1 + max(count - len(docs) + 0.5, 0.5) / (len(docs) + 0.5)
+                )
+                saturation = idf * (k1 + 1)
+                norm = k1 * (1 - b)
+                scale = k1 * b / average_length
+                get = scores.get
+                for doc, tf in zip(docs, self._posting_tfs[posting]):
+                    scores[doc] = get(doc, 0.0) + saturation * tf / (
+                        tf + norm + scale * lengths[doc]
+                    )
+
+            live = self._doc_live
+            if count < len(lengths):
+                scores = {
+                    doc: score for doc, score in scores.items() if live[doc]
+                }
+            if allowed is not None or start or end:
+                categories_, dates = self._doc_categories, self._doc_dates
+                scores = {
+                    doc: score
+                    for doc, score in scores.items()
+                    if (allowed is None or categories_[doc] & allowed)
+                    and start_ts <= dates[doc] <= end_ts
+                }
+
+            best = heapq.nlargest(limit, scores.items(), key=itemgetter(1))
+            results = [
+                (
+                    ObjectId(bytes(self._doc_ids[doc * 12 : doc * 12 + 12])),
+                    score,
+                )
+                for doc, score in best
+            ]
+        return results, len(scores)
+
+    def _drop(self, doc: int):
+        # Callers hold self._lock
+        if self._doc_live[doc]:
+            self._doc_live[doc] = 0
+            self._live_count -= 1
+            self._total_length -= self._doc_lengths[doc]
+            del self._doc_numbers[
+                bytes(self._doc_ids[doc * 12 : doc * 12 + 12])
+            ]
+
+    def _drop_stale(self, cutoff: Optional[datetime]) -> int:
+        """Drop discarded articles and ones published before ``cutoff``."""
+        dropped = 0
+        with self._lock:
+            removals, self._pending_removals = self._pending_removals, set()
+            for key in removals:
+                doc = self._doc_numbers.get(key)
+                if doc is not None:
+                    self._drop(doc)
+                    dropped += 1
+        if cutoff is None:
+            return dropped
+
+        # Articles without a date have a NaN one and are kept, as in Mongo
+        cutoff_ts = _timestamp(cutoff)
+        dates, live = self._doc_dates, self._doc_live
+        expired = [
+            doc
+            for doc in range(len(dates))
+            if dates[doc] < cutoff_ts and live[doc]
+        ]
+        with self._lock:
+            for doc in expired:
+                self._drop(doc)
+        return dropped + len(expired)
+
+    def _compact(self):
+        """Rebuild the buffers without the dropped documents.
+
+        Only refreshes change the buffers, and they hold ``_refresh_lock``,
+        so the new ones are built without blocking searches and swapped in
+        at once.
+        """
+        live = self._doc_live
+        numbers = array("l", [-1]) * len(live)
+        lengths, categories, dates = array("H"), array("B"), array("d")
+        doc_ids = bytearray()
+        doc_numbers = {}
+        for doc in range(len(live)):
+            if not live[doc]:
+                continue
+            numbers[doc] = len(lengths)
+            key = bytes(self._doc_ids[doc * 12 : doc * 12 + 12])
+            doc_numbers[key] = len(lengths)
+            doc_ids += key
+            lengths.append(self._doc_lengths[doc])
+            categories.append(self._doc_categories[doc])
+            dates.append(self._doc_dates[doc])
+
+        terms, posting_docs, posting_tfs = {}, [], []
+        for term, posting in self._terms.items():
+            docs, tfs = array("I"), array("B")
+            for doc, tf in zip(
+                self._posting_docs[posting], self._posting_tfs[posting]
+            ):
+                number = numbers[doc]
+                if number >= 0:
+                    docs.append(number)
+                    tfs.append(tf)
+            if docs:
+                terms[term] = len(posting_docs)
+                posting_docs.append(docs)
+                posting_tfs.append(tfs)
+
+        with self._lock:
+            self._terms = terms
+            self._posting_docs = posting_docs
+            self._posting_tfs = posting_tfs
+            self._doc_lengths = lengths
+            self._doc_categories = categories
+            self._doc_dates = dates
+            self._doc_ids = doc_ids
+            self._doc_live = bytearray(b"\x01") * len(lengths)
+            self._doc_numbers = doc_numbers
+
+    def _add_document(self, document: dict, cutoff_ts: float) -> bool:
+        # Retired by retention, or about to be
+        if _timestamp(document.get("datePublished")) < cutoff_ts:
+            return False
+        self.add(
+            document.get("categories", []),
+            document["_id"],
+            document.get("title"),
+            document.get("description"),
+            document.get("datePublished"),
+        )
+        return True
+
+    def refresh(self):
+        """Index articles stored since the last refresh, retag the ones
+        tagged since, and drop the ones no longer stored."""
+        # One refresh at a time; a concurrent caller just skips
+        if not self._refresh_lock.acquire(blocking=False):
+            return
+        try:
+            started = datetime.now(tz=pytz.UTC)
+            cutoff = retention_cutoff()
+            cutoff_ts = _timestamp(cutoff) if cutoff else -math.inf
+            added = retagged = 0
+            for document in db_conn.get_articles_after(self._last_id):
+                self._last_id = document["_id"]
+                added += self._add_document(document, cutoff_ts)
+            # The first refresh read every article with its current tags
+            if self._updated_since is not None:
+                for document in db_conn.get_articles_updated_since(
+                    self._updated_since - _CLOCK_SKEW
+                ):
+                    if self.retag(
+                        document["_id"], document.get("categories", [])
+                    ):
+                        retagged += 1
+                    else:
+                        added += self._add_document(document, cutoff_ts)
+            self._updated_since = started
+
+            dropped = self._drop_stale(cutoff)
+            if len(self._doc_lengths) > 2 * self._live_count:
+                self._compact()
+            if added or dropped:
+                logger.info(
+                    f"Search index: {added} articles added, {retagged} "
+                    f"retagged, {dropped} dropped, {len(self)} total"
+                )
+        finally:
+            self._refresh_lock.release()
+
+    async def _loop(self):
+        while True:
+            try:
+                await run_in_threadpool(self.refresh)
+            except Exception as e:
+                logger.error(f"Search index refresh failed: {e}")
+            await asyncio.sleep(self.refresh_interval)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+
+search_index = SearchIndex()
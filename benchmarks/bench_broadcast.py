@@ -0,0 +1,96 @@
+"""Fan-out cost of the live broadcaster with thousands of subscribers.
+
+Subscribes ``--subscribers`` in-process clients spread over the six
+categories (a share also filtering on sources, a share on everything) and
+publishes ``--events`` ingested articles. Compares serializing each event
+once against serializing it per subscriber with ``json.dumps``, as calling
+``websocket.send_json`` on every connection would.
+
+    python -m benchmarks.bench_broadcast --subscribers 5000 --events 200
+"""
+
+import argparse
+import asyncio
+import json
+import random
+
+import orjson
+
+from benchmarks.common import Timer, bootstrap_env
+
+
+async def run(args):
+    from aggregator.constants import NEWS_CATEGORIES
+    from aggregator.core.broadcast import LiveBroadcaster, LiveEvent
+
+    rng = random.Random(5)
+    broadcaster = LiveBroadcaster(queue_size=args.events + 1)
+    subscribers = []
+    for index in range(args.subscribers):
+        if index % 10 == 0:
+            categories, sources = [], []
+        else:
+            categories = rng.sample(NEWS_CATEGORIES, rng.randint(1, 2))
+            sources = [f"Source {rng.randrange(12)}"] if index % 3 == 0 else []
+        subscribers.append(broadcaster.subscribe(categories, sources))
+
+    articles = [
+        {
+            "category": rng.choice(NEWS_CATEGORIES),
+            "source": f"Source {rng.randrange(12)}",
+            "title": f"Story {index} " + "word " * 12,
+            "description": "text " * 40,
+            "url": f"https://example.com/{index}",
+        }
+        for index in range(args.events)
+    ]
+
+    with Timer() as once:
+        for article in articles:
+            broadcaster.publish(
+                LiveEvent(
+                    category=article["category"],
+                    sources=frozenset([article["source"]]),
+                    text=orjson.dumps(article).decode(),
+                )
+            )
+            await asyncio.sleep(0)
+    delivered = sum(subscriber.queue.qsize() for subscriber in subscribers)
+
+    for subscriber in subscribers:
+        while not subscriber.queue.empty():
+            subscriber.queue.get_nowait()
+
+    with Timer() as naive:
+        for article in articles:
+            for subscriber in subscribers:
+                if (
+                    not subscriber.categories
+                    or article["category"] in subscriber.categories
+                ) and (
+                    not subscriber.sources
+                    or article["source"] in subscriber.sources
+                ):
+                    subscriber.queue.put_nowait(json.dumps(article))
+            await asyncio.sleep(0)
+
+    print(f"{delivered} deliveries to {args.subscribers} subscribers")
+    for name, timer in (("serialize once", once), ("per subscriber", naive)):
+        print(
+            f"{name:<16} {timer.elapsed / args.events * 1e3:>8.3f} ms/event "
+            f"{timer.elapsed / max(delivered, 1) * 1e6:>8.3f} us/delivery"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--subscribers", type=int, default=5000)
+    parser.add_argument("--events", type=int, default=200)
+    args = parser.parse_args()
+
+    bootstrap_env()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
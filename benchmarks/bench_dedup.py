@@ -0,0 +1,97 @@
+"""Article deduplication at request and ingestion scale.
+
+Generates synthetic Mediastack-shaped articles where a share are exact
+duplicates under a different URL (tracking params, ``www.``, trailing
+slash) and a share are near duplicates (one headline word dropped or
+changed). Compares the legacy list-membership ``remove_duplicates`` with
+the MinHash engine in ``aggregator.utils.dedup``.
+
+    python -m benchmarks.bench_dedup --sizes 10000 50000 100000
+"""
+
+import argparse
+import random
+
+from benchmarks.common import Timer, bootstrap_env
+
+
+def legacy_remove_duplicates(data):
+    unique_data = []
+    for article in data:
+        if article not in unique_data:
+            unique_data.append(article)
+    return unique_data
+
+
+def generate(size, exact_share=0.15, near_share=0.10, seed=7):
+    rng = random.Random(seed)
+    vocabulary = [f"word{index}" for index in range(5000)]
+    originals = int(size * (1 - exact_share - near_share))
+    articles = []
+    for index in range(originals):
+        articles.append(
+            {
+                "url": f"https://news{index % 40}.example.com/story/{index}",
+                "title": " ".join(rng.choices(vocabulary, k=12)),
+                "description": " ".join(rng.choices(vocabulary, k=25)),
+                "source": f"Source {index % 40}",
+            }
+        )
+
+    duplicates = []
+    for _ in range(int(size * exact_share)):
+        article = dict(rng.choice(articles))
+        article["url"] = (
+            article["url"].replace("https://", "http://www.")
+            + f"/?utm_source=feed{rng.randint(0, 9)}&fbclid=x"
+        )
+        duplicates.append(article)
+    for _ in range(size - originals - len(duplicates)):
+        article = dict(rng.choice(articles))
+        words = article["title"].split()
+        words[rng.randrange(len(words))] = rng.choice(vocabulary)
+        article["title"] = " ".join(words)
+        article["url"] = article["url"].replace("story", "syndicated")
+        duplicates.append(article)
+
+    mixed = articles + duplicates
+    rng.shuffle(mixed)
+    return mixed, originals
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[10000, 50000, 100000]
+    )
+    parser.add_argument(
+        "--legacy-max",
+        type=int,
+        default=10000,
+        help="largest size the quadratic legacy path is run at",
+    )
+    args = parser.parse_args()
+
+    bootstrap_env()
+    from aggregator.utils.dedup import dedupe_articles
+
+    print(f"{'size':>8} {'impl':<8} {'seconds':>9} {'kept':>8} {'expected':>9}")
+    for size in args.sizes:
+        articles, originals = generate(size)
+        if size <= args.legacy_max:
+            with Timer() as timer:
+                kept = legacy_remove_duplicates(articles)
+            print(
+                f"{size:>8} {'legacy':<8} {timer.elapsed:>9.3f} "
+                f"{len(kept):>8} {originals:>9}"
+            )
+        with Timer() as timer:
+            kept = dedupe_articles(articles)
+        print(
+            f"{size:>8} {'minhash':<8} {timer.elapsed:>9.3f} "
+            f"{len(kept):>8} {originals:>9}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""Latency of unrelated requests while a burst of logins is in flight.
+
+A probe client calls ``/news/nse-companies/search`` every 10 ms and
+records its latency, first on an idle app and then while ``--logins``
+concurrent clients keep posting to ``/user/token``. It runs against:
+
+* legacy: the old login route, verifying Argon2 on the event loop.
+* pooled: the app's login route, verifying in the password hashing pool.
+
+The app is driven in-process over ASGI, so the probe shares the event loop
+with the logins exactly as it would inside one uvicorn worker. Mongo is
+replaced by mongomock.
+
+    python -m benchmarks.bench_login_storm --logins 16 --duration 5
+"""
+
+import argparse
+import asyncio
+import time
+
+from benchmarks.common import (
+    bootstrap_env,
+    print_summary,
+    summarize,
+    use_database,
+)
+
+EMAIL = "storm@example.com"
+PASSWORD = "correct horse battery staple"
+
+
+def build_legacy_app():
+    from fastapi import Depends
+    from fastapi.security import OAuth2PasswordRequestForm
+
+    from aggregator.core import UnauthorizedException
+    from aggregator.main import create_app
+    from aggregator.schemas import UserInDB
+    from aggregator.utils.auth import create_access_token, get_user
+    from aggregator.utils.passwords import password_hasher
+
+    def legacy_verify_password(plain_password, hashed_password):
+        # Blocking Argon2 verify on the event loop, as logins used to do
+        return password_hasher.context.verify(plain_password, hashed_password)
+
+    async def legacy_authenticate_user(email, password):
+        user = UserInDB(**await get_user(email))
+        if not legacy_verify_password(password, user.hashedPassword):
+            return False
+        return user
+
+    app = create_app()
+    # Replace the pooled login route with the old blocking one
+    app.router.routes = [
+        route
+        for route in app.router.routes
+        if getattr(route, "path", None) != "/user/token"
+    ]
+
+    @app.post("/user/token")
+    async def login_for_access_token(
+        form_data: OAuth2PasswordRequestForm = Depends(),
+    ):
+        user = await legacy_authenticate_user(
+            form_data.username, form_data.password
+        )
+        if not user:
+            raise UnauthorizedException()
+        return {"access_token": create_access_token({"sub": user.email})}
+
+    return app
+
+
+async def probe(client, stop, latencies, interval=0.01):
+    # Fixed schedule, latency measured from the intended send time, so a
+    # stalled event loop shows up as latency instead of as fewer samples
+    intended = time.perf_counter()
+    while not stop.is_set():
+        intended += interval
+        await asyncio.sleep(max(0.0, intended - time.perf_counter()))
+        response = await client.get(
+            "/news/nse-companies/search", params={"q": "tata"}
+        )
+        response.raise_for_status()
+        latencies.append(time.perf_counter() - intended)
+
+
+async def login(client, stop, latencies):
+    while not stop.is_set():
+        start = time.perf_counter()
+        response = await client.post(
+            "/user/token", data={"username": EMAIL, "password": PASSWORD}
+        )
+        response.raise_for_status()
+        latencies.append(time.perf_counter() - start)
+
+
+async def run(name, app, logins, duration):
+    import httpx
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://bench", timeout=None
+    ) as client:
+        stop = asyncio.Event()
+        probe_latencies, login_latencies = [], []
+        tasks = [asyncio.create_task(probe(client, stop, probe_latencies))]
+        tasks += [
+            asyncio.create_task(login(client, stop, login_latencies))
+            for _ in range(logins)
+        ]
+        started = time.perf_counter()
+        await asyncio.sleep(duration)
+        stop.set()
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - started
+
+    print_summary(summarize(f"{name} probe", probe_latencies, elapsed))
+    if logins:
+        print_summary(summarize(f"{name} login", login_latencies, elapsed))
+
+
+async def main(args):
+    import httpx
+
+    from aggregator.main import create_app
+    from aggregator.utils.nse import nse_index
+    from aggregator.utils.passwords import password_hasher
+
+    use_database("bench")
+    nse_index.load()
+    await password_hasher.start()
+
+    app = create_app()
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app), base_url="http://bench"
+    ) as client:
+        response = await client.post(
+            "/user/register", json={"email": EMAIL, "password": PASSWORD}
+        )
+        response.raise_for_status()
+
+    await run("idle", app, 0, args.duration)
+    await run("legacy", build_legacy_app(), args.logins, args.duration)
+    await run("pooled", app, args.logins, args.duration)
+    password_hasher.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--logins", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=5.0)
+    args = parser.parse_args()
+
+    bootstrap_env()
+    asyncio.run(main(args))
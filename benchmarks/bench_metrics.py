@@ -0,0 +1,78 @@
+"""Cost of recording a latency in the metrics histograms.
+
+Each of ``--threads`` threads records ``--observations`` latencies into one
+histogram child, as sync routes and DB calls in the threadpool do. Compares
+the per-thread shards in ``aggregator.core.metrics`` with a histogram that
+takes a lock per observation, which is how Prometheus client values are
+guarded, and checks that no observation is lost.
+
+    python -m benchmarks.bench_metrics --threads 8 --observations 200000
+"""
+
+import argparse
+import random
+import threading
+from bisect import bisect_left
+
+from benchmarks.common import Timer, bootstrap_env
+
+
+class LockedHistogram:
+    def __init__(self, bounds):
+        self._bounds = bounds
+        self._counts = [0] * (len(bounds) + 1)
+        self._sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        with self._lock:
+            self._counts[bisect_left(self._bounds, value)] += 1
+            self._sum += value
+
+    def count(self):
+        return sum(self._counts)
+
+
+def run(child, threads, values):
+    def work():
+        observe = child.observe
+        for value in values:
+            observe(value)
+
+    workers = [threading.Thread(target=work) for _ in range(threads)]
+    with Timer() as timer:
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+    return timer.elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--observations", type=int, default=200000)
+    args = parser.parse_args()
+
+    bootstrap_env()
+    from aggregator.core.metrics import DEFAULT_BUCKETS, Histogram
+
+    rng = random.Random(1)
+    values = [rng.lognormvariate(-4, 1.5) for _ in range(args.observations)]
+    total = args.threads * args.observations
+
+    sharded = Histogram("bench_sharded_seconds", "bench").labels()
+    locked = LockedHistogram(DEFAULT_BUCKETS)
+    for name, child, count in (
+        ("sharded", sharded, lambda: sum(sharded.totals()[:-1])),
+        ("locked", locked, locked.count),
+    ):
+        elapsed = run(child, args.threads, values)
+        print(
+            f"{name:<8} {elapsed / total * 1e9:>7.0f} ns/observation "
+            f"{count()}/{total} recorded"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+"""Decode and normalize time per 100-article provider payload.
+
+Payloads are built once as bytes, like the body the HTTP client reads, for
+NewsAPI, Mediastack and an rss.app feed. For each provider:
+
+* legacy: ``json.loads`` the body as often as the route used to call
+  ``response.json()`` on it (3 times for NewsAPI, 2 for Mediastack, once
+  for a feed) and map the articles with the old per-provider dict
+  rebuilding, or straight into ``NewsArticle`` for a feed.
+* adapter: decode once with orjson into ``ArticleRecord``s through the
+  provider adapter, then build the response listings, or the
+  ``NewsArticle``s ingestion stores.
+
+    python -m benchmarks.bench_providers --iterations 2000
+"""
+
+import argparse
+import json
+from datetime import datetime, timedelta
+
+import pytz
+
+from benchmarks.common import Timer, bootstrap_env
+from benchmarks.fake_upstream import (
+    feed_item,
+    mediastack_article,
+    newsapi_article,
+)
+
+
+def payloads(count):
+    return {
+        "newsapi": json.dumps(
+            {
+                "status": "ok",
+                "totalResults": count,
+                "articles": [newsapi_article(index) for index in range(count)],
+            }
+        ).encode(),
+        "mediastack": json.dumps(
+            {
+                "pagination": {"limit": 100, "total": count},
+                "data": [mediastack_article(index) for index in range(count)],
+            }
+        ).encode(),
+        "rssapp": json.dumps(
+            {
+                "version": "1.1",
+                "items": [
+                    feed_item("general", index) for index in range(count)
+                ],
+            }
+        ).encode(),
+    }
+
+
+def legacy_relative_time(published_at):
+    article_time = datetime.fromisoformat(
+        published_at.replace("Z", "+00:00")
+    ).replace(tzinfo=pytz.UTC)
+    time_difference = datetime.now(tz=pytz.UTC) - article_time
+    if time_difference < timedelta(minutes=1):
+        return "just now"
+    elif time_difference < timedelta(hours=1):
+        return f"{int(time_difference.total_seconds() // 60)} mins ago"
+    elif time_difference < timedelta(days=1):
+        return f"{int(time_difference.total_seconds() // 3600)} hours ago"
+    return f"{time_difference.days} days ago"
+
+
+def legacy_newsapi(content):
+    json.loads(content)["totalResults"]
+    json.loads(content)["totalResults"]
+    return [
+        {
+            "source": article["source"],
+            "author": article["author"],
+            "title": article["title"],
+            "description": article["description"],
+            "url": article["url"],
+            "urlToImage": article["urlToImage"],
+            "publishedAt": legacy_relative_time(article["publishedAt"]),
+            "content": article["content"],
+            "category": None,
+            "language": None,
+            "country": None,
+        }
+        for article in json.loads(content)["articles"]
+    ]
+
+
+def legacy_mediastack(content):
+    json.loads(content)["pagination"]["total"]
+    return [
+        {
+            "source": article["source"],
+            "author": article["author"],
+            "title": article["title"],
+            "description": article["description"],
+            "url": article["url"],
+            "urlToImage": article["image"],
+            "publishedAt": legacy_relative_time(article["published_at"]),
+            "country": article["country"],
+            "language": article["language"],
+            "content": None,
+            "category": article["category"],
+        }
+        for article in json.loads(content)["data"]
+    ]
+
+
+def legacy_rssapp(content):
+    from aggregator.schemas import Attachment, Author, NewsArticle
+
+    return [
+        NewsArticle(
+            url=article["url"],
+            title=article["title"],
+            description=article["content_text"],
+            contentHtml=article["content_html"],
+            imageUrl=article["image"],
+            datePublished=article["date_published"],
+            source=[
+                Author(name=author["name"]) for author in article["authors"]
+            ],
+            attachments=[
+                Attachment(url=attachment["url"])
+                for attachment in article.get("attachments", [])
+            ],
+        )
+        for article in json.loads(content).get("items", [])
+    ]
+
+
+def adapters():
+    from aggregator.providers import get_provider
+    from aggregator.utils.articles import news_article
+
+    def listings(name):
+        provider = get_provider(name)
+        return lambda content: provider.page(200, content).listings()
+
+    rssapp = get_provider("rssapp")
+    return {
+        "newsapi": listings("newsapi"),
+        "mediastack": listings("mediastack"),
+        "rssapp": lambda content: [
+            news_article(record) for record in rssapp.page(200, content).records
+        ],
+    }
+
+
+def measure(function, content, iterations):
+    function(content)  # Warm up
+    with Timer() as timer:
+        for _ in range(iterations):
+            result = function(content)
+    return timer.elapsed / iterations * 1e6, len(result)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--articles", type=int, default=100)
+    args = parser.parse_args()
+
+    bootstrap_env()
+    legacy = {
+        "newsapi": legacy_newsapi,
+        "mediastack": legacy_mediastack,
+        "rssapp": legacy_rssapp,
+    }
+    adapted = adapters()
+
+    print(
+        f"{'provider':<12} {'bytes':>8} {'legacy us':>10} "
+        f"{'adapter us':>11} {'speedup':>8} {'articles':>9}"
+    )
+    for name, content in payloads(args.articles).items():
+        legacy_us, count = measure(legacy[name], content, args.iterations)
+        adapter_us, adapted_count = measure(
+            adapted[name], content, args.iterations
+        )
+        assert adapted_count == count, (name, adapted_count, count)
+        print(
+            f"{name:<12} {len(content):>8} {legacy_us:>10.1f} "
+            f"{adapter_us:>11.1f} {legacy_us / adapter_us:>7.2f}x {count:>9}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""Build time, memory and query latency of the local search index.
+
+Indexes ``--articles`` synthetic articles (12-word titles, 30-word
+descriptions drawn from a Zipf-distributed vocabulary, like real news text)
+directly into ``SearchIndex`` and times a mix of queries: rare, mid and
+common terms, multi-term, and with category and date filters.
+
+    python -m benchmarks.bench_search --articles 1000000
+"""
+
+import argparse
+import random
+import resource
+import time
+from datetime import datetime, timedelta
+
+from benchmarks.common import Timer, bootstrap_env, percentile
+
+
+def vocabulary_sampler(size, seed):
+    rng = random.Random(seed)
+    words = [f"w{index}" for index in range(size)]
+    weights = [1 / (rank + 1) for rank in range(size)]
+    cumulative, total = [], 0.0
+    for weight in weights:
+        total += weight
+        cumulative.append(total)
+
+    def sample(k):
+        return " ".join(rng.choices(words, cum_weights=cumulative, k=k))
+
+    return rng, sample
+
+
+def rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--articles", type=int, default=1000000)
+    parser.add_argument("--vocabulary", type=int, default=50000)
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    bootstrap_env()
+    from bson import ObjectId
+
+    from aggregator.constants import NEWS_CATEGORIES
+    from aggregator.utils.search import SearchIndex
+
+    rng, sample = vocabulary_sampler(args.vocabulary, seed=3)
+    index = SearchIndex()
+    epoch = datetime(2024, 1, 1)
+    before = rss_mb()
+    with Timer() as timer:
+        for _ in range(args.articles):
+            index.add(
+                [rng.choice(NEWS_CATEGORIES)],
+                ObjectId(),
+                sample(12),
+                sample(30),
+                epoch + timedelta(minutes=rng.randrange(365 * 24 * 60)),
+            )
+    print(
+        f"indexed {len(index)} articles in {timer.elapsed:.1f}s, "
+        f"{len(index._terms)} terms, ~{rss_mb() - before:.0f} MB"
+    )
+
+    mixes = {
+        "rare term": lambda: f"w{rng.randrange(20000, args.vocabulary)}",
+        "mid term": lambda: f"w{rng.randrange(1000, 5000)}",
+        "common term": lambda: f"w{rng.randrange(10, 100)}",
+        "3 terms": lambda: " ".join(
+            f"w{rng.randrange(100, args.vocabulary)}" for _ in range(3)
+        ),
+    }
+    filters = {
+        "": {},
+        " +category": {"categories": ["sports", "business"]},
+        " +dates": {
+            "start": epoch + timedelta(days=30),
+            "end": epoch + timedelta(days=60),
+        },
+    }
+    print(f"{'query':<26} {'p50 ms':>8} {'p99 ms':>8} {'matches':>9}")
+    for name, make_query in mixes.items():
+        for suffix, kwargs in filters.items():
+            latencies, matches = [], 0
+            for _ in range(args.queries):
+                query = make_query()
+                start = time.perf_counter()
+                _, total = index.search(query, limit=10, **kwargs)
+                latencies.append(time.perf_counter() - start)
+                matches += total
+            print(
+                f"{name + suffix:<26} {percentile(latencies, 50) * 1e3:>8.2f} "
+                f"{percentile(latencies, 99) * 1e3:>8.2f} "
+                f"{matches // args.queries:>9}"
+            )
+
+
+if __name__ == "__main__":
+    main()
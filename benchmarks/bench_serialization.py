@@ -0,0 +1,135 @@
+"""CPU time per /news/ response, before and after the fast serialization path.
+
+Both routes serve the same 75 stored articles from memory, so the numbers
+only measure normalization, validation and JSON encoding:
+
+* legacy: rebuild every dict, recompute relative times with a fresh
+  ``datetime.now`` per article, validate through ``Paginate[Article]`` and
+  let FastAPI validate and encode the response again.
+* fast: merge the listing shape precomputed at ingest with one ``now`` per
+  request and encode with orjson, no re-validation.
+
+    python -m benchmarks.bench_serialization --iterations 2000
+"""
+
+import argparse
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from benchmarks.common import Timer, bootstrap_env
+from benchmarks.fake_upstream import feed_item
+
+
+def stored_articles(count, category="general"):
+    from aggregator.utils.articles import parse_feed_items
+    from aggregator.utils.helper import listing_fields
+
+    documents = []
+    for article in parse_feed_items(
+        [feed_item(category, index) for index in range(count)]
+    ):
+        document = article.dict()
+        document["listing"] = listing_fields(article)
+        document["categories"] = [category]
+        documents.append(document)
+    return documents
+
+
+class InMemoryCursor:
+    """Stands in for the motor cursor the route reads."""
+
+    def __init__(self, documents):
+        self.documents = documents
+
+    async def to_list(self, length):
+        return self.documents[:length]
+
+
+def build_legacy_app(documents):
+    from fastapi import FastAPI
+
+    from aggregator.models.news import Article
+    from aggregator.paginate import Paginate
+    from aggregator.utils.helper import get_relative_time
+
+    app = FastAPI()
+
+    def legacy_fix_feed_articles(data):
+        return [
+            {
+                "source": article["source"][0]["name"]
+                if article["source"]
+                else None,
+                "author": None,
+                "title": article["title"],
+                "description": article["description"],
+                "url": article["url"],
+                "urlToImage": article["imageUrl"],
+                "publishedAt": get_relative_time(article["datePublished"]),
+                "content": article["contentHtml"],
+                "category": "general",
+                "language": None,
+                "country": None,
+            }
+            for article in data
+        ]
+
+    @app.post("/news/", response_model=Paginate[Article])
+    def get_live_news(page: int = 1, perPage: int = 10):
+        data = legacy_fix_feed_articles(documents)
+        return Paginate[Article](
+            results=data, total=len(data), page=page, perPage=perPage
+        )
+
+    return app
+
+
+async def measure(app, iterations):
+    import httpx
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://bench"
+    ) as client:
+        for _ in range(50):
+            (await client.post("/news/?perPage=75")).raise_for_status()
+        with Timer() as timer:
+            for _ in range(iterations):
+                response = await client.post("/news/?perPage=75")
+    return timer.elapsed / iterations, len(response.content)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--articles", type=int, default=75)
+    args = parser.parse_args()
+
+    bootstrap_env()
+    from aggregator.core.db import async_db_conn
+    from aggregator.main import create_app
+
+    documents = stored_articles(args.articles)
+    now = datetime.now(tz=timezone.utc)
+    for index, document in enumerate(documents):
+        document["datePublished"] = now - timedelta(minutes=13 * index)
+
+    # Serve from memory so only the response path is measured
+    async_db_conn.find_news = lambda categories, limit, cursor, fields: (
+        InMemoryCursor(documents[:limit])
+    )
+
+    results = {}
+    for name, app in (
+        ("legacy", build_legacy_app(documents)),
+        ("fast", create_app()),
+    ):
+        results[name] = asyncio.run(measure(app, args.iterations))
+        seconds, size = results[name]
+        print(f"{name:<8} {seconds * 1e3:>8.3f} ms/response  {size:>7} bytes")
+
+    print(f"speedup: {results['legacy'][0] / results['fast'][0]:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
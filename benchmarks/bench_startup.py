@@ -0,0 +1,125 @@
+"""Cold start of a worker: import time and time to the first response.
+
+Each run starts a fresh interpreter, so nothing is shared between runs:
+
+* import: ``import aggregator.main`` alone, with ``MONGO_DB_URL`` pointing
+  at an unroutable address, so any import-time I/O shows up as a hang.
+* first request: the app under uvicorn in a child process, timed from
+  process start until the port accepts connections (lifespan done), then
+  the latency of the first and second ``/news/`` requests.
+
+Mongo is replaced by mongomock unless ``--mongo-url`` is given.
+
+    python -m benchmarks.bench_startup --runs 5
+"""
+
+import argparse
+import multiprocessing
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import Optional
+
+from benchmarks.common import DEFAULT_ENV, use_database
+from benchmarks.fake_upstream import _free_port, _wait_for_port
+
+UNROUTABLE_MONGO = "mongodb://10.255.255.1:27017/?connectTimeoutMS=2000"
+IMPORT_TIMEOUT = 30
+
+
+def measure_import() -> float:
+    env = {
+        **os.environ,
+        **DEFAULT_ENV,
+        "MONGO_DB_URL": UNROUTABLE_MONGO,
+        "PYTHONWARNINGS": "ignore",
+    }
+    code = (
+        "import time; started = time.perf_counter(); import aggregator.main; "
+        "print(time.perf_counter() - started)"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        env=env,
+        capture_output=True,
+        text=True,
+        timeout=IMPORT_TIMEOUT,
+        check=True,
+    )
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def serve_app(port: int, mongo_url: Optional[str]):
+    """Child process: serve the app, with Mongo swapped for a stand-in."""
+    # Only startup is measured, not ingestion
+    os.environ.update({**DEFAULT_ENV, "INGEST_SCHEDULER_ENABLED": "False"})
+    import uvicorn
+
+    from aggregator.main import app
+
+    use_database("aggregator_bench_startup", mongo_url)
+    uvicorn.run(app, host="127.0.0.1", port=port, log_level="warning")
+
+
+def measure_first_request(mongo_url: Optional[str]) -> dict:
+    import httpx
+
+    port = _free_port()
+    server = multiprocessing.get_context("spawn").Process(
+        target=serve_app, args=(port, mongo_url)
+    )
+    started = time.perf_counter()
+    server.start()
+    try:
+        _wait_for_port(port, timeout=120)
+        ready = time.perf_counter() - started
+        latencies = []
+        with httpx.Client(base_url=f"http://127.0.0.1:{port}") as client:
+            for _ in range(2):
+                request_started = time.perf_counter()
+                client.get("/news/", params={"perPage": 20}).raise_for_status()
+                latencies.append(time.perf_counter() - request_started)
+    finally:
+        server.terminate()
+        server.join(timeout=5)
+    return {
+        "ready": ready,
+        "first": latencies[0],
+        "second": latencies[1],
+        "total": ready + latencies[0],
+    }
+
+
+def report(name: str, samples: list[float]):
+    print(
+        f"{name:<32} median {statistics.median(samples) * 1000:>8.1f} ms  "
+        f"min {min(samples) * 1000:>8.1f} ms  "
+        f"max {max(samples) * 1000:>8.1f} ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawTextHelpFormatter
+    )
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument(
+        "--mongo-url", help="local mongod to use instead of mongomock"
+    )
+    args = parser.parse_args()
+
+    report(
+        "import aggregator.main", [measure_import() for _ in range(args.runs)]
+    )
+
+    runs = [measure_first_request(args.mongo_url) for _ in range(args.runs)]
+    report("process start to listening", [run["ready"] for run in runs])
+    report("first /news/ request", [run["first"] for run in runs])
+    report("second /news/ request", [run["second"] for run in runs])
+    report("process start to first response", [run["total"] for run in runs])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""Throughput of /news/sources/ against a local fake NewsAPI.
+
+Compares the legacy route shape (sync ``def`` calling module-level
+``requests.get`` on the threadpool, new TCP connection per call) with the
+async route on the shared pooled ``http_client`` (aiohttp). Upstream usage
+is counted in Mongo, ``--mongo-url`` or mongomock.
+
+    python -m benchmarks.bench_upstream_client --requests 2000 --concurrency 200
+"""
+
+import argparse
+import asyncio
+
+from benchmarks.common import (
+    Timer,
+    bootstrap_env,
+    print_summary,
+    summarize,
+    use_database,
+)
+from benchmarks.fake_upstream import FakeUpstream
+
+
+async def drive(app, path, total, concurrency):
+    import httpx
+
+    latencies = []
+    queue = asyncio.Queue()
+    for _ in range(total):
+        queue.put_nowait(None)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://bench"
+    ) as client:
+
+        async def worker():
+            while not queue.empty():
+                queue.get_nowait()
+                with Timer() as timer:
+                    response = await client.get(path)
+                response.raise_for_status()
+                latencies.append(timer.elapsed)
+
+        with Timer() as timer:
+            await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, timer.elapsed
+
+
+def build_legacy_app(upstream_url):
+    import requests
+    from fastapi import FastAPI
+
+    from aggregator.models.news import Source
+    from aggregator.paginate import Paginate
+
+    app = FastAPI()
+
+    @app.get("/news/sources/", response_model=Paginate[Source])
+    def get_news_sources(page: int = 1, perPage: int = 10):
+        response = requests.get(
+            f"{upstream_url}/v2/top-headlines/sources",
+            params={"apiKey": "bench", "language": "en"},
+        )
+        return Paginate[Source](
+            results=response.json()["sources"],
+            total=len(response.json()["sources"]),
+            page=page,
+            perPage=perPage,
+        )
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.1)
+    parser.add_argument(
+        "--mongo-url", help="local mongod to use instead of mongomock"
+    )
+    args = parser.parse_args()
+
+    with FakeUpstream(latency=args.latency, articles=10) as upstream:
+        bootstrap_env(NEWS_API_URL=f"{upstream.url}/v2")
+        use_database("aggregator_bench_upstream_client", args.mongo_url)
+
+        from aggregator.core.http import http_client
+        from aggregator.main import create_app
+
+        app = create_app()
+        legacy = build_legacy_app(upstream.url)
+
+        async def run():
+            results = []
+            for name, target in (
+                ("legacy requests.get", legacy),
+                ("pooled async", app),
+            ):
+                latencies, elapsed = await drive(
+                    target, "/news/sources/", args.requests, args.concurrency
+                )
+                results.append(summarize(name, latencies, elapsed))
+            await http_client.close()
+            return results
+
+        results = asyncio.run(run())
+
+    for result in results:
+        print_summary(result)
+    print(f"speedup: {results[1]['rps'] / results[0]['rps']:.2f}x req/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""Shared helpers for the benchmark scripts.
+
+The aggregator reads its settings from the environment at import time, so
+``bootstrap_env`` must run before anything from ``aggregator`` is imported.
+"""
+
+import os
+import statistics
+import time
+from typing import Optional
+
+DEFAULT_ENV = {
+    "NEWS_API_KEY": "bench",
+    "MEDIASTACK_API_KEY": "bench",
+    "MONGO_DB_URL": "mongodb://127.0.0.1:27017",
+    "SECRET_KEY": "bench-secret",
+    "GENERAL_FEED_URL": "http://127.0.0.1/feeds/general.json",
+    "POLITICS_FEED_URL": "http://127.0.0.1/feeds/politics.json",
+    "BUSINESS_FEED_URL": "http://127.0.0.1/feeds/business.json",
+    "SCIENCE_TECHNOLOGY_FEED_URL": "http://127.0.0.1/feeds/scienceandtechnology.json",
+    "SPORTS_FEED_URL": "http://127.0.0.1/feeds/sports.json",
+    "ENTERTAINMENT_FEED_URL": "http://127.0.0.1/feeds/entertainment.json",
+    # Unmetered, so the load suite measures the endpoints, not the budgets
+    "NEWS_API_DAILY_QUOTA": "0",
+    "NEWS_API_MINUTE_QUOTA": "0",
+    "MEDIASTACK_DAILY_QUOTA": "0",
+    "MEDIASTACK_MINUTE_QUOTA": "0",
+}
+
+
+def bootstrap_env(**overrides):
+    for key, value in {**DEFAULT_ENV, **overrides}.items():
+        os.environ.setdefault(key, str(value))
+
+
+def percentile(samples, pct):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def summarize(name, latencies, elapsed):
+    return {
+        "name": name,
+        "requests": len(latencies),
+        "rps": len(latencies) / elapsed if elapsed else 0.0,
+        "mean_ms": statistics.fmean(latencies) * 1000 if latencies else 0.0,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+    }
+
+
+def print_summary(result):
+    print(
+        f"{result['name']:<32} {result['requests']:>7} req "
+        f"{result['rps']:>10.1f} req/s  p50 {result['p50_ms']:>8.2f} ms  "
+        f"p95 {result['p95_ms']:>8.2f} ms  p99 {result['p99_ms']:>8.2f} ms"
+    )
+
+
+class Timer:
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.elapsed = time.perf_counter() - self.start
+
+
+def use_database(db_name: str, mongo_url: Optional[str] = None):
+    """Point the app's sync and async Mongo clients at ``db_name`` on
+    ``mongo_url``, or at one mongomock store shared by both."""
+    from aggregator.core.db import async_db_conn, db_conn
+
+    if mongo_url:
+        from motor.motor_asyncio import AsyncIOMotorClient
+        from pymongo import MongoClient
+
+        db_conn.db = MongoClient(mongo_url)[db_name]
+        async_db_conn.db = AsyncIOMotorClient(mongo_url)[db_name]
+    else:
+        import mongomock
+        from mongomock_motor import AsyncMongoMockClient
+
+        client = mongomock.MongoClient()
+        db_conn.db = client[db_name]
+        async_db_conn.db = AsyncMongoMockClient(mock_mongo_client=client)[
+            db_name
+        ]
+    return db_conn.db
@@ -0,0 +1,258 @@
+"""Local stand-ins for NewsAPI, Mediastack and the rss.app JSON feeds.
+
+The servers run uvicorn in a child process so benchmarks can point the
+aggregator at ``http://127.0.0.1:<port>`` instead of the paid providers.
+Latency is injected per request with ``asyncio.sleep`` so the fake itself
+never becomes the bottleneck.
+"""
+
+import asyncio
+import multiprocessing
+import random
+import socket
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+
+CATEGORIES = [
+    "general",
+    "politics",
+    "business",
+    "scienceandtechnology",
+    "sports",
+    "entertainment",
+]
+WORDS = [
+    "markets", "rally", "budget", "election", "monsoon", "cricket", "startup",
+    "policy", "court", "verdict", "launch", "satellite", "film", "festival",
+    "inflation", "rupee", "exports", "rail", "airport", "summit", "vaccine",
+    "merger", "earnings", "strike", "flood", "reform", "tariff", "league",
+]  # fmt: skip
+VOCABULARY = [f"{word}{n}" for word in WORDS for n in range(20)]
+
+
+def _headline(seed: str, index: int, words: int = 8) -> str:
+    rng = random.Random(f"{seed}-{index}")
+    return " ".join(rng.sample(VOCABULARY, words)).capitalize()
+
+
+def _published(index: int) -> datetime:
+    return datetime.now(tz=timezone.utc) - timedelta(minutes=7 * index)
+
+
+def newsapi_article(index: int) -> dict:
+    return {
+        "source": {
+            "id": f"source-{index % 20}",
+            "name": f"Source {index % 20}",
+        },
+        "author": f"Author {index % 50}",
+        "title": f"Markets move on story number {index}",
+        "description": f"Description for story number {index}",
+        "url": f"https://news.example.com/story/{index}?utm_source=feed",
+        "urlToImage": f"https://img.example.com/{index}.jpg",
+        "publishedAt": _published(index).strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "content": f"Body of story number {index}",
+    }
+
+
+def mediastack_article(index: int, keyword: str = "") -> dict:
+    return {
+        "source": f"Source {index % 20}",
+        "author": f"Author {index % 50}",
+        "title": f"{keyword} live story number {index}".strip(),
+        "description": f"Description for live story number {index}",
+        "url": f"https://live.example.com/{keyword or 'story'}/{index}",
+        "image": f"https://img.example.com/live/{index}.jpg",
+        "published_at": _published(index).strftime("%Y-%m-%dT%H:%M:%S+00:00"),
+        "country": "in",
+        "language": "en",
+        "category": "business",
+    }
+
+
+def feed_item(category: str, index: int) -> dict:
+    return {
+        "id": f"{category}-{index}",
+        "url": f"https://feeds.example.com/{category}/{index}",
+        "title": _headline(category, index),
+        "content_text": _headline(f"{category}-summary", index, words=14),
+        "content_html": f"<div><p>{category} body {index}</p></div>" * 20,
+        "image": f"https://img.example.com/{category}/{index}.jpg",
+        "date_published": _published(index).strftime("%Y-%m-%dT%H:%M:%S.000Z"),
+        "authors": [{"name": f"Source {index % 12}"}],
+        "attachments": [
+            {"url": f"https://img.example.com/{category}/{index}.jpg"}
+        ],
+    }
+
+
+class FakeUpstream:
+    """Configurable fake provider server.
+
+    Args:
+        latency (float): seconds added to every response.
+        jitter (float): extra uniformly distributed latency in seconds.
+        error_rate (float): fraction of requests answered with a 500.
+        articles (int): number of articles per response.
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.02,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        articles: int = 100,
+    ):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.articles = articles
+        self._hits = multiprocessing.get_context("spawn").Value("i", 0)
+        self.port = _free_port()
+        self._runner = None
+
+    def build_app(self) -> Starlette:
+        return Starlette(
+            routes=[
+                Route("/v2/top-headlines/sources", self.newsapi_sources),
+                Route("/v2/{endpoint}", self.newsapi_articles),
+                Route("/v1/{endpoint}", self.mediastack_articles),
+                Route("/feeds/{category}.json", self.rss_feed),
+            ]
+        )
+
+    @property
+    def hits(self) -> int:
+        return self._hits.value
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    async def _delay(self):
+        with self._hits.get_lock():
+            self._hits.value += 1
+        delay = self.latency + random.uniform(0, self.jitter)
+        if delay:
+            await asyncio.sleep(delay)
+        if self.error_rate and random.random() < self.error_rate:
+            return JSONResponse({"error": "injected failure"}, status_code=500)
+        return None
+
+    async def newsapi_sources(self, request):
+        if error := await self._delay():
+            return error
+        sources = [
+            {
+                "id": f"source-{index}",
+                "name": f"Source {index}",
+                "url": f"https://source{index}.example.com",
+                "description": f"Source number {index}",
+                "category": "general",
+                "language": "en",
+                "country": "in",
+            }
+            for index in range(self.articles)
+        ]
+        return JSONResponse({"status": "ok", "sources": sources})
+
+    async def newsapi_articles(self, request):
+        if error := await self._delay():
+            return error
+        articles = [newsapi_article(index) for index in range(self.articles)]
+        return JSONResponse(
+            {
+                "status": "ok",
+                "totalResults": len(articles),
+                "articles": articles,
+            }
+        )
+
+    async def mediastack_articles(self, request):
+        if error := await self._delay():
+            return error
+        keyword = request.query_params.get("keywords", "")
+        data = [
+            mediastack_article(index, keyword) for index in range(self.articles)
+        ]
+        return JSONResponse(
+            {
+                "pagination": {
+                    "limit": 100,
+                    "offset": 0,
+                    "count": len(data),
+                    "total": len(data),
+                },
+                "data": data,
+            }
+        )
+
+    async def rss_feed(self, request):
+        if error := await self._delay():
+            return error
+        category = request.path_params["category"]
+        # Feeds never change, so a revalidation always gets a 304
+        etag = f'"{category}-{self.articles}"'
+        if request.headers.get("if-none-match") == etag:
+            return Response(status_code=304, headers={"ETag": etag})
+        items = [feed_item(category, index) for index in range(self.articles)]
+        return JSONResponse(
+            {"version": "1.1", "items": items}, headers={"ETag": etag}
+        )
+
+    def serve(self):
+        config = uvicorn.Config(
+            self.build_app(),
+            host="127.0.0.1",
+            port=self.port,
+            log_level="warning",
+            lifespan="off",
+        )
+        uvicorn.Server(config).run()
+
+    def start(self, in_process: bool = False):
+        """Serve in a child process so the fake never competes with the
+        app under test for the GIL. ``in_process`` uses a thread instead."""
+        if in_process:
+            self._runner = threading.Thread(target=self.serve, daemon=True)
+        else:
+            self._runner = multiprocessing.get_context("spawn").Process(
+                target=self.serve, daemon=True
+            )
+        self._runner.start()
+        _wait_for_port(self.port)
+        return self
+
+    def stop(self):
+        if isinstance(self._runner, multiprocessing.process.BaseProcess):
+            self._runner.terminate()
+            self._runner.join(timeout=5)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def _free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _wait_for_port(port: int, timeout: float = 10.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.1):
+                return
+        except OSError:
+            time.sleep(0.05)
+    raise RuntimeError(f"Fake upstream did not start on port {port}")
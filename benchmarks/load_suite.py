@@ -0,0 +1,324 @@
+"""Endpoint load tests against local provider and Mongo stand-ins.
+
+Starts a ``FakeUpstream`` (NewsAPI, Mediastack and the rss.app feeds) and
+the app under uvicorn in a child process, pointed at the fake and at either
+``--mongo-url`` or mongomock. The child ingests the fake feeds once before
+serving. Each scenario is then driven at a fixed concurrency for
+``--duration`` seconds, after ``--warmup`` seconds that are not measured,
+and its throughput and p50/p95/p99 are reported.
+
+``--save-baseline`` stores the results as JSON. Later runs compare against
+that file and exit non-zero when a route's throughput drops, or its p95 or
+p99 grow, by more than ``--threshold``. Baselines only mean something on
+the machine that recorded them.
+
+    python -m benchmarks.load_suite --save-baseline
+    python -m benchmarks.load_suite --upstream-latency 0.1 --error-rate 0.05
+    python -m benchmarks.load_suite --mongo-url mongodb://127.0.0.1:27017
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import sys
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional
+
+from benchmarks.common import (
+    DEFAULT_ENV,
+    print_summary,
+    summarize,
+    use_database,
+)
+from benchmarks.fake_upstream import FakeUpstream, _free_port, _wait_for_port
+
+DEFAULT_BASELINE = Path(__file__).parent / "baselines" / "load_suite.json"
+EMAIL = "load@example.com"
+PASSWORD = "correct horse battery staple"
+FEED_SOURCES = ["Source 1", "Source 2", "Source 3"]
+FEED_ENV = {
+    "general": "GENERAL_FEED_URL",
+    "politics": "POLITICS_FEED_URL",
+    "business": "BUSINESS_FEED_URL",
+    "scienceandtechnology": "SCIENCE_TECHNOLOGY_FEED_URL",
+    "sports": "SPORTS_FEED_URL",
+    "entertainment": "ENTERTAINMENT_FEED_URL",
+}
+# Latency increases below this are noise, whatever the ratio
+MIN_LATENCY_DELTA_MS = 1.0
+
+
+@dataclass
+class Scenario:
+    name: str
+    method: str
+    path: str
+    params: dict = field(default_factory=dict)
+    data: Optional[dict] = None
+    auth: bool = False
+
+
+SCENARIOS = [
+    Scenario("news", "GET", "/news/", {"category": "general", "perPage": 20}),
+    # A home page: every category merged into one page by one query
+    Scenario(
+        "news-all-categories",
+        "GET",
+        "/news/",
+        {"category": ",".join(FEED_ENV), "perPage": 20},
+    ),
+    Scenario("live", "POST", "/news/live", {"keyWords": ["markets"]}),
+    Scenario(
+        "ticker", "POST", "/news/ticker", {"keyWords": ["Tata Motors Limited"]}
+    ),
+    Scenario("nse-companies", "GET", "/news/nse-companies", {"perPage": 100}),
+    Scenario(
+        "token",
+        "POST",
+        "/user/token",
+        data={"username": EMAIL, "password": PASSWORD},
+    ),
+    Scenario("feed", "POST", "/user/feed", {"category": "general"}, auth=True),
+]
+
+
+def app_env(upstream_url: str, overrides: dict) -> dict:
+    env = {
+        **DEFAULT_ENV,
+        "NEWS_API_URL": f"{upstream_url}/v2",
+        "MEDIASTACK_URL": f"{upstream_url}/v1",
+        # Ingestion runs once up front, not during the measurement
+        "INGEST_SCHEDULER_ENABLED": "False",
+    }
+    for category, name in FEED_ENV.items():
+        env[name] = f"{upstream_url}/feeds/{category}.json"
+    env.update(overrides)
+    return env
+
+
+def serve_app(port: int, env: dict, mongo_url: Optional[str], db_name: str):
+    """Child process: ingest the fake feeds, then serve the app."""
+    os.environ.update(env)
+    import uvicorn
+
+    from aggregator.core.db import db_conn
+    from aggregator.main import create_app
+
+    use_database(db_name, mongo_url).client.drop_database(db_name)
+    db_conn.add_news()
+
+    uvicorn.run(create_app(), host="127.0.0.1", port=port, log_level="warning")
+
+
+async def prepare(client) -> dict:
+    """Register the load test user and return its auth headers."""
+    response = await client.post(
+        "/user/register", json={"email": EMAIL, "password": PASSWORD}
+    )
+    response.raise_for_status()
+    response = await client.post(
+        "/user/token", data={"username": EMAIL, "password": PASSWORD}
+    )
+    response.raise_for_status()
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+    response = await client.post(
+        "/user/feed-sources", json=FEED_SOURCES, headers=headers
+    )
+    response.raise_for_status()
+    return headers
+
+
+async def drive(client, scenario, auth_headers, concurrency, duration, warmup):
+    """Closed loop: ``concurrency`` clients each send the next request as
+    soon as the previous one completes."""
+    latencies, errors = [], 0
+    headers = auth_headers if scenario.auth else None
+    started = time.perf_counter()
+    measure_from = started + warmup
+    stop_at = measure_from + duration
+
+    async def worker():
+        nonlocal errors
+        while (now := time.perf_counter()) < stop_at:
+            response = await client.request(
+                scenario.method,
+                scenario.path,
+                params=scenario.params,
+                data=scenario.data,
+                headers=headers,
+            )
+            if now >= measure_from:
+                latencies.append(time.perf_counter() - now)
+                errors += response.status_code >= 400
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    result = summarize(scenario.name, latencies, duration)
+    result["errors"] = errors
+    return result
+
+
+def compare(baseline: dict, results: dict, threshold: float) -> list[str]:
+    """Regressions of ``results`` against ``baseline`` beyond ``threshold``."""
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get("results", {}).get(name)
+        if previous is None:
+            continue
+        if current["rps"] < previous["rps"] * (1 - threshold):
+            regressions.append(
+                f"{name}: {current['rps']:.1f} req/s, "
+                f"baseline {previous['rps']:.1f} req/s"
+            )
+        for key in ("p95_ms", "p99_ms"):
+            limit = max(
+                previous[key] * (1 + threshold),
+                previous[key] + MIN_LATENCY_DELTA_MS,
+            )
+            if current[key] > limit:
+                regressions.append(
+                    f"{name}: {key} {current[key]:.2f}, "
+                    f"baseline {previous[key]:.2f}"
+                )
+    return regressions
+
+
+async def run(args, app_url):
+    import httpx
+
+    limits = httpx.Limits(
+        max_connections=args.concurrency,
+        max_keepalive_connections=args.concurrency,
+    )
+    async with httpx.AsyncClient(
+        base_url=app_url, limits=limits, timeout=60
+    ) as client:
+        auth_headers = await prepare(client)
+        results = {}
+        for scenario in SCENARIOS:
+            if args.scenarios and scenario.name not in args.scenarios:
+                continue
+            result = await drive(
+                client,
+                scenario,
+                auth_headers,
+                args.concurrency,
+                args.duration,
+                args.warmup,
+            )
+            print_summary(result)
+            if result["errors"]:
+                print(f"{'':<32} {result['errors']} error responses")
+            results[scenario.name] = result
+    return results
+
+
+def parse_env(pairs: list[str]) -> dict:
+    env = {}
+    for pair in pairs:
+        key, _, value = pair.partition("=")
+        env[key] = value
+    return env
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawTextHelpFormatter
+    )
+    parser.add_argument(
+        "--scenarios",
+        nargs="*",
+        choices=[scenario.name for scenario in SCENARIOS],
+        help="routes to drive, all by default",
+    )
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--warmup", type=float, default=2.0)
+    parser.add_argument("--upstream-latency", type=float, default=0.05)
+    parser.add_argument("--upstream-jitter", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--articles", type=int, default=100)
+    parser.add_argument(
+        "--mongo-url", help="local mongod to use instead of mongomock"
+    )
+    parser.add_argument("--mongo-db", default="aggregator_load_suite")
+    parser.add_argument(
+        "--env",
+        action="append",
+        default=[],
+        metavar="KEY=VALUE",
+        help="extra app settings, e.g. UPSTREAM_CACHE_ENABLED=False",
+    )
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.2,
+        help="allowed relative regression, 0.2 = 20%%",
+    )
+    args = parser.parse_args()
+
+    upstream = FakeUpstream(
+        latency=args.upstream_latency,
+        jitter=args.upstream_jitter,
+        error_rate=args.error_rate,
+        articles=args.articles,
+    )
+    settings = {
+        "concurrency": args.concurrency,
+        "duration": args.duration,
+        "upstream_latency": args.upstream_latency,
+        "upstream_jitter": args.upstream_jitter,
+        "error_rate": args.error_rate,
+        "articles": args.articles,
+        "mongo": "mongod" if args.mongo_url else "mongomock",
+        "env": parse_env(args.env),
+    }
+
+    with upstream:
+        port = _free_port()
+        server = multiprocessing.get_context("spawn").Process(
+            target=serve_app,
+            args=(
+                port,
+                app_env(upstream.url, settings["env"]),
+                args.mongo_url,
+                args.mongo_db,
+            ),
+        )
+        server.start()
+        try:
+            _wait_for_port(port, timeout=120)
+            results = asyncio.run(run(args, f"http://127.0.0.1:{port}"))
+        finally:
+            server.terminate()
+            server.join(timeout=5)
+
+    if args.save_baseline:
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.baseline.write_text(
+            json.dumps({"settings": settings, "results": results}, indent=2)
+        )
+        print(f"Baseline saved to {args.baseline}")
+        return
+
+    if not args.baseline.exists():
+        print(f"No baseline at {args.baseline}; run with --save-baseline")
+        return
+    baseline = json.loads(args.baseline.read_text())
+    if baseline.get("settings") != settings:
+        print("Warning: baseline was recorded with different settings")
+    regressions = compare(baseline, results, args.threshold)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    if regressions:
+        sys.exit(1)
+    print(f"No regressions beyond {args.threshold:.0%} of the baseline")
+
+
+if __name__ == "__main__":
+    main()
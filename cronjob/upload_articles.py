@@ -1,3 +1,5 @@
-from aggregator.core.db import db_conn
+from aggregator.core.scheduler import ingest_scheduler
 
-db_conn.add_news()
\ No newline at end of file
+# Takes the same lease as the in-process scheduler, so a cron run never
+# overlaps ingestion in a running app
+ingest_scheduler.run_once(force=True)
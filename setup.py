@@ -2,7 +2,7 @@ from setuptools import find_packages, setup
 
 setup(
     name="news-aggregator",
-    packages=find_packages(exclude=["examples"]),
+    packages=find_packages(exclude=["examples", "benchmarks", "benchmarks.*"]),
     version="0.1.0",
     description="API service to fetch news and present data for given time frame and location",
     author="Siddhesh Kanawade",
@@ -12,19 +12,27 @@ setup(
         "fastapi==0.112.1",
         "uvicorn[standard]==0.30.6",
         "requests==2.32.3",
+        "aiohttp==3.10.10",
+        "orjson==3.10.11",
         "black==22.3.0",
         "autoflake==1.4",
         "isort==5.9.3",
         "python-jose==3.3.0",
         "passlib==1.7.4",
         "pymongo==4.1.1",
+        "motor==3.0.0",
         "pydantic-settings==2.6.0",
         "pydantic[email]==2.9.2",
         "python-multipart==0.0.12",
         "argon2-cffi==23.1.0",
         "tqdm",
-        "pandas",
     ],
+    extras_require={
+        # Brotli response compression; gzip is used without it
+        "brotli": ["brotli"],
+        # update_companies/update_nse.py, which refreshes static/nse.csv
+        "nse": ["pandas"],
+    },
     setup_requires=[
         "pytest-runner",
     ],
@@ -0,0 +1,31 @@
+import os
+
+import pytest
+
+# The settings are read from the environment when aggregator is imported
+for key, value in {
+    "NEWS_API_KEY": "test",
+    "MEDIASTACK_API_KEY": "test",
+    "MONGO_DB_URL": "mongodb://127.0.0.1:27017",
+    "SECRET_KEY": "test-secret",
+    "GENERAL_FEED_URL": "http://127.0.0.1/feeds/general.json",
+    "POLITICS_FEED_URL": "http://127.0.0.1/feeds/politics.json",
+    "BUSINESS_FEED_URL": "http://127.0.0.1/feeds/business.json",
+    "SCIENCE_TECHNOLOGY_FEED_URL": "http://127.0.0.1/feeds/scienceandtechnology.json",
+    "SPORTS_FEED_URL": "http://127.0.0.1/feeds/sports.json",
+    "ENTERTAINMENT_FEED_URL": "http://127.0.0.1/feeds/entertainment.json",
+    "INGEST_SCHEDULER_ENABLED": "False",
+}.items():
+    os.environ.setdefault(key, value)
+
+
+@pytest.fixture
+def db():
+    """The sync data-access layer on an in-memory mongomock database."""
+    mongomock = pytest.importorskip("mongomock")
+    from aggregator.core.db import db_conn
+
+    previous = db_conn._db
+    db_conn.db = mongomock.MongoClient()["aggregator_test"]
+    yield db_conn.db
+    db_conn._db = previous
@@ -0,0 +1,67 @@
+from datetime import datetime, timedelta
+
+import pytz
+from bson import ObjectId
+
+from aggregator.core.db import db_conn
+from aggregator.core.db.connection import ARTICLES_COLLECTION
+from aggregator.schemas import NewsArticle
+from aggregator.utils.helper import listing_fields
+from aggregator.utils.search import SearchIndex
+
+
+def entries(category, count):
+    published = datetime.now(tz=pytz.UTC) - timedelta(hours=1)
+    articles = [
+        NewsArticle(
+            url=f"https://example.com/{category}/{index}",
+            title=f"{category} headline {index}",
+            description=f"{category} story",
+            datePublished=published,
+        )
+        for index in range(count)
+    ]
+    return [(article, listing_fields(article)) for article in articles]
+
+
+def test_refresh_indexes_batch_committed_after_a_later_one(db, monkeypatch):
+    index = SearchIndex()
+    index.refresh()
+    articles = db[ARTICLES_COLLECTION]
+    insert_many = articles.insert_many
+    interleaved = []
+
+    def slow_insert_many(documents, ordered=True):
+        # The business batch gets its _ids first but commits second, after
+        # the sports batch and a refresh that went past their _ids
+        for document in documents:
+            document.setdefault("_id", ObjectId())
+        if not interleaved:
+            interleaved.append(True)
+            db_conn._insert_new_articles(entries("sports", 3), "sports")
+            index.refresh()
+        return insert_many(documents, ordered=ordered)
+
+    monkeypatch.setattr(articles, "insert_many", slow_insert_many)
+    db_conn._insert_new_articles(entries("business", 3), "business")
+
+    assert index.search("sports")[1] == 3
+    assert index.search("business")[1] == 0
+    index.refresh()
+    assert index.search("business")[1] == 3
+    assert index.search("headline", categories=["business"])[1] == 3
+    assert len(index) == 6
+
+
+def test_refresh_picks_up_tags(db):
+    index = SearchIndex()
+    inserted, _ = db_conn._insert_new_articles(
+        entries("business", 2), "business"
+    )
+    index.refresh()
+    assert index.search("business", categories=["sports"])[1] == 0
+
+    db_conn._tag_articles(inserted[:1], "sports")
+    index.refresh()
+    assert index.search("business", categories=["sports"])[1] == 1
+    assert len(index) == 2